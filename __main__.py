@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 from datetime import datetime
 from PySide6.QtWidgets import QApplication
@@ -45,6 +46,8 @@ def setup_logging():
         logger.info("Running in console mode - logs will be displayed here")
 
 if __name__ == "__main__":
+    # Install verification hashes on worker processes, which the compiled build has to bootstrap
+    multiprocessing.freeze_support()
     setup_logging()
     logger.info(f"Turtle WoW Launcher {version} starting...")
     
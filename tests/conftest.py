@@ -0,0 +1,58 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    """Serves server.files ({path: bytes}) with ETags, Range and If-Range, like the CDN does."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get('Range')))
+        data = self.server.files.get(self.path)
+        if data is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        etag = self.server.etags.get(self.path, '"v1"')
+        start, end = 0, len(data)
+        byte_range = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        if byte_range and (if_range is None or if_range == etag):
+            first, last = byte_range.removeprefix('bytes=').split('-')
+            if not first:  # the last bytes of the file
+                start, end = max(0, len(data) - int(last)), len(data)
+            else:
+                start, end = int(first), min(int(last) + 1, len(data)) if last else len(data)
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{end - 1}/{len(data)}")
+        else:
+            self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(end - start))
+        self.end_headers()
+        try:
+            self.wfile.write(data[start:end])
+        except ConnectionError:
+            pass  # the client took what it needed and hung up
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    """A local HTTP server; put content in server.files and read server.requests to see what was asked for."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RangeRequestHandler)
+    server.daemon_threads = True
+    server.files = {}
+    server.etags = {}
+    server.requests = []  # (path, Range header)
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,139 @@
+import io
+import os
+import tarfile
+import zipfile
+import pytest
+from turtlelauncher.utils import archive_codecs
+from turtlelauncher.utils.archive_codecs import (
+    CorruptArchiveError, SevenZipCodec, TarZstdCodec, UnsupportedArchiveError, ZipCodec, detect_codec
+)
+from turtlelauncher.utils.zip_extract import ExtractionCancelled
+
+
+CLIENT = {
+    "Client/WoW.exe": b"exe" * 1000,
+    "Client/Data/patch.MPQ": os.urandom(300 * 1024),
+    "Client/Data/patch-2.MPQ": b"turtle" * 50000,
+    "Client/Data/empty.txt": b"",
+}
+
+
+def write_zip(path):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("Client/", b"")
+        for name, data in CLIENT.items():
+            archive.writestr(name, data)
+    return path
+
+
+def write_tar_zst(path):
+    zstandard = pytest.importorskip("zstandard")
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w') as tar:
+        folder = tarfile.TarInfo("Client")
+        folder.type = tarfile.DIRTYPE
+        tar.addfile(folder)
+        for name, data in CLIENT.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    path.write_bytes(zstandard.ZstdCompressor().compress(buffer.getvalue()))
+    return path
+
+
+def write_7z(path):
+    py7zr = pytest.importorskip("py7zr")
+    with py7zr.SevenZipFile(path, 'w') as archive:
+        for name, data in CLIENT.items():
+            archive.writef(io.BytesIO(data), name)
+    return path
+
+
+ARCHIVES = [(ZipCodec, write_zip, "client.zip"), (TarZstdCodec, write_tar_zst, "client.tar.zst"),
+            (SevenZipCodec, write_7z, "client.7z")]
+
+
+@pytest.mark.parametrize("codec_class, write, name", ARCHIVES)
+@pytest.mark.parametrize("atomic", [False, True])
+def test_round_trip(tmp_path, codec_class, write, name, atomic):
+    archive_path = write(tmp_path / name)
+    codec = detect_codec(archive_path)
+    assert isinstance(codec, codec_class)
+    progress = []
+
+    extracted = codec.extract(archive_path, tmp_path / "out", progress_callback=lambda done, total: progress.append((done, total)),
+                              atomic=atomic)
+
+    assert {info.filename for info in extracted if not info.is_dir()} == set(CLIENT)
+    for member_name, data in CLIENT.items():
+        assert (tmp_path / "out" / member_name).read_bytes() == data
+    assert not list((tmp_path / "out").rglob("*.tlpart"))
+    assert progress and progress[-1][0] == progress[-1][1]
+
+
+@pytest.mark.parametrize("codec_class, write, name", ARCHIVES)
+def test_members_and_partial_extraction(tmp_path, codec_class, write, name):
+    archive_path = write(tmp_path / name)
+    codec = codec_class()
+    members = {info.filename: info for info in codec.members(archive_path) if not info.is_dir()}
+    assert set(members) == set(CLIENT)
+    assert all(members[member_name].file_size == len(data) for member_name, data in CLIENT.items())
+    if codec.indexed:
+        assert all(info.CRC is not None for info in members.values())
+
+    codec.extract(archive_path, tmp_path / "out", [members["Client/WoW.exe"]])
+
+    assert (tmp_path / "out/Client/WoW.exe").read_bytes() == CLIENT["Client/WoW.exe"]
+    assert not (tmp_path / "out/Client/Data/patch.MPQ").exists()
+
+
+@pytest.mark.parametrize("codec_class, write, name", ARCHIVES)
+def test_cancelled(tmp_path, codec_class, write, name):
+    archive_path = write(tmp_path / name)
+    with pytest.raises(ExtractionCancelled):
+        codec_class().extract(archive_path, tmp_path / "out", is_cancelled=lambda: True)
+
+
+@pytest.mark.parametrize("codec_class, write, name", ARCHIVES[1:])
+def test_truncated_archive(tmp_path, codec_class, write, name):
+    archive_path = write(tmp_path / name)
+    archive_path.write_bytes(archive_path.read_bytes()[:len(archive_path.read_bytes()) // 2])
+    with pytest.raises(CorruptArchiveError):
+        codec_class().extract(archive_path, tmp_path / "out")
+
+
+def test_missing_optional_package(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive_codecs, 'zstandard', None)
+    monkeypatch.setattr(archive_codecs, 'py7zr', None)
+    (tmp_path / "client.tar.zst").write_bytes(b"\x28\xb5\x2f\xfd")
+    (tmp_path / "client.7z").write_bytes(b"7z\xbc\xaf\x27\x1c")
+    with pytest.raises(UnsupportedArchiveError):
+        TarZstdCodec().extract(tmp_path / "client.tar.zst", tmp_path / "out")
+    with pytest.raises(UnsupportedArchiveError):
+        SevenZipCodec().members(tmp_path / "client.7z")
+
+
+def test_detect_codec_from_magic_over_the_name(tmp_path):
+    (tmp_path / "zstd.zip").write_bytes(b"\x28\xb5\x2f\xfd" + b"\0" * 16)
+    (tmp_path / "pzstd.zip").write_bytes((0x184D2A50).to_bytes(4, 'little') + b"\0" * 16)  # skippable frame
+    (tmp_path / "7z.zip").write_bytes(b"7z\xbc\xaf\x27\x1c" + b"\0" * 16)
+    (tmp_path / "zip.7z").write_bytes(b"PK\x03\x04" + b"\0" * 16)
+    (tmp_path / "empty.zip").write_bytes(b"PK\x05\x06" + b"\0" * 18)
+
+    assert detect_codec(tmp_path / "zstd.zip").name == 'tar.zst'
+    assert detect_codec(tmp_path / "pzstd.zip").name == 'tar.zst'
+    assert detect_codec(tmp_path / "7z.zip", url="https://cdn.example/client.zip").name == '7z'
+    assert detect_codec(tmp_path / "zip.7z").name == 'zip'
+    assert detect_codec(tmp_path / "empty.zip").name == 'zip'
+
+
+def test_detect_codec_from_the_url(tmp_path):
+    assert detect_codec(url="https://cdn.example/twmoa_1172.TAR.ZST?token=1").name == 'tar.zst'
+    assert detect_codec(url="https://cdn.example/twmoa_1172.tzst").name == 'tar.zst'
+    assert detect_codec(url="https://cdn.example/twmoa_1172.7z#part").name == '7z'
+    assert detect_codec(url="https://cdn.example/twmoa_1172.zip").name == 'zip'
+    # Not downloaded yet, or unrecognisable: the URL decides, then zip
+    assert detect_codec(tmp_path / "missing", url="https://cdn.example/client.7z").name == '7z'
+    (tmp_path / "unknown").write_bytes(b"\0" * 16)
+    assert detect_codec(tmp_path / "unknown", url="https://cdn.example/client.tar.zst").name == 'tar.zst'
+    assert detect_codec(url="https://cdn.example/download?id=3").name == 'zip'
@@ -0,0 +1,82 @@
+import hashlib
+import os
+import random
+import bsdiff4
+import pytest
+from turtlelauncher.utils import binary_patch
+from turtlelauncher.utils.binary_patch import PatchError, add_bytes, apply_bsdiff, read_offset
+from turtlelauncher.utils.zip_extract import ExtractionCancelled
+
+
+def mutate(data, seed):
+    """data with some bytes changed, a block removed and one inserted, like a patched MPQ."""
+    rng = random.Random(seed)
+    data = bytearray(data)
+    for _ in range(200):
+        data[rng.randrange(len(data))] = rng.randrange(256)
+    del data[1000:3000]
+    data[5000:5000] = rng.randbytes(4000)
+    return bytes(data)
+
+
+def write_patch(tmp_path, old, new):
+    old_path, patch_path = tmp_path / "old", tmp_path / "patch"
+    old_path.write_bytes(old)
+    patch_path.write_bytes(bsdiff4.diff(old, new))
+    return old_path, patch_path
+
+
+def test_read_offset_sign_magnitude():
+    assert read_offset((5).to_bytes(8, 'little')) == 5
+    assert read_offset((5 | 1 << 63).to_bytes(8, 'little')) == -5
+
+
+def test_add_bytes_wraps_each_byte():
+    first, second = os.urandom(4096), os.urandom(4096)
+    assert add_bytes(first, second) == bytes((a + b) % 256 for a, b in zip(first, second))
+
+
+@pytest.mark.parametrize("chunk_size", [binary_patch.CHUNK_SIZE, 777])
+def test_apply_bsdiff_matches_bsdiff4(tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(binary_patch, 'CHUNK_SIZE', chunk_size)  # small chunks split every block
+    old = os.urandom(64 * 1024) + b"turtle" * 5000
+    new = mutate(old, seed=1)
+    old_path, patch_path = write_patch(tmp_path, old, new)
+    new_path = tmp_path / "new"
+
+    digest = apply_bsdiff(patch_path, old_path, new_path)
+
+    assert new_path.read_bytes() == new == bsdiff4.patch(old, bsdiff4.diff(old, new))
+    assert digest == hashlib.sha256(new).hexdigest()
+
+
+def test_apply_bsdiff_to_a_shorter_old_file(tmp_path):
+    old = os.urandom(2000)
+    new = old + os.urandom(10000)
+    old_path, patch_path = write_patch(tmp_path, old, new)
+
+    apply_bsdiff(patch_path, old_path, tmp_path / "new")
+
+    assert (tmp_path / "new").read_bytes() == new
+
+
+def test_not_a_patch(tmp_path):
+    (tmp_path / "old").write_bytes(b"old")
+    (tmp_path / "patch").write_bytes(b"not a patch at all, just some bytes")
+    with pytest.raises(PatchError):
+        apply_bsdiff(tmp_path / "patch", tmp_path / "old", tmp_path / "new")
+
+
+def test_truncated_patch(tmp_path):
+    old = os.urandom(10000)
+    old_path, patch_path = write_patch(tmp_path, old, mutate(old, seed=2))
+    patch_path.write_bytes(patch_path.read_bytes()[:40])
+    with pytest.raises(PatchError):
+        apply_bsdiff(patch_path, old_path, tmp_path / "new")
+
+
+def test_cancelled(tmp_path):
+    old = os.urandom(10000)
+    old_path, patch_path = write_patch(tmp_path, old, mutate(old, seed=3))
+    with pytest.raises(ExtractionCancelled):
+        apply_bsdiff(patch_path, old_path, tmp_path / "new", is_cancelled=lambda: True)
@@ -0,0 +1,64 @@
+import hashlib
+import os
+from turtlelauncher.utils.checksum import StreamingHasher, parse_checksum_file
+
+
+def test_parse_checksum_file():
+    text = "ABC123  client.zip\n" "def456 *other.zip\n"
+    assert parse_checksum_file(text, "client.zip") == "abc123"
+    assert parse_checksum_file(text, "other.zip") == "def456"
+    assert parse_checksum_file(text, "missing.zip") is None
+    assert parse_checksum_file("abc123\n", "client.zip") == "abc123"
+
+
+def test_skipped_chunks_are_read_back_by_catch_up(tmp_path):
+    data = os.urandom(1000)
+    path = tmp_path / "file"
+    path.write_bytes(data)
+    hasher = StreamingHasher()
+    hasher.update_at(0, data[:100])
+    hasher.update_at(500, data[500:])  # out of order, skipped
+    hasher.update_at(50, data[50:300])  # overlaps the hashed prefix
+    assert hasher.offset == 300
+
+    assert hasher.catch_up(path, len(data)) == 700
+    assert hasher.matches(hashlib.sha256(data).hexdigest())
+
+
+def test_follower_hashes_out_of_order_segments_during_the_download(tmp_path):
+    segment = 64 * 1024
+    data = os.urandom(8 * segment)
+    path = tmp_path / "file"
+    with open(path, 'wb') as f:
+        f.truncate(len(data))
+    hasher = StreamingHasher()
+    hasher.follow(path)
+
+    # Segments land back to front, like parallel connections finishing in any order
+    written = set()
+    with open(path, 'r+b') as f:
+        for index in reversed(range(8)):
+            offset = index * segment
+            f.seek(offset)
+            f.write(data[offset:offset + segment])
+            f.flush()
+            hasher.update_at(offset, data[offset:offset + segment])
+            written.add(index)
+            contiguous = 0
+            while contiguous in written:
+                contiguous += 1
+            hasher.advance(contiguous * segment)
+    hasher.stop_following(drain=True)
+
+    assert hasher.offset == len(data)
+    assert hasher.catch_up(path, len(data)) == 0
+    assert hasher.matches(hashlib.sha256(data).hexdigest())
+
+
+def test_stop_following_without_drain_returns_right_away(tmp_path):
+    path = tmp_path / "file"
+    path.write_bytes(b"\0" * 1024)
+    hasher = StreamingHasher()
+    hasher.follow(path)
+    hasher.stop_following()  # nothing was ever advanced; must not wait for data
+    assert hasher.offset == 0
@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+import io
+import json
+import os
+import tarfile
+import zipfile
+import bsdiff4
+import pytest
+from turtlelauncher.utils.archive_codecs import ZipCodec, TarZstdCodec
+from turtlelauncher.utils.dedup import break_link
+
+
+def link_installs(tmp_path, files):
+    """Two installs whose files are hardlinks of each other, as InstallDeduplicator leaves them."""
+    first, second = tmp_path / "first", tmp_path / "second"
+    for name, data in files.items():
+        (first / name).parent.mkdir(parents=True, exist_ok=True)
+        (first / name).write_bytes(data)
+        (second / name).parent.mkdir(parents=True, exist_ok=True)
+        os.link(first / name, second / name)
+    return first, second
+
+
+def test_break_link(tmp_path):
+    first, second = link_installs(tmp_path, {"WTF/Config.wtf": b'SET gxApi "d3d9"\n'})
+
+    assert break_link(first / "WTF/Config.wtf")
+    (first / "WTF/Config.wtf").write_bytes(b'SET gxApi "d3d11"\n')
+
+    assert (second / "WTF/Config.wtf").read_bytes() == b'SET gxApi "d3d9"\n'
+    assert not break_link(first / "WTF/Config.wtf")  # nothing shared any more
+
+
+@pytest.mark.parametrize("atomic", [False, True])
+def test_extracting_over_a_linked_file_leaves_the_other_install_alone(tmp_path, atomic):
+    first, second = link_installs(tmp_path, {"Data/patch.MPQ": b"old" * 1000})
+    archive_path = tmp_path / "client.zip"
+    with zipfile.ZipFile(archive_path, 'w') as archive:
+        archive.writestr("Data/patch.MPQ", b"new" * 1000)
+
+    ZipCodec().extract(archive_path, first, atomic=atomic)
+
+    assert (first / "Data/patch.MPQ").read_bytes() == b"new" * 1000
+    assert (second / "Data/patch.MPQ").read_bytes() == b"old" * 1000
+
+
+def test_extracting_a_tar_over_a_linked_file_leaves_the_other_install_alone(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    first, second = link_installs(tmp_path, {"Data/patch.MPQ": b"old" * 1000})
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w') as tar:
+        info = tarfile.TarInfo("Data/patch.MPQ")
+        info.size = 3000
+        tar.addfile(info, io.BytesIO(b"new" * 1000))
+    archive_path = tmp_path / "client.tar.zst"
+    archive_path.write_bytes(zstandard.ZstdCompressor().compress(buffer.getvalue()))
+
+    TarZstdCodec().extract(archive_path, first)
+
+    assert (first / "Data/patch.MPQ").read_bytes() == b"new" * 1000
+    assert (second / "Data/patch.MPQ").read_bytes() == b"old" * 1000
+
+
+def test_delta_update_of_linked_files_leaves_the_other_install_alone(http_server, tmp_path, monkeypatch):
+    pytest.importorskip("PySide6")
+    from turtlelauncher.utils import downloader
+    from turtlelauncher.utils.downloader import DeltaUpdateWorker
+    from turtlelauncher.utils.file_index import FileIndex
+    from turtlelauncher.utils.http_service import get_http_service
+
+    monkeypatch.setattr(downloader, 'FileIndex', lambda: FileIndex(tmp_path / "index.sqlite3"))
+    old = {"Data/patch.MPQ": os.urandom(64 * 1024), "WoW.exe": b"old exe" * 1000}
+    new = {"Data/patch.MPQ": old["Data/patch.MPQ"][:50000] + b"turtle" * 100, "WoW.exe": b"new exe" * 1000}
+    first, second = link_installs(tmp_path, old)
+
+    sha256 = {name: hashlib.sha256(data).hexdigest() for name, data in new.items()}
+    patch = bsdiff4.diff(old["Data/patch.MPQ"], new["Data/patch.MPQ"])
+    http_server.files["/patch.MPQ.bsdiff"] = patch
+    http_server.files["/WoW.exe"] = new["WoW.exe"]
+    http_server.files["/manifest.json"] = json.dumps({"files": [
+        {"path": "Data/patch.MPQ", "size": len(new["Data/patch.MPQ"]), "sha256": sha256["Data/patch.MPQ"],
+         "patches": [{"from_sha256": hashlib.sha256(old["Data/patch.MPQ"]).hexdigest(),
+                      "url": "patch.MPQ.bsdiff", "size": len(patch)}]},
+        {"path": "WoW.exe", "size": len(new["WoW.exe"]), "sha256": sha256["WoW.exe"]},
+    ]}).encode()
+
+    worker = DeltaUpdateWorker(f"{http_server.url}/manifest.json", first)
+    updated = []
+    worker.signals.update_completed.connect(updated.append)
+
+    async def run():
+        try:
+            await worker.async_run()
+        finally:
+            await get_http_service().close_loop_clients()
+    asyncio.run(run())
+
+    assert updated == [2]
+    assert ("/patch.MPQ.bsdiff", None) in http_server.requests  # patched, not downloaded
+    for name, data in new.items():
+        assert (first / name).read_bytes() == data
+    for name, data in old.items():
+        assert (second / name).read_bytes() == data
@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import io
+import os
+import time
+import zipfile
+import pytest
+
+pytest.importorskip("PySide6")
+
+from turtlelauncher.utils import downloader
+from turtlelauncher.utils.downloader import (
+    DownloadExtractWorker, DownloadSegment, VerifyRepairWorker, split_into_segments, steal_segment
+)
+from turtlelauncher.utils.archive_cache import ArchiveCache
+from turtlelauncher.utils.file_index import FileIndex
+from turtlelauncher.utils.http_service import get_http_service
+from turtlelauncher.utils.partial_download import PartialDownload
+from turtlelauncher.utils.transfers import JobClass, JobState, TransferScheduler
+
+
+SEGMENT_SIZE = 64 * 1024
+
+
+def make_worker(url, tmp_path, **kwargs):
+    worker = DownloadExtractWorker(url, tmp_path / "install", **kwargs)
+    # Small segments so a few hundred KB exercise the same paths a multi-GB archive does
+    worker.SEGMENT_SIZE = SEGMENT_SIZE
+    worker.MIN_SEGMENT_SIZE = SEGMENT_SIZE // 4
+    worker.CHUNK_SIZE = 16 * 1024
+    worker.SEGMENT_COUNT = 4
+    return worker
+
+
+def download(worker, partial):
+    async def run():
+        try:
+            await worker.download_file(worker.url, partial)
+        finally:
+            await get_http_service().close_loop_clients()
+    asyncio.run(run())
+
+
+def ranges_requested(server, path):
+    return [byte_range for request_path, byte_range in server.requests if request_path == path]
+
+
+def test_split_into_segments_covers_the_range():
+    segments = split_into_segments(100, 1000, 4)
+    assert [(s.start, s.end) for s in segments] == [(100, 325), (325, 550), (550, 775), (775, 1000)]
+    assert [(s.start, s.end) for s in split_into_segments(0, 3, 8)] == [(0, 1), (1, 2), (2, 3)]
+
+
+def test_steal_segment_splits_the_largest_remainder():
+    slow = DownloadSegment(0, 1000)
+    slow.position = 200
+    fast = DownloadSegment(1000, 1100)
+    stolen = steal_segment([slow, fast], min_size=100)
+    assert (stolen.start, stolen.end) == (600, 1000)
+    assert slow.end == 600
+    assert steal_segment([fast], min_size=100) is None
+    assert steal_segment([], min_size=100) is None
+
+
+def test_ranged_download_matches_and_hashes_in_the_background(http_server, tmp_path):
+    data = os.urandom(10 * SEGMENT_SIZE + 123)
+    http_server.files["/client.zip"] = data
+    http_server.files["/client.zip.sha256"] = f"{hashlib.sha256(data).hexdigest()}  client.zip\n".encode()
+    url = f"{http_server.url}/client.zip"
+    worker = make_worker(url, tmp_path)
+    partial = PartialDownload(url, tmp_path / "downloads")
+
+    download(worker, partial)
+
+    assert partial.data_path.read_bytes() == data
+    assert partial.is_complete
+    # Every segment was hashed while downloading, nothing is left to read back from disk
+    assert worker.hasher.catch_up(partial.data_path, len(data)) == 0
+    assert worker.hasher.matches(hashlib.sha256(data).hexdigest())
+
+
+def test_segments_are_stolen_once_nothing_is_pending(http_server, tmp_path):
+    data = os.urandom(4 * SEGMENT_SIZE)
+    http_server.files["/client.zip"] = data
+    url = f"{http_server.url}/client.zip"
+    worker = make_worker(url, tmp_path)
+    worker.SEGMENT_SIZE = len(data)  # a single pending segment, the other connections can only steal
+    partial = PartialDownload(url, tmp_path / "downloads")
+
+    download(worker, partial)
+
+    assert partial.data_path.read_bytes() == data
+    segment_requests = [r for r in ranges_requested(http_server, "/client.zip") if r != 'bytes=0-0']
+    assert len(segment_requests) > 1
+
+
+def test_resume_only_fetches_missing_ranges(http_server, tmp_path):
+    data = os.urandom(6 * SEGMENT_SIZE)
+    http_server.files["/client.zip"] = data
+    url = f"{http_server.url}/client.zip"
+    partial = PartialDownload(url, tmp_path / "downloads")
+    partial.reset(len(data), '"v1"')
+    with partial.data_path.open('r+b') as f:
+        f.write(data[:2 * SEGMENT_SIZE])
+        f.seek(4 * SEGMENT_SIZE)
+        f.write(data[4 * SEGMENT_SIZE:5 * SEGMENT_SIZE])
+    partial.add_range(0, 2 * SEGMENT_SIZE)
+    partial.add_range(4 * SEGMENT_SIZE, 5 * SEGMENT_SIZE)
+    partial.save()
+
+    download(make_worker(url, tmp_path), PartialDownload(url, tmp_path / "downloads"))
+
+    assert partial.data_path.read_bytes() == data
+    missing = [(2 * SEGMENT_SIZE, 4 * SEGMENT_SIZE), (5 * SEGMENT_SIZE, 6 * SEGMENT_SIZE)]
+    for byte_range in ranges_requested(http_server, "/client.zip"):
+        if byte_range == 'bytes=0-0':
+            continue  # the probe
+        first, last = map(int, byte_range.removeprefix('bytes=').split('-'))
+        assert any(start <= first and last < end for start, end in missing), byte_range
+
+
+def test_resume_starts_over_when_the_remote_file_changed(http_server, tmp_path):
+    old = os.urandom(3 * SEGMENT_SIZE)
+    new = os.urandom(3 * SEGMENT_SIZE)
+    http_server.files["/client.zip"] = new
+    http_server.etags["/client.zip"] = '"v2"'
+    url = f"{http_server.url}/client.zip"
+    partial = PartialDownload(url, tmp_path / "downloads")
+    partial.reset(len(old), '"v1"')
+    with partial.data_path.open('r+b') as f:
+        f.write(old[:SEGMENT_SIZE])
+    partial.add_range(0, SEGMENT_SIZE)
+    partial.save()
+
+    download(make_worker(url, tmp_path), PartialDownload(url, tmp_path / "downloads"))
+
+    assert partial.data_path.read_bytes() == new
+
+
+def test_cancelling_waits_for_the_thread_before_closing_the_file_index(http_server, tmp_path, monkeypatch):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr("Client/WoW.exe", b"exe")
+    http_server.files["/client.zip"] = buffer.getvalue()
+    monkeypatch.setattr(downloader, 'FileIndex', lambda: FileIndex(tmp_path / "index.sqlite3"))
+    (tmp_path / "WoW.exe").write_bytes(b"exe")
+
+    thread_errors = []
+
+    def slow_diff(manifest, install_dir, progress_callback, is_cancelled, workers, file_index):
+        deadline = time.time() + 5
+        while not is_cancelled() and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)  # still recording what it hashed when the task unwinds
+        try:
+            file_index.record(tmp_path / "WoW.exe", 'crc32', "00000000")
+        except Exception as e:
+            thread_errors.append(e)
+        return []
+    monkeypatch.setattr(downloader, 'diff_install', slow_diff)
+
+    worker = VerifyRepairWorker(tmp_path, f"{http_server.url}/client.zip")
+    errors, paused = [], []
+    worker.signals.error_occurred.connect(errors.append)
+    worker.signals.download_paused.connect(lambda: paused.append(True))
+
+    async def run():
+        task = asyncio.create_task(worker.async_run())
+        await asyncio.sleep(0.3)
+        worker.cancel()
+        task.cancel()  # what worker.cancel() does through the AsyncTask it normally has
+        await asyncio.gather(task, return_exceptions=True)
+        await get_http_service().close_loop_clients()
+    asyncio.run(run())
+
+    assert thread_errors == []
+    assert errors == []
+    assert paused == [True]
+
+
+def test_starting_a_job_cancels_a_paused_one(tmp_path, monkeypatch):
+    scheduler = TransferScheduler({JobClass.GAME: 0})  # keeps jobs queued instead of running them
+    monkeypatch.setattr(downloader, 'get_transfer_scheduler', lambda: scheduler)
+    monkeypatch.setattr(downloader, 'get_archive_cache', lambda: ArchiveCache(tmp_path / "cache", max_size=0))
+    utility = downloader.DownloadExtractUtility()
+    utility.download_and_extract("https://example.invalid/old.zip", tmp_path)
+    paused_job = utility.current_job
+    utility.cancel_download()  # pauses; the progress stays on disk
+    assert paused_job.state == JobState.PAUSED
+
+    utility.download_and_extract("https://example.invalid/new.zip", tmp_path)
+
+    assert paused_job.state == JobState.CANCELLED
+    assert scheduler.jobs == [utility.current_job]
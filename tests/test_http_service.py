@@ -0,0 +1,88 @@
+import asyncio
+import socket
+import httpx
+import pytest
+from turtlelauncher.utils.http_service import HttpService
+
+
+@pytest.fixture
+def service():
+    service = HttpService()
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def stalled_url():
+    """A server that accepts connections (through the listen backlog) and never answers."""
+    with socket.socket() as listener:
+        listener.bind(('127.0.0.1', 0))
+        listener.listen()
+        yield f"http://127.0.0.1:{listener.getsockname()[1]}/client.zip"
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_reads_time_out():
+    assert HttpService.TIMEOUT.read is not None
+
+
+def test_get(http_server, service):
+    http_server.files["/client.zip"] = b"turtle" * 1000
+
+    response = service.client().get(f"{http_server.url}/client.zip")
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"v1"'
+    assert response.content == b"turtle" * 1000
+    assert service.client().get(f"{http_server.url}/missing.zip").status_code == 404
+    assert service.stats()
+
+
+def test_async_range_stream(http_server, service):
+    data = bytes(range(256)) * 1000
+    http_server.files["/client.zip"] = data
+
+    async def fetch(http2):
+        try:
+            client = service.async_client(http2)
+            async with client.stream('GET', f"{http_server.url}/client.zip", headers={'Range': 'bytes=1000-'}) as response:
+                return response.status_code, response.headers['Content-Range'], b"".join(
+                    [chunk async for chunk in response.aiter_bytes(chunk_size=4096)]
+                )
+        finally:
+            await service.close_loop_clients()
+
+    for http2 in (False, True):  # a plain http:// server falls back to HTTP/1.1 either way
+        assert asyncio.run(fetch(http2)) == (206, f"bytes 1000-{len(data) - 1}/{len(data)}", data[1000:])
+
+
+def test_connection_refused_is_an_httpx_error(service):
+    with pytest.raises(httpx.ConnectError):
+        service.client().get(f"http://127.0.0.1:{closed_port()}/client.zip")
+
+    async def fetch():
+        try:
+            await service.async_client(False).get(f"http://127.0.0.1:{closed_port()}/client.zip")
+        finally:
+            await service.close_loop_clients()
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(fetch())
+
+
+def test_stalled_read_is_an_httpx_timeout(service, stalled_url):
+    timeout = httpx.Timeout(5, read=0.2)
+    with pytest.raises(httpx.ReadTimeout):
+        service.client().get(stalled_url, timeout=timeout)
+
+    async def fetch():
+        try:
+            await service.async_client(False).get(stalled_url, timeout=timeout)
+        finally:
+            await service.close_loop_clients()
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(fetch())
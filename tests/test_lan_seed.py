@@ -0,0 +1,153 @@
+import asyncio
+import hashlib
+import os
+import socket
+import httpx
+import pytest
+from turtlelauncher.utils import lan_seed
+from turtlelauncher.utils.archive_cache import ArchiveCache
+from turtlelauncher.utils.file_index import FileIndex
+from turtlelauncher.utils.lan_seed import LanSeedServer, find_seed_archive, parse_range
+
+
+ARCHIVE = os.urandom(200 * 1024)
+DIGEST = hashlib.sha256(ARCHIVE).hexdigest()
+ETAG = '"cdn-etag"'
+LAST_MODIFIED = "Wed, 01 Oct 2025 10:00:00 GMT"
+
+
+@pytest.fixture
+def seed(tmp_path, monkeypatch):
+    """A started LanSeedServer with ARCHIVE cached and an install folder; run(coroutine(client, base)) talks to it."""
+    monkeypatch.setattr(lan_seed, 'FileIndex', lambda: FileIndex(tmp_path / "index.sqlite3"))
+    (tmp_path / "client.zip").write_bytes(ARCHIVE)
+    cache = ArchiveCache(tmp_path / "cache", max_size=10 * 1024 * 1024)
+    cache.store(tmp_path / "client.zip", DIGEST, "https://cdn.example/client.zip", ETAG, LAST_MODIFIED)
+    (tmp_path / "install").mkdir()
+
+    def run(coroutine):
+        async def main():
+            server = LanSeedServer(cache, tmp_path / "install", port=0, discovery_port=0)
+            await server.start()
+            try:
+                async with httpx.AsyncClient() as client:
+                    return await coroutine(client, f"http://127.0.0.1:{server.port}")
+            finally:
+                await server.stop()
+        return asyncio.run(main())
+    return run
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=10-19", 100) == (10, 20)
+    assert parse_range("bytes=90-", 100) == (90, 100)
+    assert parse_range("bytes=-10", 100) == (90, 100)
+    assert parse_range("bytes=90-200", 100) == (90, 100)
+    assert parse_range("bytes=0-1,5-6", 100) is None  # several ranges: the whole file instead
+    with pytest.raises(ValueError):
+        parse_range("bytes=100-", 100)
+
+
+def test_find_seed_archive(seed):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        dead_seed = f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+    async def find(client, base):
+        return (await find_seed_archive(client, [dead_seed, base], DIGEST),
+                await find_seed_archive(client, [base], hashlib.sha256(b"other").hexdigest()))
+
+    found, missing = seed(find)
+    assert found.endswith(f"/files/{DIGEST}")
+    assert missing is None
+
+
+def test_get_and_head(seed):
+    async def fetch(client, base):
+        return await client.get(f"{base}/files/{DIGEST}"), await client.head(f"{base}/files/{DIGEST}")
+
+    response, head = seed(fetch)
+    assert response.status_code == 200
+    assert response.content == ARCHIVE
+    assert response.headers['ETag'] == ETAG  # the CDN's, so a download can move between the two
+    assert response.headers['Last-Modified'] == LAST_MODIFIED
+    assert head.status_code == 200
+    assert head.headers['Content-Length'] == str(len(ARCHIVE))
+    assert head.content == b""
+
+
+def test_ranges(seed):
+    url = f"/files/{DIGEST}"
+
+    async def fetch(client, base):
+        return [
+            await client.get(base + url, headers={'Range': 'bytes=1000-1999'}),
+            await client.get(base + url, headers={'Range': 'bytes=-100'}),
+            await client.get(base + url, headers={'Range': 'bytes=1000-', 'If-Range': ETAG}),
+            await client.get(base + url, headers={'Range': 'bytes=1000-', 'If-Range': LAST_MODIFIED}),
+            await client.get(base + url, headers={'Range': 'bytes=1000-', 'If-Range': '"changed"'}),
+            await client.get(base + url, headers={'Range': f'bytes={len(ARCHIVE)}-'}),
+        ]
+
+    middle, suffix, if_range_etag, if_range_date, if_range_changed, unsatisfiable = seed(fetch)
+    assert (middle.status_code, middle.content) == (206, ARCHIVE[1000:2000])
+    assert middle.headers['Content-Range'] == f"bytes 1000-1999/{len(ARCHIVE)}"
+    assert (suffix.status_code, suffix.content) == (206, ARCHIVE[-100:])
+    assert (if_range_etag.status_code, if_range_etag.content) == (206, ARCHIVE[1000:])
+    assert (if_range_date.status_code, if_range_date.content) == (206, ARCHIVE[1000:])
+    # The client's copy is of another version: it gets the whole file, not a range to splice in
+    assert (if_range_changed.status_code, if_range_changed.content) == (200, ARCHIVE)
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers['Content-Range'] == f"bytes */{len(ARCHIVE)}"
+
+
+def test_bad_paths_and_methods(seed):
+    paths = [
+        "/files/" + DIGEST.upper(),
+        "/files/" + DIGEST[:-1],
+        f"/files/{DIGEST}/../../index.json",
+        "/files/..%2F..%2Findex.json",
+        "/files/",
+        "/index.json",
+        f"/objects/{DIGEST[:2]}/{DIGEST}",
+    ]
+
+    async def fetch(client, base):
+        # Sent over a raw connection, as a hostile client would, since httpx normalises dot segments
+        reader, writer = await asyncio.open_connection(*base.removeprefix("http://").split(':'))
+        statuses = []
+        for path in paths:
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: seed\r\n\r\n".encode('ascii'))
+            statuses.append(int((await reader.readline()).split()[1]))
+            while await reader.readline() not in (b'\r\n', b''):
+                pass  # headers; 404s have no body
+        writer.close()
+        post = await client.post(f"{base}/files/{DIGEST}", content=b"")
+        return statuses, post
+
+    statuses, post = seed(fetch)
+    assert statuses == [404] * len(paths)
+    assert post.status_code == 405
+    assert post.headers['Allow'] == 'GET, HEAD'
+
+
+def test_installed_files_are_served_while_unchanged(seed, tmp_path):
+    data = b"patch" * 10000
+    digest = hashlib.sha256(data).hexdigest()
+    path = tmp_path / "install/Data/patch.MPQ"
+    path.parent.mkdir()
+    path.write_bytes(data)
+    file_index = FileIndex(tmp_path / "index.sqlite3")
+    file_index.record(path, 'sha256', digest)
+    file_index.close()
+
+    async def fetch(client, base):
+        served = await client.get(f"{base}/files/{digest}")
+        path.write_bytes(b"PATCH" * 10000)  # changed since it was indexed
+        return served, await client.get(f"{base}/files/{digest}")
+
+    served, changed = seed(fetch)
+    assert (served.status_code, served.content) == (200, data)
+    assert served.headers['ETag'] == f'"{digest}"'
+    assert changed.status_code == 404
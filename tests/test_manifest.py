@@ -0,0 +1,69 @@
+import asyncio
+import io
+import zipfile
+import pytest
+from turtlelauncher.utils.manifest import is_local_file
+
+pytest.importorskip("PySide6")
+
+from turtlelauncher.utils import downloader
+from turtlelauncher.utils.downloader import VerifyRepairWorker
+from turtlelauncher.utils.file_index import FileIndex
+from turtlelauncher.utils.http_service import get_http_service
+
+
+CLIENT = {
+    "Client/WoW.exe": b"exe" * 1000,
+    "Client/Data/patch.MPQ": b"data" * 5000,
+    "Client/WTF/Config.wtf": b'SET gxApi "d3d9"\n',
+    "Client/Interface/AddOns/pfUI/pfUI.toc": b"## Title: pfUI\n",
+    "Client/dxvk.conf": b"# dxvk\n",
+}
+
+
+def make_archive():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in CLIENT.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def test_is_local_file():
+    assert is_local_file("WTF/Config.wtf")
+    assert is_local_file("Interface\\AddOns\\pfUI\\pfUI.toc")
+    assert is_local_file("dxvk.conf")
+    assert not is_local_file("Data/patch.MPQ")
+    assert not is_local_file("Data/dxvk.conf")
+
+
+def test_repair_keeps_settings_addons_and_fixes(http_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, 'FileIndex', lambda: FileIndex(tmp_path / "index.sqlite3"))
+    http_server.files["/client.zip"] = make_archive()
+    install_dir = tmp_path / "Client"
+    for name, data in CLIENT.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    # The player changed their settings and addons, a fix rewrote dxvk.conf, and a game file broke
+    (install_dir / "WTF/Config.wtf").write_bytes(b'SET gxApi "d3d11"\n')
+    (install_dir / "Interface/AddOns/pfUI/pfUI.toc").write_bytes(b"## Title: pfUI (edited)\n")
+    (install_dir / "dxvk.conf").write_bytes(b"d3d9.enableDialogMode = True\n")
+    (install_dir / "Data/patch.MPQ").write_bytes(b"DATA" * 5000)
+
+    worker = VerifyRepairWorker(install_dir, f"{http_server.url}/client.zip")
+    updated = []
+    worker.signals.update_completed.connect(updated.append)
+
+    async def run():
+        try:
+            await worker.async_run()
+        finally:
+            await get_http_service().close_loop_clients()
+    asyncio.run(run())
+
+    assert updated == [1]
+    assert (install_dir / "Data/patch.MPQ").read_bytes() == CLIENT["Client/Data/patch.MPQ"]
+    assert (install_dir / "WTF/Config.wtf").read_bytes() == b'SET gxApi "d3d11"\n'
+    assert (install_dir / "Interface/AddOns/pfUI/pfUI.toc").read_bytes() == b"## Title: pfUI (edited)\n"
+    assert (install_dir / "dxvk.conf").read_bytes() == b"d3d9.enableDialogMode = True\n"
@@ -0,0 +1,98 @@
+import asyncio
+import io
+import zipfile
+import pytest
+from turtlelauncher.utils.staging import StagedInstall, STAGING_NAME, PREVIOUS_NAME
+
+pytest.importorskip("PySide6")
+
+from turtlelauncher.utils import downloader
+from turtlelauncher.utils.downloader import DownloadExtractWorker
+from turtlelauncher.utils.file_index import FileIndex
+
+
+def write_archive(path, contents):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in contents.items():
+            archive.writestr(name, data)
+    path.write_bytes(buffer.getvalue())
+    return path
+
+
+@pytest.fixture
+def file_index(tmp_path, monkeypatch):
+    """Keep the worker's FileIndex out of the real TOOL_FOLDER."""
+    monkeypatch.setattr(downloader, 'FileIndex', lambda: FileIndex(tmp_path / "index.sqlite3"))
+
+
+def install(tmp_path, archive_path, install_root):
+    worker = DownloadExtractWorker("https://example.invalid/client.zip", install_root)
+    return asyncio.run(worker.install_archive(archive_path, StagedInstall(install_root))), worker
+
+
+OLD = {
+    "Client/WoW.exe": b"old exe" * 1000,
+    "Client/Data/patch.mpq": b"data" * 5000,
+}
+NEW = {
+    "Client/WoW.exe": b"new exe" * 1000,
+    "Client/Data/patch.mpq": b"data" * 5000,
+    "Client/Data/patch-2.mpq": b"more" * 100,
+}
+
+
+def test_fresh_install_leaves_no_previous_folder(tmp_path, file_index):
+    root = tmp_path / "games"
+    folder, _ = install(tmp_path, write_archive(tmp_path / "old.zip", OLD), root)
+
+    assert folder == "Client"
+    assert (root / "Client/WoW.exe").read_bytes() == OLD["Client/WoW.exe"]
+    assert not (root / STAGING_NAME).exists()
+    assert not (root / PREVIOUS_NAME).exists()
+
+
+def test_reinstall_is_staged_and_can_be_rolled_back(tmp_path, file_index):
+    root = tmp_path / "games"
+    install(tmp_path, write_archive(tmp_path / "old.zip", OLD), root)
+    (root / "Client/WTF").mkdir()
+    (root / "Client/WTF/Config.wtf").write_text('SET gxApi "d3d9"\n')
+    unchanged = root / "Client/Data/patch.mpq"
+    inode = unchanged.stat().st_ino
+
+    install(tmp_path, write_archive(tmp_path / "new.zip", NEW), root)
+
+    for name, data in NEW.items():
+        assert (root / name).read_bytes() == data
+    # Unchanged files and the user's own files come across as links, not rewritten copies
+    assert unchanged.stat().st_ino == inode
+    assert (root / "Client/WTF/Config.wtf").read_text() == 'SET gxApi "d3d9"\n'
+    assert (root / PREVIOUS_NAME / "Client/WoW.exe").read_bytes() == OLD["Client/WoW.exe"]
+
+    assert StagedInstall(root).rollback()
+    assert (root / "Client/WoW.exe").read_bytes() == OLD["Client/WoW.exe"]
+    assert not (root / "Client/Data/patch-2.mpq").exists()
+
+
+def test_cancelled_reinstall_leaves_the_live_install_alone(tmp_path, file_index):
+    root = tmp_path / "games"
+    install(tmp_path, write_archive(tmp_path / "old.zip", OLD), root)
+    worker = DownloadExtractWorker("https://example.invalid/client.zip", root)
+    worker.is_cancelled = True
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(worker.install_archive(write_archive(tmp_path / "new.zip", NEW), StagedInstall(root)))
+
+    assert (root / "Client/WoW.exe").read_bytes() == OLD["Client/WoW.exe"]
+    assert not (root / "Client/Data/patch-2.mpq").exists()
+
+
+def test_prepare_drops_what_an_interrupted_attempt_left(tmp_path):
+    staging = StagedInstall(tmp_path)
+    (tmp_path / STAGING_NAME / "Client").mkdir(parents=True)
+    (tmp_path / STAGING_NAME / "Client/half-written.mpq").write_bytes(b"partial")
+
+    staging.prepare()
+
+    assert staging.staging_path.is_dir()
+    assert not any(staging.staging_path.iterdir())
@@ -0,0 +1,86 @@
+import asyncio
+import io
+import os
+import time
+import zipfile
+import pytest
+from turtlelauncher.utils.file_index import FileIndex
+from turtlelauncher.utils.staging import StagedInstall
+from turtlelauncher.utils.zip_extract import ParallelZipExtractor, diff_extracted
+
+
+OLD = {
+    "Client/WoW.exe": os.urandom(300 * 1024),
+    "Client/Data/patch.mpq": b"turtle " * 100000,
+    "Client/Data/patch-2.mpq": b"a" * 5000,
+    "Client/readme.txt": b"hello",
+}
+NEW = {
+    "Client/WoW.exe": OLD["Client/WoW.exe"],
+    "Client/Data/patch.mpq": OLD["Client/Data/patch.mpq"],
+    "Client/Data/patch-2.mpq": b"b" * 5000,  # same size, only the CRC tells it apart
+    "Client/readme.txt": b"hello again",
+    "Client/Data/patch-3.mpq": b"new" * 1000,
+}
+CHANGED = {"Client/Data/patch-2.mpq", "Client/readme.txt", "Client/Data/patch-3.mpq"}
+
+
+def write_archive(path, contents):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in contents.items():
+            archive.writestr(name, data)
+    path.write_bytes(buffer.getvalue())
+    return path
+
+
+def record_extracted(monkeypatch):
+    """The names of the members ParallelZipExtractor writes from now on."""
+    extracted = []
+    extract_member = ParallelZipExtractor._extract_member
+
+    def spy(self, info, is_cancelled):
+        extracted.append(info.filename)
+        return extract_member(self, info, is_cancelled)
+    monkeypatch.setattr(ParallelZipExtractor, '_extract_member', spy)
+    return extracted
+
+
+def test_diff_extracted_finds_only_changed_members(tmp_path):
+    install_dir = tmp_path / "install"
+    ParallelZipExtractor(write_archive(tmp_path / "old.zip", OLD), install_dir).extract()
+    with zipfile.ZipFile(write_archive(tmp_path / "new.zip", NEW)) as archive:
+        members = archive.infolist()
+    file_index = FileIndex(tmp_path / "index.sqlite3")
+    try:
+        changed = diff_extracted(members, install_dir, file_index)
+    finally:
+        file_index.close()
+
+    assert {info.filename for info in changed} == CHANGED
+
+
+def test_incremental_install_rewrites_only_changed_members(tmp_path, monkeypatch):
+    pytest.importorskip("PySide6")
+    from turtlelauncher.utils import downloader
+    from turtlelauncher.utils.downloader import DownloadExtractWorker
+    monkeypatch.setattr(downloader, 'FileIndex', lambda: FileIndex(tmp_path / "index.sqlite3"))
+    root = tmp_path / "games"
+
+    def install(archive_path):
+        worker = DownloadExtractWorker("https://example.invalid/client.zip", root)
+        return asyncio.run(worker.install_archive(archive_path, StagedInstall(root)))
+
+    install(write_archive(tmp_path / "old.zip", OLD))
+    before = {name: (root / name).stat() for name in OLD}
+    time.sleep(0.01)  # so a rewritten file could not keep the same mtime
+    extracted = record_extracted(monkeypatch)
+
+    assert install(write_archive(tmp_path / "new.zip", NEW)) == "Client"
+
+    assert set(extracted) == CHANGED
+    for name, data in NEW.items():
+        assert (root / name).read_bytes() == data
+    for name in set(OLD) - CHANGED:
+        after = (root / name).stat()
+        assert (after.st_mtime_ns, after.st_ino) == (before[name].st_mtime_ns, before[name].st_ino)
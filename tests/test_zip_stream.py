@@ -0,0 +1,76 @@
+import hashlib
+import io
+import os
+import threading
+import time
+import zipfile
+from turtlelauncher.utils.checksum import StreamingHasher
+from turtlelauncher.utils.zip_stream import StreamingZipExtractor
+
+
+def make_archive():
+    contents = {
+        "Client/WoW.exe": os.urandom(300 * 1024),
+        "Client/Data/patch.mpq": b"turtle " * 100000,
+        "Client/readme.txt": b"hello",
+    }
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in contents.items():
+            archive.writestr(name, data)
+    return buffer.getvalue(), contents
+
+
+def grow(extractor, path, data, chunk_size=64 * 1024):
+    """Write data into the preallocated file at path in order, reporting each step like the downloader."""
+    with open(path, 'r+b') as f:
+        for offset in range(0, len(data), chunk_size):
+            f.write(data[offset:offset + chunk_size])
+            f.flush()
+            extractor.advance(min(offset + chunk_size, len(data)))
+            time.sleep(0.001)  # let the extractor catch up and read right up to the edge of the prefix
+    extractor.finish_input()
+
+
+def run_against_growing_file(tmp_path, data):
+    archive_path = tmp_path / "client.zip"
+    with open(archive_path, 'wb') as f:
+        f.truncate(len(data))  # preallocated like a partial download, zeros past the prefix
+    extractor = StreamingZipExtractor(archive_path, tmp_path / "install")
+    extractor.hasher = StreamingHasher()
+    thread = threading.Thread(target=extractor.run)
+    thread.start()
+    grow(extractor, archive_path, data, chunk_size=4096 + 17)
+    thread.join(timeout=30)
+    assert not thread.is_alive()
+    return extractor
+
+
+def test_streams_every_member_of_a_growing_archive(tmp_path):
+    data, contents = make_archive()
+
+    extractor = run_against_growing_file(tmp_path, data)
+
+    assert set(extractor.extracted) == set(contents)
+    for name, content in contents.items():
+        assert (tmp_path / "install" / name).read_bytes() == content
+    assert extractor.hasher.matches(hashlib.sha256(data).hexdigest())
+    assert extractor.validate() == "Client"
+
+
+def test_corrupt_member_data_falls_back_to_validate(tmp_path):
+    data, contents = make_archive()
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        info = archive.getinfo("Client/Data/patch.mpq")
+    corrupt = bytearray(data)
+    data_start = info.header_offset + 30 + len(info.filename) + len(info.extra)
+    corrupt[data_start:data_start + 64] = b'\xff' * 64
+    corrupt = bytes(corrupt)
+
+    extractor = run_against_growing_file(tmp_path, corrupt)
+
+    assert extractor.stopped_reason
+    assert "Client/WoW.exe" in extractor.extracted
+    assert "Client/Data/patch.mpq" not in extractor.extracted
+    # The hasher keeps following the prefix after streaming stopped
+    assert extractor.hasher.matches(hashlib.sha256(corrupt).hexdigest())
@@ -5,7 +5,8 @@ from pathlib import Path
 from turtlelauncher.widgets.gradient_label import GradientLabel
 from turtlelauncher.widgets.image_button import ImageButton
 from turtlelauncher.widgets.gradient_progressbar import GradientProgressBar
-from turtlelauncher.utils.downloader import DownloadExtractUtility
+from turtlelauncher.utils.downloader import DownloadExtractUtility, DownloadExtractWorker
+from turtlelauncher.utils.progress import ProgressPhase
 from turtlelauncher.utils.globals import FONTS
 from turtlelauncher.utils.game_utils import clear_cache
 from loguru import logger
@@ -56,10 +57,18 @@ class LauncherWidget(QWidget):
         self.download_utility = DownloadExtractUtility()
         self.download_utility.progress_updated.connect(self.update_progress)
         self.download_utility.download_completed.connect(self.on_download_completed)
+        self.download_utility.download_paused.connect(self.on_download_paused)
+        self.download_utility.verification_started.connect(self.on_verification_started)
+        self.download_utility.verification_completed.connect(self.on_verification_completed)
         self.download_utility.extraction_completed.connect(self.on_extraction_completed)
+        self.download_utility.update_completed.connect(self.on_update_completed)
         self.download_utility.error_occurred.connect(self.on_error)
         self.download_utility.status_changed.connect(self.on_status_changed)
         self.download_utility.total_size_updated.connect(self.set_total_file_size)
+        self.apply_rate_limit()
+        self.download_utility.set_cache_limit(self.config.archive_cache_limit * 1024 * 1024 * 1024)
+        self.download_utility.set_file_caching(self.config.cache_update_files)
+        self.apply_lan_settings()
 
     def initUI(self):
         main_layout = QVBoxLayout(self)
@@ -89,6 +98,11 @@ class LauncherWidget(QWidget):
         self.speed_label.setStyleSheet("color: #ffd700;")
         progress_info_layout.addWidget(self.speed_label)
 
+        self.eta_label = QLabel("")
+        self.eta_label.setFont(QFont(font_family, 10))
+        self.eta_label.setStyleSheet("color: #ffd700;")
+        progress_info_layout.addWidget(self.eta_label)
+
         self.total_size_label = QLabel("")
         self.total_size_label.setFont(QFont(font_family, 10))
         self.total_size_label.setStyleSheet("color: #ffd700;")
@@ -148,6 +162,7 @@ class LauncherWidget(QWidget):
         self.progress_bar.hide()
         self.progress_label.hide()
         self.speed_label.hide()
+        self.eta_label.hide()
         self.total_size_label.hide()
 
         # Update translations
@@ -156,6 +171,7 @@ class LauncherWidget(QWidget):
     def update_translations(self):
         self.progress_label.setText(self.tr("Waiting..."))
         self.speed_label.setText(self.tr("0 MB/s"))
+        self.eta_label.setText("")
         self.total_size_label.setText(self.tr("Total size: 0 MB"))
         self.settings_button.setText(self.tr("Settings"))
         self.mods_button.setText(self.tr("Mods"))
@@ -185,38 +201,76 @@ class LauncherWidget(QWidget):
                 else:
                     self.open_binary_selection_dialog()
     
-    @Slot(str, str, str)
-    def update_progress(self, percent, speed, state):
-        percent_int = int(float(percent))
-        if state == "extracting":
+    @Slot(object)
+    def update_progress(self, snapshot):
+        percent = snapshot.percent
+        if snapshot.phase == ProgressPhase.EXTRACTING:
             if not self.progress_label.text().startswith(self.tr("Extracting")):
                 logger.info("Setting progress_label status to 'Extracting...'")
-            self.progress_label.setText(self.tr("Extracting... {}%").format(percent_int))
-            self.speed_label.hide()
+            self.progress_label.setText(self.tr("Extracting... {}%").format(percent))
+            self.show_rate(snapshot)
             self.total_size_label.hide()
             self.progress_bar.show()  # Ensure progress bar is visible during extraction
-        elif state == "downloading":
-            self.progress_label.setText(self.tr("Downloading... {}%").format(percent_int))
-            self.speed_label.show()
-            self.speed_label.setText(speed)
+        elif snapshot.phase == ProgressPhase.VERIFYING:
+            if snapshot.item:
+                self.progress_label.setText(self.tr("Checking files... {}% ({})").format(percent, snapshot.item))
+                self.total_size_label.setText(self.tr("Checked {} of {}").format(
+                    DownloadExtractWorker.format_size(snapshot.done), DownloadExtractWorker.format_size(snapshot.total)))
+                self.show_rate(snapshot)
+                self.total_size_label.show()
+            else:
+                self.progress_label.setText(self.tr("Checking files... {}%").format(percent))
+                self.speed_label.hide()
+                self.eta_label.hide()
+            self.progress_bar.show()
+        elif snapshot.phase == ProgressPhase.DOWNLOADING:
+            self.progress_label.setText(self.tr("Downloading... {}%").format(percent))
+            self.show_rate(snapshot)
             self.total_size_label.show()
             self.progress_bar.show()  # Ensure progress bar is visible during download
-        self.progress_bar.setValue(percent_int)
+        if self.progress_bar.value() != percent:
+            self.progress_bar.setValue(percent)
+
+    def show_rate(self, snapshot):
+        self.speed_label.setText(DownloadExtractWorker.format_speed(snapshot.rate))
+        self.eta_label.setText(self.tr("ETA: {}").format(self.format_eta(snapshot.eta)))
+        self.speed_label.show()
+        self.eta_label.show()
+
+    @staticmethod
+    def format_eta(seconds):
+        if seconds is None:
+            return "--:--"
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
 
     @Slot()
     def on_download_completed(self):
         self.progress_label.setText(self.tr("Download completed. Preparing for extraction..."))
         self.speed_label.hide()
+        self.eta_label.hide()
         self.progress_bar.setValue(100)
         self.total_size_label.hide()
         self.progress_bar.show()  # Keep progress bar visible
         self.is_downloading = False
         logger.info("Download completed. Preparing for extraction...")
     
+    @Slot()
+    def on_download_paused(self):
+        self.progress_label.setText(self.tr("Download paused"))
+        self.speed_label.hide()
+        self.eta_label.hide()
+        self.progress_bar.stop_particle_effect()
+        self.action_button.setText(self.tr("Download"))
+        self.is_downloading = False
+        logger.info("Download paused, it will resume on the next download")
+
     @Slot()
     def on_verification_started(self):
         self.progress_label.setText(self.tr("Verifying download..."))
         self.speed_label.setText("")
+        self.eta_label.setText("")
         self.progress_bar.setValue(0)
     
     @Slot(bool)
@@ -228,12 +282,15 @@ class LauncherWidget(QWidget):
             self.progress_label.setText(self.tr("Verification failed. Please try again."))
             self.progress_bar.setValue(0)
             self.progress_bar.stop_particle_effect()
+            self.action_button.setText(self.tr("Download"))
+            self.is_downloading = False
             self.error_occurred.emit(self.tr("Checksum verification failed"))
 
     @Slot(str)
     def on_extraction_completed(self, extracted_folder):
         self.progress_label.setText(self.tr("Installation completed!"))
         self.speed_label.hide()
+        self.eta_label.hide()
         self.progress_bar.setValue(100)
         self.progress_bar.stop_particle_effect()
         self.progress_bar.hide()  # Hide progress bar after extraction is complete
@@ -241,10 +298,22 @@ class LauncherWidget(QWidget):
         self.is_downloading = False
         self.extraction_completed.emit(extracted_folder)
 
+    @Slot(int)
+    def on_update_completed(self, updated_count):
+        self.progress_label.setText(self.tr("Update completed! {} files updated").format(updated_count))
+        self.speed_label.hide()
+        self.eta_label.hide()
+        self.progress_bar.setValue(100)
+        self.progress_bar.stop_particle_effect()
+        self.progress_bar.hide()
+        self.is_downloading = False
+        self.update_action_button_state()
+
     @Slot(str)
     def on_error(self, error_message):
         self.progress_label.setText(self.tr("Error: {}").format(error_message))
         self.speed_label.hide()  # Hide speed label on error
+        self.eta_label.hide()
         self.progress_bar.stop_particle_effect()
         self.action_button.setText(self.tr("Download"))
         self.is_downloading = False
@@ -264,6 +333,7 @@ class LauncherWidget(QWidget):
         
         # Show or hide speed label based on download status
         self.speed_label.setVisible(is_downloading)
+        self.eta_label.setVisible(is_downloading)
     
     def update_action_button_state(self):
         if self.check_game_installation_callback():
@@ -277,10 +347,12 @@ class LauncherWidget(QWidget):
         self.update_action_button_state()
 
 
-    def start_download(self, url, extract_path):
+    def start_download(self, url, extract_path, mirrors=None):
         self.progress_label.setText(self.tr("Preparing download..."))
         self.speed_label.setText("")
+        self.eta_label.setText("")
         self.speed_label.show()
+        self.eta_label.show()
         self.total_size_label.setText(self.tr("Total size: Calculating..."))
         self.progress_bar.setValue(0)
         self.action_button.setText(self.tr("Stop"))
@@ -294,14 +366,46 @@ class LauncherWidget(QWidget):
         else:
             logger.debug("Particles are disabled, not starting particle effect")
 
-        QTimer.singleShot(0, lambda: self.download_utility.download_and_extract(url, extract_path))
+        QTimer.singleShot(0, lambda: self.download_utility.download_and_extract(url, extract_path, self.config.pipelined_extraction, mirrors=mirrors))
     
+    def start_update(self, manifest_url):
+        self.show_progress_widgets()
+        self.progress_label.setText(self.tr("Checking files..."))
+        self.speed_label.setText("")
+        self.eta_label.setText("")
+        self.total_size_label.setText(self.tr("Total size: Calculating..."))
+        self.progress_bar.setValue(0)
+        self.action_button.setText(self.tr("Stop"))
+        self.is_downloading = True
+        logger.debug(f"Starting delta update from {manifest_url} into {self.config.game_install_dir}")
+
+        if not self.config.particles_disabled:
+            self.progress_bar.start_particle_effect()
+
+        QTimer.singleShot(0, lambda: self.download_utility.update_from_manifest(manifest_url, self.config.game_install_dir))
+
+    def start_repair(self, archive_url, manifest_url=None):
+        self.show_progress_widgets()
+        self.progress_label.setText(self.tr("Checking files..."))
+        self.speed_label.setText("")
+        self.eta_label.setText("")
+        self.total_size_label.setText(self.tr("Total size: Calculating..."))
+        self.progress_bar.setValue(0)
+        self.action_button.setText(self.tr("Stop"))
+        self.is_downloading = True
+        logger.debug(f"Starting verify and repair of {self.config.game_install_dir}")
+
+        if not self.config.particles_disabled:
+            self.progress_bar.start_particle_effect()
+
+        QTimer.singleShot(0, lambda: self.download_utility.verify_and_repair(self.config.game_install_dir, archive_url, manifest_url))
+
     def stop_download(self):
         dialog = StopDownloadDialog(self.master)
         result = dialog.exec()
         if result == QDialog.DialogCode.Accepted:
             self.download_utility.cancel_download()
-            self.progress_label.setText(self.tr("Download stopped"))
+            self.progress_label.setText(self.tr("Download paused"))
             self.progress_bar.setValue(0)
             self.progress_bar.stop_particle_effect()
             self.action_button.setText(self.tr("Download"))
@@ -322,22 +426,23 @@ class LauncherWidget(QWidget):
         self.progress_bar.hide()
         self.progress_label.hide()
         self.speed_label.hide()
+        self.eta_label.hide()
         self.total_size_label.hide()
 
     def show_progress_widgets(self):
         self.progress_bar.show()
         self.progress_label.show()
         self.speed_label.show()
+        self.eta_label.show()
         self.total_size_label.show()
     
     def on_mods_button_clicked(self):
         addons_manager = AddonManagerDialog(self.config, parent=self.master)
         addons_manager.exec()
     
-    @Slot(str)
-    def set_total_file_size(self, total_size_str):
+    @Slot(object)
+    def set_total_file_size(self, total_size_bytes):
         try:
-            total_size_bytes = int(total_size_str)
             if total_size_bytes > 0:
                 if total_size_bytes >= 1024 * 1024 * 1024:  # If size is 1 GB or larger
                     total_size_gb = total_size_bytes / (1024 * 1024 * 1024)
@@ -347,9 +452,6 @@ class LauncherWidget(QWidget):
                     self.total_size_label.setText(f"Total size: {total_size_mb:.2f} MB")
             else:
                 self.total_size_label.setText("Total size: Unknown")
-        except ValueError:
-            logger.error(f"Invalid total size received: {total_size_str}")
-            self.total_size_label.setText("Total size: Unknown")
         except Exception as e:
             logger.error(f"Error setting total file size: {e}")
             self.total_size_label.setText("Total size: Error")
@@ -399,6 +501,19 @@ class LauncherWidget(QWidget):
                     logger.info("Game process has ended normally")
 
                 self.game_process = None
+                self.apply_rate_limit()
+
+    def apply_lan_settings(self):
+        self.download_utility.set_lan_discovery(self.config.lan_discovery)
+        self.download_utility.set_seeding(self.config.lan_seeding, self.config.game_install_dir)
+
+    def apply_rate_limit(self):
+        """Use the configured download limit, or the lower in-game one while the game is running."""
+        rate = self.config.download_rate_limit
+        if self.game_process and self.config.adaptive_throttling:
+            rate = min(rate, self.config.in_game_rate_limit) if rate else self.config.in_game_rate_limit
+            logger.info(f"Game is running, throttling downloads to {rate} KB/s")
+        self.download_utility.set_rate_limit(rate * 1024)
    
     @Slot()
     def on_launch_completed(self):
@@ -508,6 +623,7 @@ class LauncherWidget(QWidget):
 
             # Start monitoring the process
             self.process_monitor_timer.start(1000)  # Check every second
+            self.apply_rate_limit()
             
             logger.info(f"Binary execution initiated successfully. PID: {self.game_process.pid}")
             
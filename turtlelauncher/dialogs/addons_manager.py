@@ -7,10 +7,11 @@ from PySide6.QtCore import Qt, Signal, QSize
 from PySide6.QtGui import QColor, QIcon
 from pathlib import Path
 import json
-import httpx
 from datetime import datetime
 from turtlelauncher.dialogs.base import BaseDialog
 from turtlelauncher.utils.globals import IMAGES, DATA
+from turtlelauncher.utils.transfers import TransferJob, JobClass, FunctionWorker, get_transfer_scheduler
+from turtlelauncher.utils.http_service import get_http_service
 
 from loguru import logger
 
@@ -305,24 +306,32 @@ class AddonManagerDialog(BaseDialog):
                 self.populate_addon_list()
                 self.filter_addons()
 
-    async def check_for_updates(self):
-        async with httpx.AsyncClient() as client:
-            for addon in self.addons:
-                if addon['source_type'] == 'GitHub Repository':
-                    repo_url = addon['source']
-                    api_url = f"https://api.github.com/repos/{repo_url.split('github.com/')[-1]}/commits"
-                    response = await client.get(api_url)
-                    if response.status_code == 200:
-                        latest_commit = response.json()[0]
-                        latest_commit_date = latest_commit['commit']['author']['date']
-                        if latest_commit_date > addon['last_updated']:
-                            addon['version'] = latest_commit['sha'][:7]
-                            addon['last_updated'] = latest_commit_date
-                            # Implement update logic here
-                elif addon['source_type'] == 'Download Link':
-                    # Implement logic to check for updates from download link
-                    pass
+    def start_update_check(self):
+        """Check every addon for updates on the shared transfer scheduler."""
+        job = TransferJob(JobClass.ADDON, lambda: FunctionWorker(self.check_for_updates), name="addon update check")
+        job.completed.connect(self.on_update_check_completed)
+        get_transfer_scheduler().submit(job)
 
+    async def check_for_updates(self):
+        # Runs on a scheduler thread: only touches the addon data, the list is refreshed on completion
+        client = get_http_service().async_client()
+        for addon in self.addons:
+            if addon['source_type'] == 'GitHub Repository':
+                repo_url = addon['source']
+                api_url = f"https://api.github.com/repos/{repo_url.split('github.com/')[-1]}/commits"
+                response = await client.get(api_url)
+                if response.status_code == 200:
+                    latest_commit = response.json()[0]
+                    latest_commit_date = latest_commit['commit']['author']['date']
+                    if latest_commit_date > addon['last_updated']:
+                        addon['version'] = latest_commit['sha'][:7]
+                        addon['last_updated'] = latest_commit_date
+                        # Implement update logic here
+            elif addon['source_type'] == 'Download Link':
+                # Implement logic to check for updates from download link
+                pass
+
+    def on_update_check_completed(self, _):
         self.save_addons()
         self.populate_addon_list()
 
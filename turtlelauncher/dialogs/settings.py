@@ -2,7 +2,7 @@ from turtlelauncher.dialogs.base import BaseDialog
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QDialog, QLabel, QComboBox, QTabWidget
 from PySide6.QtCore import Qt, Signal, QTimer, QSize
 from loguru import logger
-from turtlelauncher.utils.globals import TOOL_FOLDER, IMAGES
+from turtlelauncher.utils.globals import TOOL_FOLDER, IMAGES, CLIENT_MANIFEST_URL
 from turtlelauncher.utils.game_utils import clear_cache
 from turtlelauncher.dialogs.binary_select import BinarySelectionDialog
 from turtlelauncher.dialogs.generic_confirmation import GenericConfirmationDialog
@@ -17,7 +17,12 @@ class SettingsDialog(BaseDialog):
     transparency_setting_changed = Signal(bool)
     minimize_on_launch_changed = Signal(bool)
     clear_cache_on_launch_changed = Signal(bool)
+    adaptive_throttling_changed = Signal(bool)
+    lan_seeding_changed = Signal(bool)
     language_changed = Signal(str)
+    verify_repair_requested = Signal()
+    update_requested = Signal()
+    deduplicate_requested = Signal()
 
     def __init__(self, parent=None, game_installed=False, config=None):
         icon_path = IMAGES / "turtle_wow_icon.png"
@@ -47,6 +52,9 @@ class SettingsDialog(BaseDialog):
         self.clear_chat_cache_button = self.create_button("", self.clear_chat_cache, game_layout)
         self.open_install_directory_button = self.create_button("", self.open_install_directory, game_layout)
         self.select_binary_button = self.create_button("", self.select_binary, game_layout)
+        self.verify_repair_button = self.create_button("", self.verify_repair, game_layout)
+        self.update_game_button = self.create_button("", self.update_game, game_layout)
+        self.deduplicate_button = self.create_button("", self.deduplicate_installs, game_layout)
         tab_widget.addTab(game_tab, "")
 
         # Launcher Tab
@@ -70,6 +78,8 @@ class SettingsDialog(BaseDialog):
         self.particles_checkbox = self.create_checkbox("", "particles_disabled", self.config.particles_disabled, launcher_layout)
         self.clear_cache_checkbox = self.create_checkbox("", "clear_cache_on_launch", self.config.clear_cache_on_launch, launcher_layout)
         self.minimize_checkbox = self.create_checkbox("", "minimize_on_launch", self.config.minimize_on_launch, launcher_layout)
+        self.adaptive_throttling_checkbox = self.create_checkbox("", "adaptive_throttling", self.config.adaptive_throttling, launcher_layout)
+        self.lan_seeding_checkbox = self.create_checkbox("", "lan_seeding", self.config.lan_seeding, launcher_layout)
         
         self.open_logs_button = self.create_button("", self.open_logs_folder, launcher_layout)
         tab_widget.addTab(launcher_tab, "")
@@ -112,6 +122,9 @@ class SettingsDialog(BaseDialog):
         self.clear_chat_cache_button.setText(self.tr("Clear Chat Cache"))
         self.open_install_directory_button.setText(self.tr("Open Install Directory"))
         self.select_binary_button.setText(self.tr("Select Binary to Launch"))
+        self.verify_repair_button.setText(self.tr("Verify and Repair"))
+        self.update_game_button.setText(self.tr("Update Game Files"))
+        self.deduplicate_button.setText(self.tr("Deduplicate Installs"))
         self.open_logs_button.setText(self.tr("Open Logs Folder"))
         self.fix_black_screen_button.setText(self.tr("Fix Black Screen"))
         self.fix_vanilla_tweaks_button.setText(self.tr("Fix VanillaTweaks Alt-Tab"))
@@ -120,6 +133,8 @@ class SettingsDialog(BaseDialog):
         self.particles_checkbox.setText(self.tr("Disable Particles"))
         self.clear_cache_checkbox.setText(self.tr("Clear Cache on Launch"))
         self.minimize_checkbox.setText(self.tr("Minimize Launcher on Game Launch"))
+        self.adaptive_throttling_checkbox.setText(self.tr("Slow Down Downloads While Playing"))
+        self.lan_seeding_checkbox.setText(self.tr("Share Game Files on the Local Network"))
         
         # Update language label
         self.language_label.setText(self.tr("Select Language"))
@@ -129,10 +144,16 @@ class SettingsDialog(BaseDialog):
             self.clear_addon_settings_button,
             self.clear_cache_button,
             self.open_install_directory_button,
-            self.select_binary_button
+            self.select_binary_button,
+            self.verify_repair_button
         ]
         for button in buttons:
             button.setEnabled(self.game_installed)
+        # Delta updates diff the install against a published client manifest
+        self.update_game_button.setVisible(CLIENT_MANIFEST_URL is not None)
+        self.update_game_button.setEnabled(self.game_installed)
+        # Sharing data needs other installs, registered in Config.extra_install_dirs
+        self.deduplicate_button.setEnabled(self.game_installed and bool(self.config.extra_install_dirs))
 
     def clear_addon_settings(self):
         custom_styles = {
@@ -225,6 +246,21 @@ class SettingsDialog(BaseDialog):
         if binary_dialog.exec() == QDialog.DialogCode.Accepted:
             logger.debug("Binary selected from custom dialog")
 
+    def verify_repair(self):
+        logger.info("Verify and repair requested")
+        self.verify_repair_requested.emit()
+        self.accept()
+
+    def update_game(self):
+        logger.info("Game update requested")
+        self.update_requested.emit()
+        self.accept()
+
+    def deduplicate_installs(self):
+        logger.info("Install deduplication requested")
+        self.deduplicate_requested.emit()
+        self.accept()
+
     def open_logs_folder(self):
         logger.debug("Opening logs folder")
         self.setWindowFlags(self.windowFlags() & ~Qt.WindowType.WindowStaysOnTopHint)
@@ -330,6 +366,8 @@ class SettingsDialog(BaseDialog):
         transparency_checked = self.get_setting("transparency_disabled")
         minimize_on_launch_checked = self.get_setting("minimize_on_launch")
         clear_cache_on_launch_checked = self.get_setting("clear_cache_on_launch")
+        adaptive_throttling_checked = self.get_setting("adaptive_throttling")
+        lan_seeding_checked = self.get_setting("lan_seeding")
 
         if particles_checked != self.config.particles_disabled:
             logger.debug(f"Saving particles setting: {particles_checked}")
@@ -350,6 +388,16 @@ class SettingsDialog(BaseDialog):
             logger.debug(f"Saving clear cache on launch setting: {clear_cache_on_launch_checked}")
             self.config.clear_cache_on_launch = clear_cache_on_launch_checked
             self.clear_cache_on_launch_changed.emit(clear_cache_on_launch_checked)
+
+        if adaptive_throttling_checked != self.config.adaptive_throttling:
+            logger.debug(f"Saving adaptive throttling setting: {adaptive_throttling_checked}")
+            self.config.adaptive_throttling = adaptive_throttling_checked
+            self.adaptive_throttling_changed.emit(adaptive_throttling_checked)
+
+        if lan_seeding_checked != self.config.lan_seeding:
+            logger.debug(f"Saving LAN seeding setting: {lan_seeding_checked}")
+            self.config.lan_seeding = lan_seeding_checked
+            self.lan_seeding_changed.emit(lan_seeding_checked)
         
         if self.language_combo:
             selected_language = self.language_combo.currentText()
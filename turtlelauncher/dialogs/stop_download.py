@@ -16,7 +16,7 @@ class StopDownloadDialog(BaseDialog):
         )
 
         self.add_message(self.tr("Are you sure you want to stop the download?"), color="#FFD700")  # Gold color
-        self.add_message(self.tr("The download progress will be lost."), color="#FF69B4")  # Hot pink color
+        self.add_message(self.tr("Your progress will be kept and the download will resume next time."), color="#FF69B4")  # Hot pink color
 
         self.setup_buttons()
 
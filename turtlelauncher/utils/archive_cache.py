@@ -0,0 +1,179 @@
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from loguru import logger
+from turtlelauncher.utils.checksum import digest_file
+from turtlelauncher.utils.globals import ARCHIVE_CACHE_FOLDER
+
+
+def validators_match(source, size=None, etag=None, last_modified=None):
+    """Whether a recorded source (size, etag, last_modified) still describes the remote file.
+
+    Without a size (the server could not be reached) the recorded source is taken as is.
+    """
+    if size is None:
+        return True
+    if size != source['size']:
+        return False
+    if source['etag'] and etag:
+        return source['etag'] == etag
+    return bool(source['last_modified'] and last_modified and source['last_modified'] == last_modified)
+
+
+class ArchiveCache:
+    """Downloaded archives and files kept under TOOL_FOLDER, stored by SHA-256 and evicted least recently used first.
+
+    Objects live in objects/<first two hex digits>/<sha256>. The index next to them records the
+    size and last use of every object, and for each source URL the digest it last served along with
+    its size and validators (ETag / Last-Modified), so a reinstall can tell without downloading
+    anything whether the cached archive is still the one the server has.
+    """
+    DEFAULT_MAX_SIZE = 16 * 1024 * 1024 * 1024  # 16 GB
+
+    def __init__(self, folder: Path | str = ARCHIVE_CACHE_FOLDER, max_size=DEFAULT_MAX_SIZE):
+        self.folder = Path(folder)
+        self.index_path = self.folder / "index.json"
+        self.max_size = max_size  # bytes, 0 disables the cache
+        self.objects = {}  # sha256 -> {'size': bytes, 'last_used': timestamp}
+        self.sources = {}  # url -> {'sha256', 'size', 'etag', 'last_modified'}
+        self._lock = threading.RLock()
+        self.load()
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    @property
+    def total_size(self):
+        return sum(record['size'] for record in self.objects.values())
+
+    def object_path(self, digest):
+        return self.folder / "objects" / digest[:2] / digest
+
+    def load(self):
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            self.objects = {
+                digest: record for digest, record in index.get('objects', {}).items()
+                if self.object_path(digest).is_file()
+            }
+            self.sources = {url: source for url, source in index.get('sources', {}).items() if source['sha256'] in self.objects}
+            logger.info(f"Archive cache holds {len(self.objects)} objects, {self.total_size / 1024 / 1024:.1f} MB")
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable archive cache index {self.index_path}: {e}")
+
+    def save(self):
+        with self._lock:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            temp_path = self.index_path.with_suffix('.json.tmp')
+            with open(temp_path, 'w') as f:
+                json.dump({'objects': self.objects, 'sources': self.sources}, f)
+            os.replace(temp_path, self.index_path)
+
+    def get(self, digest):
+        """The path of the object with this SHA-256, or None; a hit counts as a use for eviction."""
+        if not self.enabled or not digest:
+            return None
+        digest = digest.strip().lower()
+        with self._lock:
+            path = self.object_path(digest)
+            if digest not in self.objects or not path.is_file():
+                return None
+            self.objects[digest]['last_used'] = time.time()
+            self.save()
+        logger.info(f"Archive cache hit: {digest}")
+        return path
+
+    def find_source(self, url, size=None, etag=None, last_modified=None):
+        """The digest url served when it was cached, if the validators say it still serves the same file."""
+        source = self.sources.get(url)
+        if source is None or not validators_match(source, size, etag, last_modified):
+            return None
+        return source['sha256']
+
+    def has_source(self, url):
+        return url in self.sources
+
+    def store(self, path: Path | str, digest=None, url=None, etag=None, last_modified=None, move=False):
+        """Add the file at path to the cache, moving it in when move is set, and return the cached path.
+
+        Returns None when the cache is disabled or the file alone is bigger than max_size.
+        """
+        if not self.enabled:
+            return None
+        path = Path(path)
+        digest = (digest or digest_file(path)).strip().lower()
+        size = path.stat().st_size
+        if size > self.max_size:
+            logger.info(f"{path.name} ({size} bytes) does not fit in the archive cache")
+            return None
+
+        target = self.object_path(digest)
+        with self._lock:
+            if not target.is_file():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = target.with_name(target.name + '.tmp')
+                if move:
+                    # A rename when the downloads folder is on the same volume, which it normally is
+                    shutil.move(path, temp_path)
+                else:
+                    shutil.copyfile(path, temp_path)
+                os.replace(temp_path, target)
+                logger.info(f"Cached {path.name} as {digest}")
+            elif move:
+                path.unlink()
+            self.objects[digest] = {'size': size, 'last_used': time.time()}
+            if url:
+                self.sources[url] = {'sha256': digest, 'size': size, 'etag': etag, 'last_modified': last_modified}
+            self.evict(keep=digest)
+            self.save()
+        return target
+
+    def remove(self, digest):
+        """Drop an object, e.g. one that turned out to be corrupt."""
+        with self._lock:
+            self._remove(digest)
+            self.save()
+
+    def set_max_size(self, max_size):
+        with self._lock:
+            self.max_size = max_size
+            self.evict()
+            self.save()
+
+    def evict(self, keep=None):
+        """Remove least recently used objects until the cache fits in max_size."""
+        with self._lock:
+            total_size = self.total_size
+            for digest in sorted(self.objects, key=lambda digest: self.objects[digest]['last_used']):
+                if total_size <= self.max_size:
+                    break
+                if digest == keep:
+                    continue
+                total_size -= self.objects[digest]['size']
+                logger.info(f"Evicting {digest} from the archive cache")
+                self._remove(digest)
+
+    def _remove(self, digest):
+        self.objects.pop(digest, None)
+        self.object_path(digest).unlink(missing_ok=True)
+        self.sources = {url: source for url, source in self.sources.items() if source['sha256'] != digest}
+
+
+archive_cache_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_archive_cache():
+    """The archive cache shared by every transfer, created on first use."""
+    global archive_cache_instance
+    with _instance_lock:
+        if archive_cache_instance is None:
+            archive_cache_instance = ArchiveCache()
+        return archive_cache_instance
@@ -0,0 +1,415 @@
+import lzma
+import os
+import queue
+import tarfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import urlsplit
+from loguru import logger
+from turtlelauncher.utils.zip_extract import ParallelZipExtractor, ExtractionCancelled, safe_member_path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import py7zr
+    from py7zr.io import Py7zIO, WriterFactory
+except ImportError:
+    py7zr = None
+    Py7zIO = WriterFactory = object
+
+
+MAGIC_SIZE = 8  # bytes read from the start of an archive to tell its format
+
+
+class UnsupportedArchiveError(Exception):
+    pass
+
+
+class CorruptArchiveError(Exception):
+    pass
+
+
+class ArchiveMember(NamedTuple):
+    """The parts of a zipfile.ZipInfo the install code uses, for the formats that are not zip."""
+    filename: str
+    file_size: int
+    CRC: int | None  # None when the format keeps no checksum per member
+    directory: bool
+
+    def is_dir(self):
+        return self.directory
+
+
+class ArchiveCodec:
+    """One archive format: how to recognise it, list its members and extract them.
+
+    indexed codecs can list their members without decompressing anything and carry a CRC32 for
+    each, so an install can be diffed against them and only the changed members extracted. The
+    others are listed by extracting them, so over an existing install every member is rewritten.
+    """
+    name = None
+    suffixes = ()
+    indexed = False
+
+    def matches(self, magic):
+        return False
+
+    def members(self, archive_path):
+        raise NotImplementedError
+
+    def extract(self, archive_path, extract_path, members=None, progress_callback=None, is_cancelled=None, atomic=False):
+        """Extract members (all of them by default) and return the members extracted.
+
+        progress_callback(done, total) is called periodically; atomic writes every member next to
+        its target and renames it over the target, as ParallelZipExtractor does.
+        """
+        raise NotImplementedError
+
+
+class ZipCodec(ArchiveCodec):
+    name = 'zip'
+    suffixes = ('.zip',)
+    indexed = True
+
+    def matches(self, magic):
+        return magic[:4] in (b'PK\x03\x04', b'PK\x05\x06')
+
+    def members(self, archive_path):
+        with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+            return zip_ref.infolist()
+
+    def extract(self, archive_path, extract_path, members=None, progress_callback=None, is_cancelled=None, atomic=False):
+        members = self.members(archive_path) if members is None else members
+        ParallelZipExtractor(archive_path, extract_path, atomic=atomic).extract(members, progress_callback, is_cancelled)
+        return members
+
+
+class _CountingReader:
+    """Counts the bytes read through it, for progress measured on the compressed archive."""
+
+    def __init__(self, f):
+        self._file = f
+        self.position = 0
+
+    def read(self, size=-1):
+        data = self._file.read(size)
+        self.position += len(data)
+        return data
+
+
+class _ReadAhead:
+    """A file-like reader fed by a thread that decompresses ahead of it.
+
+    zstd decodes a stream on one core, but it releases the GIL while it does, so decoding on its
+    own thread overlaps it with the tar parsing and file writes on the reading side.
+    """
+    CHUNK_SIZE = 1024 * 1024  # 1 MB of decompressed data per queue entry
+    DEPTH = 16  # chunks decoded ahead at most
+
+    def __init__(self, source):
+        self._source = source
+        self._queue = queue.Queue(maxsize=self.DEPTH)
+        self._chunk = b''
+        self._offset = 0
+        self._eof = False
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._fill, name="archive-decompress", daemon=True)
+        self._thread.start()
+
+    def _fill(self):
+        try:
+            while not self._closed.is_set():
+                data = self._source.read(self.CHUNK_SIZE)
+                self._put(data)
+                if not data:
+                    return
+        except Exception as e:
+            self._put(e)
+
+    def _put(self, item):
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def read(self, size=-1):
+        parts = []
+        while size:
+            if self._offset >= len(self._chunk):
+                if self._eof:
+                    break
+                item = self._queue.get()
+                if isinstance(item, Exception):
+                    raise item
+                if not item:
+                    self._eof = True
+                    break
+                self._chunk, self._offset = item, 0
+            end = len(self._chunk) if size < 0 else min(len(self._chunk), self._offset + size)
+            parts.append(self._chunk[self._offset:end])
+            if size > 0:
+                size -= end - self._offset
+            self._offset = end
+        return b''.join(parts)
+
+    def close(self):
+        self._closed.set()
+        self._thread.join()
+
+
+class TarZstdCodec(ArchiveCodec):
+    """tar archives compressed with zstd, through the optional zstandard package.
+
+    The stream is read across frames, so archives written by zstd -T0 or pzstd extract as well,
+    and with a window of up to 2 GB, so archives written with --long=31 do too.
+    """
+    name = 'tar.zst'
+    suffixes = ('.tar.zst', '.tzst')
+    READ_SIZE = 1024 * 1024  # 1 MB
+    MAX_WINDOW_SIZE = 2 ** 31  # 2 GB, zstd --long=31
+
+    def matches(self, magic):
+        number = int.from_bytes(magic[:4], 'little')
+        # A zstd frame, or a skippable frame such as the one pzstd starts with
+        return magic[:4] == b'\x28\xb5\x2f\xfd' or 0x184D2A50 <= number <= 0x184D2A5F
+
+    @staticmethod
+    def _require():
+        if zstandard is None:
+            raise UnsupportedArchiveError("Extracting .tar.zst archives needs the zstandard package (pip install zstandard)")
+
+    def _iterate(self, archive_path, is_cancelled=None):
+        """Yield (tar, info, compressed bytes read) for every member, decompressing on a background thread."""
+        self._require()
+        decompressor = zstandard.ZstdDecompressor(max_window_size=self.MAX_WINDOW_SIZE)
+        with open(archive_path, 'rb') as f:
+            counter = _CountingReader(f)
+            reader = _ReadAhead(decompressor.stream_reader(counter, read_size=self.READ_SIZE, read_across_frames=True))
+            try:
+                with tarfile.open(fileobj=reader, mode='r|') as tar:
+                    for info in tar:
+                        if is_cancelled and is_cancelled():
+                            raise ExtractionCancelled()
+                        yield tar, info, counter.position
+            except (tarfile.TarError, zstandard.ZstdError) as e:
+                raise CorruptArchiveError(f"{archive_path} is not a valid .tar.zst archive: {e}") from e
+            finally:
+                reader.close()
+
+    def members(self, archive_path):
+        return [ArchiveMember(info.name, info.size, None, info.isdir()) for _, info, _ in self._iterate(archive_path)]
+
+    def extract(self, archive_path, extract_path, members=None, progress_callback=None, is_cancelled=None, atomic=False):
+        self._require()
+        extract_path = Path(extract_path)
+        wanted = None if members is None else {info.filename for info in members}
+        total_size = os.path.getsize(archive_path)
+        extracted = []
+        last_report = 0
+        logger.info(f"Extracting {archive_path} ({total_size} bytes of tar.zst)")
+
+        try:
+            for tar, info, position in self._iterate(archive_path, is_cancelled):
+                if wanted is not None and info.name not in wanted:
+                    continue
+                target = safe_member_path(extract_path, info.name)
+                if target is None:
+                    continue
+                if info.isdir():
+                    target.mkdir(parents=True, exist_ok=True)
+                elif info.isfile():
+                    self._write_member(tar.extractfile(info), target, is_cancelled, atomic)
+                else:
+                    logger.debug(f"Skipping {info.name}, only files and folders are extracted")
+                    continue
+                extracted.append(ArchiveMember(info.name, info.size, None, info.isdir()))
+
+                if progress_callback and position - last_report >= self.READ_SIZE:
+                    progress_callback(position, total_size)
+                    last_report = position
+        except (tarfile.TarError, zstandard.ZstdError) as e:
+            # Member data is read here rather than in _iterate, so a truncated member surfaces here
+            raise CorruptArchiveError(f"{archive_path} is not a valid .tar.zst archive: {e}") from e
+
+        if progress_callback:
+            progress_callback(total_size, total_size)
+        return extracted
+
+    def _write_member(self, source, target, is_cancelled, atomic):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        output = target.with_name(target.name + '.tlpart') if atomic else target
+        output.unlink(missing_ok=True)  # see ParallelZipExtractor._extract_member
+        try:
+            with output.open('wb') as destination:
+                while data := source.read(self.READ_SIZE):
+                    if is_cancelled and is_cancelled():
+                        raise ExtractionCancelled()
+                    destination.write(data)
+            if atomic:
+                os.replace(output, target)
+        finally:
+            if atomic and output.exists():
+                output.unlink()
+
+
+class _MemberWriter(Py7zIO):
+    """Where py7zr writes one member: the target file, or a .tlpart next to it when atomic."""
+
+    def __init__(self, target, atomic, on_written, is_cancelled):
+        self.target = target
+        self.output = target.with_name(target.name + '.tlpart') if atomic else target
+        self._on_written = on_written
+        self._is_cancelled = is_cancelled
+        self._size = 0
+        target.parent.mkdir(parents=True, exist_ok=True)
+        self.output.unlink(missing_ok=True)  # see ParallelZipExtractor._extract_member
+        self._file = self.output.open('wb')
+
+    def write(self, s):
+        if self._is_cancelled and self._is_cancelled():
+            raise ExtractionCancelled()
+        written = self._file.write(s)
+        self._size += written
+        self._on_written(written)
+        return written
+
+    def read(self, size=None):
+        return b''
+
+    def seek(self, offset, whence=0):
+        return self._file.seek(offset, whence)
+
+    def flush(self):
+        self._file.flush()
+
+    def size(self):
+        return self._size
+
+    def close(self):
+        self._file.close()
+
+
+class _MemberWriterFactory(WriterFactory):
+    def __init__(self, atomic, is_cancelled):
+        self.atomic = atomic
+        self.is_cancelled = is_cancelled
+        self.writers = []
+        self.extracted_size = 0
+        self._lock = threading.Lock()
+
+    def create(self, filename):
+        writer = _MemberWriter(Path(filename), self.atomic, self.written, self.is_cancelled)
+        with self._lock:
+            self.writers.append(writer)
+        return writer
+
+    def written(self, size):
+        with self._lock:
+            self.extracted_size += size
+
+
+class SevenZipCodec(ArchiveCodec):
+    """7z archives (LZMA2 and the rest of what py7zr decodes), through the optional py7zr package.
+
+    py7zr decodes every folder (solid block) of the archive on its own thread, and liblzma releases
+    the GIL, so an archive packed with several blocks (7z -ms=<size>) extracts on several cores.
+    py7zr hands each member to a writer from this module, which does the progress, cancellation
+    and atomic replacement.
+    """
+    name = '7z'
+    suffixes = ('.7z',)
+    indexed = True
+    PROGRESS_INTERVAL = 0.5  # seconds
+
+    def matches(self, magic):
+        return magic[:6] == b"7z\xbc\xaf\x27\x1c"
+
+    @staticmethod
+    def _require():
+        if py7zr is None:
+            raise UnsupportedArchiveError("Extracting .7z archives needs the py7zr package (pip install py7zr)")
+
+    def _open(self, archive_path):
+        self._require()
+        try:
+            return py7zr.SevenZipFile(archive_path, 'r')
+        except py7zr.exceptions.ArchiveError as e:
+            raise CorruptArchiveError(f"{archive_path} is not a valid .7z archive: {e}") from e
+
+    def members(self, archive_path):
+        with self._open(archive_path) as archive:
+            return [ArchiveMember(info.filename, info.uncompressed, info.crc32 or 0, info.is_directory)
+                    for info in archive.list()]
+
+    def extract(self, archive_path, extract_path, members=None, progress_callback=None, is_cancelled=None, atomic=False):
+        extract_path = Path(extract_path)
+        members = self.members(archive_path) if members is None else members
+        total_size = sum(info.file_size for info in members)
+        factory = _MemberWriterFactory(atomic, is_cancelled)
+        logger.info(f"Extracting {len(members)} members ({total_size} bytes) from {archive_path}")
+
+        # Directories carry no data and py7zr leaves them to the writer factory, so create them here
+        for info in members:
+            target = safe_member_path(extract_path, info.filename)
+            if info.is_dir() and target is not None:
+                target.mkdir(parents=True, exist_ok=True)
+
+        def run():
+            with self._open(archive_path) as archive:
+                archive.extract(extract_path, [info.filename for info in members if not info.is_dir()], factory=factory)
+
+        try:
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="7z-extract") as pool:
+                future = pool.submit(run)
+                while True:
+                    try:
+                        future.result(timeout=self.PROGRESS_INTERVAL)
+                        break
+                    except FutureTimeoutError:
+                        if progress_callback:
+                            progress_callback(factory.extracted_size, total_size)
+            for writer in factory.writers:
+                writer.close()  # py7zr before 1.0 does not close writers itself
+                if writer.output != writer.target:
+                    os.replace(writer.output, writer.target)
+        except (py7zr.exceptions.ArchiveError, lzma.LZMAError) as e:
+            raise CorruptArchiveError(f"{archive_path} is not a valid .7z archive: {e}") from e
+        finally:
+            for writer in factory.writers:
+                writer.close()
+                if writer.output != writer.target and writer.output.exists():
+                    writer.output.unlink()
+
+        if progress_callback:
+            progress_callback(total_size, total_size)
+        return members
+
+
+CODECS = [ZipCodec(), TarZstdCodec(), SevenZipCodec()]  # tried in order; new formats are added here
+
+
+def detect_codec(archive_path: Path | str = None, url=None):
+    """The codec for an archive, from its first bytes when it is on disk, otherwise from the URL.
+
+    Falls back to zip, the format the launcher has always downloaded.
+    """
+    if archive_path and os.path.isfile(archive_path):
+        with open(archive_path, 'rb') as f:
+            magic = f.read(MAGIC_SIZE)
+        for codec in CODECS:
+            if codec.matches(magic):
+                return codec
+    if url:
+        path = urlsplit(url).path.lower()
+        for codec in CODECS:
+            if path.endswith(codec.suffixes):
+                return codec
+    return CODECS[0]
@@ -0,0 +1,121 @@
+import asyncio
+import concurrent.futures
+import threading
+from PySide6.QtCore import QObject, Signal
+from loguru import logger
+
+
+class AsyncTask(QObject):
+    """A coroutine running on the shared loop, reporting back through Qt signals.
+
+    The signals are emitted from the loop thread, so connected slots run queued on their own thread.
+    Unlike run_coroutine_threadsafe, the future only completes once the task has really finished,
+    including whatever cleanup it does when cancelled.
+    """
+    finished = Signal(object)  # result
+    failed = Signal(str)
+    cancelled = Signal()
+
+    def __init__(self, loop, coroutine, name=""):
+        super().__init__()
+        self.loop = loop
+        self.name = name
+        self.future = concurrent.futures.Future()
+        self._task = None
+        loop.call_soon_threadsafe(self._start, coroutine)
+
+    def _start(self, coroutine):
+        self._task = self.loop.create_task(coroutine, name=self.name or None)
+        self._task.add_done_callback(self._on_done)
+
+    def _on_done(self, task):
+        if task.cancelled():
+            logger.debug(f"Async task {self.name} cancelled")
+            self.future.cancel()
+            self.cancelled.emit()
+        elif task.exception() is not None:
+            error = task.exception()
+            logger.opt(exception=error).error(f"Async task {self.name} failed: {error}")
+            self.future.set_exception(error)
+            self.failed.emit(str(error))
+        else:
+            self.future.set_result(task.result())
+            self.finished.emit(task.result())
+
+    def cancel(self):
+        """Cancel the task right away; it sees CancelledError at whatever it is awaiting."""
+        self.loop.call_soon_threadsafe(self._cancel)
+
+    def _cancel(self):
+        if self._task:
+            self._task.cancel()
+
+    def wait(self):
+        """Block the calling (non-loop) thread until the task is done, returning its result or None if cancelled."""
+        try:
+            return self.future.result()
+        except concurrent.futures.CancelledError:
+            return None
+
+    def done(self):
+        return self.future.done()
+
+
+class AsyncLoopThread:
+    """One asyncio event loop on a daemon thread, shared by every async job in the launcher.
+
+    Jobs are submitted as tasks, so they share connection pools and can be cancelled for real
+    instead of polling a flag between chunks.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="asyncio-loop", daemon=True)
+        self.thread.start()
+        self._started.wait()
+        logger.info("Async loop thread started")
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._started.set)
+        self.loop.run_forever()
+
+    def submit(self, coroutine, name=""):
+        return AsyncTask(self.loop, coroutine, name)
+
+    def run(self, coroutine, name=""):
+        """Run coroutine on the loop and wait for it from the calling thread."""
+        return self.submit(coroutine, name).wait()
+
+    def stop(self, shutdown=None):
+        """Cancel what is still running, await shutdown() on the loop, then stop it."""
+        async def stop_tasks():
+            current = asyncio.current_task()
+            tasks = [task for task in asyncio.all_tasks() if task is not current]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if shutdown:
+                await shutdown()
+
+        if self.loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(stop_tasks(), self.loop).result(timeout=5)
+            except Exception as e:
+                logger.warning(f"Async loop did not shut down cleanly: {e!r}")
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=5)
+            logger.info("Async loop thread stopped")
+
+
+async_loop_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_async_loop():
+    global async_loop_instance
+    with _instance_lock:
+        if async_loop_instance is None:
+            async_loop_instance = AsyncLoopThread()
+        return async_loop_instance
@@ -0,0 +1,151 @@
+import bz2
+import hashlib
+import os
+from functools import lru_cache
+from pathlib import Path
+from loguru import logger
+from turtlelauncher.utils.zip_extract import ExtractionCancelled
+
+
+BSDIFF_MAGIC = b'BSDIFF40'
+HEADER_SIZE = 32
+CHUNK_SIZE = 1024 * 1024  # 1 MB, the most of the old, diff or new data held at once
+READ_SIZE = 64 * 1024  # 64 KB of compressed patch read at a time
+
+
+class PatchError(Exception):
+    pass
+
+
+def read_offset(data):
+    """A bsdiff integer: 8 bytes little endian, sign in the top bit rather than two's complement."""
+    value = int.from_bytes(data[:8], 'little')
+    if value & (1 << 63):
+        return -(value & ~(1 << 63))
+    return value
+
+
+@lru_cache(maxsize=8)
+def _masks(size):
+    return int.from_bytes(b'\x7f' * size, 'little'), int.from_bytes(b'\x80' * size, 'little')
+
+
+def add_bytes(first, second):
+    """Bytewise (first + second) mod 256, as bsdiff's diff block needs.
+
+    Both are turned into one big integer and added seven bits per byte at a time, so no carry can
+    cross into the next byte; the top bits are then put back with an xor. That keeps the per-byte
+    work in C instead of a Python loop.
+    """
+    size = len(first)
+    low, high = _masks(size)
+    x = int.from_bytes(first, 'little')
+    y = int.from_bytes(second, 'little')
+    return (((x & low) + (y & low)) ^ ((x ^ y) & high)).to_bytes(size, 'little')
+
+
+class _Bz2Block:
+    """Sequential reads from one bzip2-compressed block of the patch file, inflated a little at a time."""
+
+    def __init__(self, f, offset, length):
+        self._file = f
+        self._position = offset
+        self._end = offset + length
+        self._decompressor = bz2.BZ2Decompressor()
+        self._buffer = b''
+
+    def read(self, size):
+        """Exactly size bytes."""
+        parts = []
+        while size > 0:
+            if not self._buffer:
+                self._buffer = self._inflate(size)
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+            parts.append(data)
+            size -= len(data)
+        return b''.join(parts)
+
+    def _inflate(self, size):
+        while True:
+            data = b''
+            if self._decompressor.needs_input:
+                if self._decompressor.eof or self._position >= self._end:
+                    raise PatchError("Patch block ended early")
+                self._file.seek(self._position)
+                data = self._file.read(min(READ_SIZE, self._end - self._position))
+                if not data:
+                    raise PatchError("Patch file is truncated")
+                self._position += len(data)
+            elif self._decompressor.eof:
+                raise PatchError("Patch block ended early")
+            try:
+                inflated = self._decompressor.decompress(data, max(size, READ_SIZE))
+            except OSError as e:
+                raise PatchError(f"Patch block is corrupt: {e}") from e
+            if inflated:
+                return inflated
+
+
+def _read_old(old, old_size, position, size):
+    """size bytes of the old file from position; bytes outside the file count as zero, as in bsdiff."""
+    start = max(position, 0)
+    end = min(position + size, old_size)
+    if start >= end:
+        return bytes(size)
+    old.seek(start)
+    data = old.read(end - start)
+    return bytes(start - position) + data + bytes(position + size - start - len(data))
+
+
+def apply_bsdiff(patch_path: Path | str, old_path: Path | str, new_path: Path | str, is_cancelled=None):
+    """Write old_path patched with a BSDIFF40 patch to new_path and return the SHA-256 of the result.
+
+    The patch is streamed: its three bzip2 blocks are inflated in step with the output, the old
+    file is read in CHUNK_SIZE pieces and the new one hashed as it is written, so memory stays at a
+    few MB however big the MPQ is.
+    """
+    with open(patch_path, 'rb') as patch, open(old_path, 'rb') as old, open(new_path, 'wb') as new:
+        header = patch.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or header[:8] != BSDIFF_MAGIC:
+            raise PatchError(f"{patch_path} is not a BSDIFF40 patch")
+        control_size, diff_size, new_size = (read_offset(header[offset:offset + 8]) for offset in (8, 16, 24))
+        patch_size = os.fstat(patch.fileno()).st_size
+        if min(control_size, diff_size, new_size) < 0 or HEADER_SIZE + control_size + diff_size > patch_size:
+            raise PatchError(f"{patch_path} has a corrupt header")
+
+        control = _Bz2Block(patch, HEADER_SIZE, control_size)
+        diff = _Bz2Block(patch, HEADER_SIZE + control_size, diff_size)
+        extra = _Bz2Block(patch, HEADER_SIZE + control_size + diff_size, patch_size - HEADER_SIZE - control_size - diff_size)
+        old_size = os.fstat(old.fileno()).st_size
+        new_hash = hashlib.sha256()
+        written = 0
+        old_position = 0
+
+        while written < new_size:
+            if is_cancelled and is_cancelled():
+                raise ExtractionCancelled()
+            triple = control.read(24)
+            add_size, copy_size, seek = (read_offset(triple[offset:offset + 8]) for offset in (0, 8, 16))
+            if add_size < 0 or copy_size < 0 or written + add_size + copy_size > new_size:
+                raise PatchError(f"{patch_path} has a corrupt control block")
+
+            # add_size bytes of the diff block, each added to the old byte at the same position
+            while add_size:
+                size = min(CHUNK_SIZE, add_size)
+                data = add_bytes(diff.read(size), _read_old(old, old_size, old_position, size))
+                new.write(data)
+                new_hash.update(data)
+                old_position += size
+                add_size -= size
+                written += size
+            # then copy_size bytes of new data from the extra block
+            while copy_size:
+                data = extra.read(min(CHUNK_SIZE, copy_size))
+                new.write(data)
+                new_hash.update(data)
+                copy_size -= len(data)
+                written += len(data)
+            old_position += seek
+
+    logger.debug(f"Patched {old_path} into {new_path}, {new_size} bytes")
+    return new_hash.hexdigest()
@@ -0,0 +1,180 @@
+import hashlib
+import mmap
+import os
+import threading
+import zlib
+from pathlib import Path
+from loguru import logger
+
+
+READ_SIZE = 4 * 1024 * 1024  # 4 MB
+MMAP_THRESHOLD = 64 * 1024 * 1024  # 64 MB, files this big (the MPQs) are mapped rather than read
+
+
+class ChecksumMismatchError(Exception):
+    pass
+
+
+def hash_file(path: Path | str, algorithm='sha256'):
+    file_hash = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        while data := f.read(READ_SIZE):
+            file_hash.update(data)
+    return file_hash.hexdigest()
+
+
+def digest_file(path: Path | str, algorithm='sha256'):
+    """Hex digest of path, with 'crc32' accepted next to the hashlib algorithms.
+
+    Large files are memory mapped and hashed straight from the page cache instead of being copied
+    through read() buffers. Module level so it can run in a worker process.
+    """
+    crc = 0
+    file_hash = None if algorithm == 'crc32' else hashlib.new(algorithm)
+
+    def update(data):
+        nonlocal crc
+        if file_hash is None:
+            crc = zlib.crc32(data, crc)
+        else:
+            file_hash.update(data)
+
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for offset in range(0, size, READ_SIZE):
+                        update(view[offset:offset + READ_SIZE])
+                finally:
+                    view.release()
+        else:
+            while data := f.read(READ_SIZE):
+                update(data)
+    return f"{crc:08x}" if file_hash is None else file_hash.hexdigest()
+
+
+def parse_checksum_file(text, filename=None):
+    """Read a digest from sha256sum-style output ("<hex>  <name>" per line, or just "<hex>")."""
+    for line in text.splitlines():
+        parts = line.strip().split()
+        if not parts:
+            continue
+        digest = parts[0].lower()
+        name = parts[1].lstrip('*') if len(parts) > 1 else None
+        if filename is None or name is None or name == filename:
+            return digest
+    return None
+
+
+class StreamingHasher:
+    """Hashes a file in order while it is being written, possibly out of order.
+
+    update_at() is fed every chunk as it is written; chunks that continue the hashed prefix are
+    hashed straight from memory and anything else is skipped. When segments arrive out of order,
+    follow() starts a thread that reads the skipped bytes back as advance() reports the contiguous
+    prefix on disk, while they are still in the page cache, so the download is hashed by the time
+    it finishes. catch_up() reads whatever is left (data kept from a previous session with no
+    follower), so the archive is never read a second time in full.
+    """
+
+    def __init__(self, algorithm='sha256'):
+        self.algorithm = algorithm
+        self.offset = 0
+        self._hash = hashlib.new(algorithm)
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._available = 0
+        self._follower = None
+        self._following = False
+        self._draining = False
+
+    def update_at(self, offset, data):
+        with self._lock:
+            end = offset + len(data)
+            if offset <= self.offset < end:
+                self._hash.update(memoryview(data)[self.offset - offset:])
+                self.offset = end
+
+    def follow(self, path: Path):
+        """Hash the skipped bytes of path on a background thread, up to what advance() reports."""
+        if self._follower:
+            return
+        self._following = True
+        self._draining = False
+        self._follower = threading.Thread(target=self._follow, args=(Path(path),), name="hash-follow", daemon=True)
+        self._follower.start()
+
+    def advance(self, available):
+        """The first available bytes of the file are on disk."""
+        with self._condition:
+            if available > self._available:
+                self._available = available
+                self._condition.notify()
+
+    def stop_following(self, drain=False):
+        """Stop the follower thread, with drain only once it has hashed everything advance() reported."""
+        with self._condition:
+            if drain:
+                self._draining = True
+            else:
+                self._following = False
+            self._condition.notify()
+        if self._follower:
+            self._follower.join()
+            self._follower = None
+
+    def _follow(self, path):
+        f = None
+        try:
+            while True:
+                with self._condition:
+                    while self._following and self._available <= self.offset:
+                        if self._draining:
+                            return
+                        self._condition.wait()
+                    if not self._following:
+                        return
+                    offset = self.offset
+                    size = min(READ_SIZE, self._available - offset)
+                # Unbuffered: a buffered read could cache bytes past the prefix that are not written yet
+                if f is None:
+                    f = open(path, 'rb', buffering=0)
+                f.seek(offset)
+                data = f.read(size)
+                if not data:
+                    logger.warning(f"{path} is shorter than its reported prefix, leaving the rest to catch_up")
+                    return
+                self.update_at(offset, data)
+        except OSError as e:
+            logger.warning(f"Stopped hashing {path} during the download: {e!r}")
+        finally:
+            if f is not None:
+                f.close()
+
+    def catch_up(self, path: Path, size):
+        """Hash whatever is left between the current offset and size, returning how many bytes were read."""
+        self.stop_following()
+        read_size = 0
+        with self._lock, open(path, 'rb') as f:
+            f.seek(self.offset)
+            while self.offset < size:
+                data = f.read(min(READ_SIZE, size - self.offset))
+                if not data:
+                    break
+                self._hash.update(data)
+                self.offset += len(data)
+                read_size += len(data)
+        return read_size
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def matches(self, expected_digest):
+        actual = self.hexdigest()
+        if actual != expected_digest.strip().lower():
+            logger.error(f"{self.algorithm} mismatch: expected {expected_digest}, got {actual}")
+            return False
+        logger.info(f"{self.algorithm} verified: {actual}")
+        return True
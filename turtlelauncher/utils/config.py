@@ -14,6 +14,16 @@ class Config:
         self.minimize_on_launch = False
         self.clear_cache_on_launch = False
         self.language = "English"
+        self.pipelined_extraction = True
+        self.download_rate_limit = 0  # KB/s, 0 means unlimited
+        self.adaptive_throttling = True
+        self.in_game_rate_limit = 512  # KB/s while the game is running
+        self.download_mirrors = []  # extra URLs serving the same client archive
+        self.archive_cache_limit = 0  # GB of downloaded archives kept for reinstalls, 0 disables the cache
+        self.cache_update_files = False  # also cache the files delta updates fetch, which doubles their disk writes
+        self.lan_discovery = False  # download from launchers seeding on the local network when there are any
+        self.lan_seeding = False  # serve the archive cache and install to other launchers on the local network
+        self.extra_install_dirs = []  # other installs (test client, profile copies) deduplicated with game_install_dir
 
         self._loaded = False
 
@@ -58,7 +68,17 @@ class Config:
             'transparency_disabled': self.transparency_disabled,
             'minimize_on_launch': self.minimize_on_launch,
             'clear_cache_on_launch': self.clear_cache_on_launch,
-            'language': self.language
+            'language': self.language,
+            'pipelined_extraction': self.pipelined_extraction,
+            'download_rate_limit': self.download_rate_limit,
+            'adaptive_throttling': self.adaptive_throttling,
+            'in_game_rate_limit': self.in_game_rate_limit,
+            'download_mirrors': self.download_mirrors,
+            'archive_cache_limit': self.archive_cache_limit,
+            'cache_update_files': self.cache_update_files,
+            'lan_discovery': self.lan_discovery,
+            'lan_seeding': self.lan_seeding,
+            'extra_install_dirs': [str(path) for path in self.extra_install_dirs]
         }
         with open(self.config_path, 'w') as f:
             json.dump(config, f)
@@ -79,6 +99,16 @@ class Config:
             self.minimize_on_launch = config.get('minimize_on_launch', False)
             self.clear_cache_on_launch = config.get('clear_cache_on_launch', False)
             self.language = config.get('language', 'English')
+            self.pipelined_extraction = config.get('pipelined_extraction', True)
+            self.download_rate_limit = config.get('download_rate_limit', 0)
+            self.adaptive_throttling = config.get('adaptive_throttling', True)
+            self.in_game_rate_limit = config.get('in_game_rate_limit', 512)
+            self.download_mirrors = config.get('download_mirrors', [])
+            self.archive_cache_limit = config.get('archive_cache_limit', 0)
+            self.cache_update_files = config.get('cache_update_files', False)
+            self.lan_discovery = config.get('lan_discovery', False)
+            self.lan_seeding = config.get('lan_seeding', False)
+            self.extra_install_dirs = [Path(path) for path in config.get('extra_install_dirs', [])]
             logger.debug(f"Config loaded - Game install directory: {self.game_install_dir}")
             logger.debug(f"Config loaded - Selected binary: {self.selected_binary}")
             logger.debug(f"Config loaded - Particles disabled: {self.particles_disabled}")
@@ -86,6 +116,13 @@ class Config:
             logger.debug(f"Config loaded - Minimize on launch: {self.minimize_on_launch}")
             logger.debug(f"Config loaded - Clear cache on launch: {self.clear_cache_on_launch}")
             logger.debug(f"Config loaded - Language: {self.language}")
+            logger.debug(f"Config loaded - Pipelined extraction: {self.pipelined_extraction}")
+            logger.debug(f"Config loaded - Download rate limit: {self.download_rate_limit} KB/s")
+            logger.debug(f"Config loaded - Adaptive throttling: {self.adaptive_throttling} ({self.in_game_rate_limit} KB/s in game)")
+            logger.debug(f"Config loaded - Download mirrors: {self.download_mirrors}")
+            logger.debug(f"Config loaded - Archive cache limit: {self.archive_cache_limit} GB, update files cached: {self.cache_update_files}")
+            logger.debug(f"Config loaded - LAN discovery: {self.lan_discovery}, seeding: {self.lan_seeding}")
+            logger.debug(f"Config loaded - Extra install directories: {self.extra_install_dirs}")
             self._loaded = True
             return True
         except Exception as e:
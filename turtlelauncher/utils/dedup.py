@@ -0,0 +1,165 @@
+import ctypes
+import ctypes.util
+import os
+import shutil
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import NamedTuple
+from loguru import logger
+from turtlelauncher.utils.file_index import FileIndex, walk_signatures
+from turtlelauncher.utils.staging import STAGING_NAME, PREVIOUS_NAME
+from turtlelauncher.utils.zip_extract import ExtractionCancelled
+
+
+FICLONE = 0x40049409  # linux/fs.h, _IOW(0x94, 9, int)
+
+
+def reflink(source: Path | str, target: Path | str):
+    """Create target as a copy-on-write clone of source, raising OSError where the filesystem cannot.
+
+    Btrfs, XFS and bcachefs support it through the FICLONE ioctl, APFS through clonefile().
+    """
+    if sys.platform == 'darwin':
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if libc.clonefile(os.fsencode(source), os.fsencode(target), 0) != 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), str(target))
+        return
+    if not sys.platform.startswith('linux'):
+        raise OSError(f"Reflinks are not supported on {sys.platform}")
+
+    import fcntl
+    with open(source, 'rb') as src, open(target, 'xb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.unlink(target)
+            raise
+
+
+def break_link(path: Path | str):
+    """Give path its own copy of the data it shares through a hardlink, before it is written in place.
+
+    Reflinked files need nothing, the filesystem copies them on write. Writers that rewrite a whole
+    file never need this either: extraction unlinks its target before writing it, and repairs,
+    delta updates and patches rename a new file over it, so the new file gets its own inode.
+    """
+    path = Path(path)
+    if not path.is_file() or path.stat().st_nlink < 2:
+        return False
+    temp_path = path.with_name(path.name + '.tlunlink')
+    shutil.copy2(path, temp_path)
+    os.replace(temp_path, path)
+    logger.info(f"Broke the hardlink on {path} before modifying it")
+    return True
+
+
+class DedupResult(NamedTuple):
+    reflinked: int  # files now cloned from an identical file
+    hardlinked: int  # files now hardlinked to an identical file
+    saved_size: int  # bytes of the files linked in this run
+
+
+class InstallDeduplicator:
+    """Finds identical files across game installs and makes them share their data on disk.
+
+    Files are grouped by size first, so only sizes that occur more than once are hashed, and the
+    hashes come from the file index, so after the first run only changed files are read again.
+    Every duplicate is replaced by a reflink of the first copy when the filesystem supports it,
+    otherwise by a hardlink. User folders (settings, addons, caches, logs) are left alone: the
+    game writes to them in place, which a hardlink would leak into every install. A reflink cannot
+    be told apart from a copy, so later runs clone those files again, which only touches metadata.
+    """
+    MIN_SIZE = 1024 * 1024  # 1 MB, smaller files are not worth a link
+    SKIPPED_FOLDERS = {'wtf', 'interface', 'wdb', 'logs', 'screenshots', 'errors',
+                       STAGING_NAME.lower(), PREVIOUS_NAME.lower()}
+
+    def __init__(self, install_dirs, file_index=None):
+        self.install_dirs = [Path(install_dir) for install_dir in dict.fromkeys(install_dirs) if install_dir]
+        self.file_index = file_index
+
+    def candidates(self):
+        """{path: StatSignature} of the files eligible for deduplication, in install order."""
+        signatures = {}
+        for install_dir in self.install_dirs:
+            if not install_dir.is_dir():
+                logger.warning(f"Skipping missing install {install_dir}")
+                continue
+            for path, signature in walk_signatures(install_dir).items():
+                folder = path.relative_to(install_dir).parts[0].lower()
+                if signature.size >= self.MIN_SIZE and folder not in self.SKIPPED_FOLDERS:
+                    signatures[path] = signature
+        return signatures
+
+    def run(self, is_cancelled=None):
+        own_index = self.file_index is None
+        file_index = self.file_index or FileIndex()
+        try:
+            return self._run(file_index, is_cancelled)
+        finally:
+            if own_index:
+                file_index.close()
+
+    def _run(self, file_index, is_cancelled):
+        signatures = self.candidates()
+        by_size = defaultdict(list)
+        for path, signature in signatures.items():
+            by_size[signature.size].append(path)
+        to_hash = [path for paths in by_size.values() if len(paths) > 1 for path in paths]
+        logger.info(f"Deduplicating {len(self.install_dirs)} installs: {len(to_hash)} of {len(signatures)} files share a size")
+
+        digests = file_index.digests(to_hash, 'sha256', is_cancelled=is_cancelled, signatures=signatures)
+        if is_cancelled and is_cancelled():
+            raise ExtractionCancelled()
+        groups = defaultdict(list)
+        for path in to_hash:  # keeps install order, so the first install's copy is the one kept
+            if path in digests:
+                groups[digests[path]].append(path)
+
+        reflinked = hardlinked = saved_size = 0
+        for digest, paths in groups.items():
+            original = paths[0]
+            for path in paths[1:]:
+                if is_cancelled and is_cancelled():
+                    raise ExtractionCancelled()
+                kind = self.link(original, path)
+                if kind is None:
+                    continue
+                file_index.record(path, 'sha256', digest, commit=False)
+                saved_size += signatures[path].size
+                if kind == 'reflink':
+                    reflinked += 1
+                else:
+                    hardlinked += 1
+        file_index.commit()
+
+        result = DedupResult(reflinked, hardlinked, saved_size)
+        logger.info(f"Deduplication done: {result}")
+        return result
+
+    def link(self, original: Path, duplicate: Path):
+        """Replace duplicate with a reflink or hardlink of original, returning which, or None if it already shares it."""
+        original_stat = original.stat()
+        duplicate_stat = duplicate.stat()
+        if original_stat.st_dev != duplicate_stat.st_dev:
+            return None  # links cannot cross volumes
+        if original_stat.st_ino == duplicate_stat.st_ino:
+            return None  # already hardlinked
+        temp_path = duplicate.with_name(duplicate.name + '.tllink')
+        temp_path.unlink(missing_ok=True)
+        try:
+            reflink(original, temp_path)
+            kind = 'reflink'
+        except OSError:
+            try:
+                os.link(original, temp_path)
+            except OSError as e:
+                logger.warning(f"Could not link {duplicate} to {original}: {e}")
+                return None
+            kind = 'hardlink'
+        # Replace rather than delete first, so duplicate never goes missing
+        os.replace(temp_path, duplicate)
+        logger.debug(f"{kind} {duplicate} -> {original}")
+        return kind
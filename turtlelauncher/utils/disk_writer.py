@@ -0,0 +1,128 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from loguru import logger
+
+
+def preallocate(f, size):
+    """Reserve size bytes for f up front so the filesystem can lay the file out in one piece."""
+    if size <= 0:
+        return
+    if hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+            return
+        except OSError as e:
+            logger.debug(f"posix_fallocate failed ({e!r}), falling back to truncate")
+    # On NTFS extending the file allocates it; elsewhere this at least fixes the final size
+    if os.fstat(f.fileno()).st_size < size:
+        f.truncate(size)
+
+
+class DiskWriter:
+    """Writes downloaded chunks to a file on a dedicated thread, so a slow disk never stalls the socket reads.
+
+    write() queues a chunk and returns at once; it only waits (on a thread, never on the loop) when
+    MAX_QUEUED chunks are already waiting for the disk. The writer thread merges contiguous chunks
+    into writes of up to WRITE_SIZE, cut on ALIGNMENT boundaries, and calls on_written(offset, data)
+    from the writer thread once each write has reached the OS; data is a view only valid during the
+    call. Anything that must only describe data that is really on disk (the resume journal, the
+    pipelined extractor) belongs in that callback.
+    """
+    MAX_QUEUED = 32  # chunks, about 32 MB with 1 MB network chunks
+    WRITE_SIZE = 8 * 1024 * 1024  # 8 MB
+    ALIGNMENT = 64 * 1024  # 64 KB, a multiple of any sector or page size
+
+    def __init__(self, path: Path | str, size=0, on_written=None):
+        self.path = Path(path)
+        self.on_written = on_written
+        self.blocked_time = 0.0  # seconds write() spent waiting for room in the queue
+        self.written_size = 0
+        self.error = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Unbuffered, so anything reported to on_written has at least reached the OS
+        self._file = self.path.open('r+b' if self.path.exists() else 'w+b', buffering=0)
+        preallocate(self._file, size)
+        self._queue = queue.Queue(self.MAX_QUEUED)
+        self._pending = bytearray()
+        self._pending_offset = 0
+        self._thread = threading.Thread(target=self._run, name=f"disk-writer {self.path.name}", daemon=True)
+        self._thread.start()
+
+    async def write(self, offset, data):
+        """Queue data for offset, waiting only if the writer has fallen MAX_QUEUED chunks behind."""
+        if self.error:
+            raise self.error
+        try:
+            self._queue.put_nowait((offset, data))
+        except queue.Full:
+            started = time.monotonic()
+            await asyncio.to_thread(self._queue.put, (offset, data))
+            self.blocked_time += time.monotonic() - started
+
+    async def close(self):
+        """Write out everything still queued, close the file and raise whatever error the writer hit."""
+        await asyncio.to_thread(self._queue.put, None)
+        await asyncio.to_thread(self._thread.join)
+        self._file.close()
+        if self.blocked_time:
+            logger.info(f"Network side waited {self.blocked_time:.2f}s on the disk writer for {self.path.name}")
+        if self.error:
+            raise self.error
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self.error:
+                # Keep draining so write() never waits on a queue nobody empties
+                continue
+            offset, data = item
+            try:
+                if self._pending and offset != self._pending_offset + len(self._pending):
+                    self._flush()
+                if not self._pending:
+                    self._pending_offset = offset
+                self._pending += data
+                if len(self._pending) >= self.WRITE_SIZE:
+                    self._flush(aligned=True)
+                elif self._queue.empty():
+                    # Nothing else is waiting, so there is nothing to merge with
+                    self._flush()
+            except Exception as e:
+                logger.exception(f"Disk writer for {self.path} failed: {e}")
+                self.error = e
+        try:
+            if not self.error:
+                self._flush()
+        except Exception as e:
+            logger.exception(f"Disk writer for {self.path} failed: {e}")
+            self.error = e
+
+    def _flush(self, aligned=False):
+        size = len(self._pending)
+        if aligned:
+            # Leave the unaligned tail for the next write, it usually continues right after it
+            end = self._pending_offset + size
+            aligned_size = end - end % self.ALIGNMENT - self._pending_offset
+            if aligned_size > 0:
+                size = aligned_size
+        if not size:
+            return
+
+        data = memoryview(self._pending)[:size]
+        self._file.seek(self._pending_offset)
+        position = 0
+        while position < size:
+            position += self._file.write(data[position:])
+        self.written_size += size
+        if self.on_written:
+            self.on_written(self._pending_offset, data)
+        data.release()
+        del self._pending[:size]
+        self._pending_offset += size
@@ -1,146 +1,950 @@
 import httpx
 import asyncio
+import hashlib
+import os
+import struct
 import zipfile
-import tempfile
+import zlib
 from pathlib import Path
-from PySide6.QtCore import QObject, Signal, QRunnable, QThreadPool
+from typing import NamedTuple
+from PySide6.QtCore import QObject, Signal, QRunnable
 from loguru import logger
 import time
+from turtlelauncher.utils.partial_download import PartialDownload
+from turtlelauncher.utils.zip_stream import StreamingZipExtractor
+from turtlelauncher.utils.zip_extract import ExtractionCancelled, safe_member_path, diff_extracted
+from turtlelauncher.utils.archive_codecs import detect_codec, CorruptArchiveError
+from turtlelauncher.utils.file_index import FileIndex, StatSignature
+from turtlelauncher.utils.checksum import StreamingHasher, ChecksumMismatchError, parse_checksum_file
+from turtlelauncher.utils.manifest import ClientManifest, diff_install
+from turtlelauncher.utils.rate_limit import TokenBucket
+from turtlelauncher.utils.mirrors import MirrorRegistry
+from turtlelauncher.utils.http_service import get_http_service
+from turtlelauncher.utils.async_loop import get_async_loop
+from turtlelauncher.utils.transfers import TransferJob, JobClass, JobState, get_transfer_scheduler
+from turtlelauncher.utils.progress import ProgressCounter, ProgressChannel, ProgressPhase
+from turtlelauncher.utils.disk_writer import DiskWriter
+from turtlelauncher.utils.staging import StagedInstall
+from turtlelauncher.utils.archive_cache import get_archive_cache
+from turtlelauncher.utils.lan_seed import LanSeedServer, discover_seeds, find_seed_archive
+from turtlelauncher.utils.binary_patch import apply_bsdiff, PatchError
 
 
 class WorkerSignals(QObject):
-    progress_updated = Signal(int, str, str)  # (percent, speed, state)
     download_completed = Signal()
+    download_paused = Signal()
+    verification_started = Signal()
+    verification_completed = Signal(bool)
     extraction_completed = Signal(str)
+    update_completed = Signal(int)  # number of files replaced
     error_occurred = Signal(str)
-    total_size_updated = Signal(str)
+    total_size_updated = Signal(object)  # bytes, may not fit in a 32-bit int
+
+
+class RemoteFileChangedError(Exception):
+    pass
+
+
+class DownloadSegment:
+    """A byte range [start, end) of the download and how far into it we have received."""
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.position = start
+
+    @property
+    def remaining(self):
+        return max(0, self.end - self.position)
+
+    def __repr__(self):
+        return f"DownloadSegment({self.start}-{self.end}, at {self.position})"
+
+
+def split_into_segments(start, end, count):
+    size = end - start
+    step = max(1, -(-size // count))
+    return [DownloadSegment(offset, min(offset + step, end)) for offset in range(start, end, step)]
+
+
+def steal_segment(active, min_size):
+    """Split the tail off the slowest-to-finish active segment so an idle connection can help with it."""
+    if not active:
+        return None
+    largest = max(active, key=lambda segment: segment.remaining)
+    if largest.remaining < min_size * 2:
+        return None
+    midpoint = largest.position + largest.remaining // 2
+    stolen = DownloadSegment(midpoint, largest.end)
+    largest.end = midpoint
+    logger.debug(f"Rebalanced {largest}, new segment {stolen}")
+    return stolen
+
+
+class RemoteZipMember(NamedTuple):
+    filename: str
+    header_offset: int
+    compress_size: int
+    file_size: int
+    compress_type: int
+    crc: int
+    end_offset: int  # where the next local header (or the central directory) starts
+
+    def is_dir(self):
+        return self.filename.endswith('/')
+
+
+class _RangeStream:
+    """Sequential reads over the body of one ranged response."""
+
+    def __init__(self, response, chunk_size):
+        self._chunks = response.aiter_bytes(chunk_size=chunk_size)
+        self._buffer = b''
+
+    async def read(self, size):
+        """Up to size bytes, at least one unless the stream is exhausted."""
+        if not self._buffer:
+            self._buffer = await anext(self._chunks, b'')
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    async def read_exact(self, size):
+        parts = []
+        while size > 0:
+            data = await self.read(size)
+            if not data:
+                raise zipfile.BadZipFile("Unexpected end of ranged response")
+            parts.append(data)
+            size -= len(data)
+        return b''.join(parts)
+
+    async def skip(self, size):
+        while size > 0:
+            data = await self.read(size)
+            if not data:
+                raise zipfile.BadZipFile("Unexpected end of ranged response")
+            size -= len(data)
+
+
+class RemoteZipReader:
+    """Random access to a zip archive over HTTP range requests.
+
+    open() reads the end-of-central-directory record and the central directory from the end of
+    the remote file, which is enough to list members and sizes. iter_members() then fetches only
+    the requested members, merging members that sit close together into a single request.
+    """
+    EOCD_SEARCH_SIZE = 64 * 1024 + 22  # maximum comment length plus the record itself
+    COALESCE_GAP = 256 * 1024  # read through gaps smaller than this rather than start a new request
+    CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+    def __init__(self, client, url):
+        self.client = client
+        self.url = url
+        self.size = 0
+        self.members = {}
+        self.central_directory_offset = 0
+
+    async def fetch_range(self, start, end):
+        response = await self.client.get(self.url, headers={'Range': f"bytes={start}-{end - 1}"})
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise httpx.HTTPStatusError(f"Server ignored range request for {self.url}", request=response.request, response=response)
+        return response.content
+
+    async def open(self):
+        response = await self.client.get(self.url, headers={'Range': f"bytes=-{self.EOCD_SEARCH_SIZE}"})
+        response.raise_for_status()
+        content_range = response.headers.get('Content-Range', '')
+        if response.status_code != 206 or '/' not in content_range:
+            raise httpx.HTTPStatusError(f"Server does not support range requests for {self.url}", request=response.request, response=response)
+        self.size = int(content_range.rsplit('/', 1)[1])
+        tail = response.content
+        tail_offset = self.size - len(tail)
+
+        eocd_position = tail.rfind(zipfile.stringEndArchive)
+        if eocd_position < 0:
+            raise zipfile.BadZipFile("End of central directory not found")
+        eocd = struct.unpack(zipfile.structEndArchive, tail[eocd_position:eocd_position + zipfile.sizeEndCentDir])
+        cd_size = eocd[zipfile._ECD_SIZE]
+        cd_offset = eocd[zipfile._ECD_OFFSET]
+
+        locator_position = eocd_position - zipfile.sizeEndCentDir64Locator
+        if locator_position >= 0 and tail[locator_position:locator_position + 4] == zipfile.stringEndArchive64Locator:
+            _, _, eocd64_offset, _ = struct.unpack(zipfile.structEndArchive64Locator, tail[locator_position:eocd_position])
+            if eocd64_offset >= tail_offset:
+                eocd64 = tail[eocd64_offset - tail_offset:eocd64_offset - tail_offset + zipfile.sizeEndCentDir64]
+            else:
+                eocd64 = await self.fetch_range(eocd64_offset, eocd64_offset + zipfile.sizeEndCentDir64)
+            fields = struct.unpack(zipfile.structEndArchive64, eocd64)
+            cd_size, cd_offset = fields[8], fields[9]
+
+        if cd_offset >= tail_offset:
+            central_directory = tail[cd_offset - tail_offset:cd_offset - tail_offset + cd_size]
+        else:
+            central_directory = await self.fetch_range(cd_offset, cd_offset + cd_size)
+        self.central_directory_offset = cd_offset
+        self.parse_central_directory(central_directory)
+        logger.info(f"Remote zip {self.url}: {len(self.members)} members, "
+                    f"{self.total_compressed_size} bytes compressed, {self.total_uncompressed_size} bytes uncompressed")
+        return self
+
+    def parse_central_directory(self, data):
+        entries = []
+        position = 0
+        while position + zipfile.sizeCentralDir <= len(data):
+            header = struct.unpack(zipfile.structCentralDir, data[position:position + zipfile.sizeCentralDir])
+            if header[zipfile._CD_SIGNATURE] != zipfile.stringCentralDir:
+                raise zipfile.BadZipFile("Bad central directory signature")
+            name_length = header[zipfile._CD_FILENAME_LENGTH]
+            extra_length = header[zipfile._CD_EXTRA_FIELD_LENGTH]
+            comment_length = header[zipfile._CD_COMMENT_LENGTH]
+            name_start = position + zipfile.sizeCentralDir
+            raw_name = data[name_start:name_start + name_length]
+            extra = data[name_start + name_length:name_start + name_length + extra_length]
+            flags = header[zipfile._CD_FLAG_BITS]
+            filename = raw_name.decode('utf-8' if flags & 0x800 else 'cp437')
+
+            file_size = header[zipfile._CD_UNCOMPRESSED_SIZE]
+            compress_size = header[zipfile._CD_COMPRESSED_SIZE]
+            header_offset = header[zipfile._CD_LOCAL_HEADER_OFFSET]
+            if 0xFFFFFFFF in (file_size, compress_size, header_offset):
+                file_size, compress_size, header_offset = self.parse_zip64_extra(extra, file_size, compress_size, header_offset)
+
+            entries.append((filename, header_offset, compress_size, file_size,
+                            header[zipfile._CD_COMPRESS_TYPE], header[zipfile._CD_CRC]))
+            position = name_start + name_length + extra_length + comment_length
+
+        # Members are laid out back to back, so each one ends where the next one starts
+        entries.sort(key=lambda entry: entry[1])
+        for index, entry in enumerate(entries):
+            end_offset = entries[index + 1][1] if index + 1 < len(entries) else self.central_directory_offset
+            self.members[entry[0]] = RemoteZipMember(*entry, end_offset)
+
+    @staticmethod
+    def parse_zip64_extra(extra, file_size, compress_size, header_offset):
+        position = 0
+        while position + 4 <= len(extra):
+            header_id, size = struct.unpack_from('<2H', extra, position)
+            if header_id == 0x0001:
+                values = list(struct.unpack_from(f'<{size // 8}Q', extra, position + 4))
+                if file_size == 0xFFFFFFFF and values:
+                    file_size = values.pop(0)
+                if compress_size == 0xFFFFFFFF and values:
+                    compress_size = values.pop(0)
+                if header_offset == 0xFFFFFFFF and values:
+                    header_offset = values.pop(0)
+                break
+            position += 4 + size
+        return file_size, compress_size, header_offset
+
+    @property
+    def total_uncompressed_size(self):
+        return sum(member.file_size for member in self.members.values())
+
+    @property
+    def total_compressed_size(self):
+        return sum(member.compress_size for member in self.members.values())
+
+    def coalesce(self, members):
+        """Group members (sorted by offset) into requests, merging neighbours closer than COALESCE_GAP."""
+        groups = []
+        for member in sorted(members, key=lambda member: member.header_offset):
+            if groups and member.header_offset - groups[-1][-1].end_offset <= self.COALESCE_GAP:
+                groups[-1].append(member)
+            else:
+                groups.append([member])
+        return groups
+
+    async def iter_members(self, members):
+        """Yield (member, chunks) for each requested member, where chunks yields its inflated data.
+
+        The chunks of one member must be consumed before asking for the next member.
+        """
+        groups = self.coalesce(members)
+        logger.info(f"Fetching {len(members)} remote members in {len(groups)} requests")
+        for group in groups:
+            start, end = group[0].header_offset, group[-1].end_offset
+            async with self.client.stream('GET', self.url, headers={'Range': f"bytes={start}-{end - 1}"}) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise httpx.HTTPStatusError(f"Server ignored range request for {self.url}", request=response.request, response=response)
+                stream = _RangeStream(response, self.CHUNK_SIZE)
+                position = start
+                for member in group:
+                    await stream.skip(member.header_offset - position)
+                    header = await stream.read_exact(zipfile.sizeFileHeader)
+                    fields = struct.unpack(zipfile.structFileHeader, header)
+                    if fields[zipfile._FH_SIGNATURE] != zipfile.stringFileHeader:
+                        raise zipfile.BadZipFile(f"Bad local header for {member.filename}")
+                    await stream.skip(fields[zipfile._FH_FILENAME_LENGTH] + fields[zipfile._FH_EXTRA_FIELD_LENGTH])
+                    position = (member.header_offset + zipfile.sizeFileHeader + fields[zipfile._FH_FILENAME_LENGTH]
+                                + fields[zipfile._FH_EXTRA_FIELD_LENGTH] + member.compress_size)
+
+                    chunks = self.inflate(stream, member)
+                    yield member, chunks
+                    # Whatever the caller did not read still has to come off the stream
+                    async for _ in chunks:
+                        pass
+
+    async def inflate(self, stream, member):
+        if member.compress_type == zipfile.ZIP_DEFLATED:
+            decompressor = zlib.decompressobj(-15)
+        elif member.compress_type != zipfile.ZIP_STORED:
+            raise zipfile.BadZipFile(f"{member.filename} uses unsupported compression method {member.compress_type}")
+        else:
+            decompressor = None
+
+        crc = 0
+        remaining = member.compress_size
+        while remaining > 0:
+            data = await stream.read(min(self.CHUNK_SIZE, remaining))
+            if not data:
+                raise zipfile.BadZipFile(f"Unexpected end of data for {member.filename}")
+            remaining -= len(data)
+            if decompressor:
+                data = decompressor.decompress(data)
+            if data:
+                crc = zlib.crc32(data, crc)
+                yield data
+        if decompressor:
+            data = decompressor.flush()
+            if data:
+                crc = zlib.crc32(data, crc)
+                yield data
+        if crc != member.crc:
+            raise zipfile.BadZipFile(f"CRC mismatch for remote member {member.filename}")
 
 
 class DownloadExtractWorker(QRunnable):
     CHUNK_SIZE = 1024 * 1024  # 1 MB
-    SPEED_UPDATE_INTERVAL = 0.5  # seconds
     LOG_INTERVAL = 10  # seconds
+    SEGMENT_COUNT = 8  # parallel connections for ranged downloads
+    MIN_SEGMENT_SIZE = 8 * 1024 * 1024  # 8 MB, segments are never split below this
+    SEGMENT_SIZE = 16 * 1024 * 1024  # 16 MB, handed out in file order so the contiguous prefix keeps up
+    SEGMENT_RETRIES = 3
+    CHECKSUM_SUFFIX = '.sha256'  # published next to the archive, sha256sum format
+    THROUGHPUT_SAMPLE_INTERVAL = 2  # seconds
+    COLLAPSE_RATIO = 0.2  # throughput below this fraction of the best seen so far counts as collapsed
+    COLLAPSE_WINDOW = 10  # seconds of collapsed throughput before moving to another mirror
 
-    def __init__(self, url, extract_path):
+    def __init__(self, url, extract_path, pipelined=False, expected_digest=None, mirrors=None):
         super().__init__()
         self.url = url
+        self.mirrors = list(dict.fromkeys([url, *(mirrors or [])]))
+        self.mirror_registry = None
+        self.active_url = url
         self.extract_path = Path(extract_path)
+        self.pipelined = pipelined
+        self.expected_digest = expected_digest
         self.signals = WorkerSignals()
-        self.is_cancelled = False
+        self.progress = ProgressCounter()  # polled by DownloadExtractUtility's ProgressChannel
+        self.last_log_time = 0
+        self.is_cancelled = False  # for the extraction threads, which cannot be cancelled like a task
+        self.task = None
+        self.stream_extractor = None
+        self.hasher = None
+        self.rate_limiter = None  # shared TokenBucket, set by DownloadExtractUtility
+        self.archive_cache = None  # shared ArchiveCache, set by DownloadExtractUtility when enabled
+        self.cached_digest = None  # sha256 of the cached archive this install came from
+        self.lan_discovery = False  # look for launchers seeding on the LAN, set by DownloadExtractUtility
+        self.lan_seed_url = None
+        self.remote_validators = (None, None)  # ETag and Last-Modified of the downloaded archive
+        self.writer_blocked_time = 0.0  # seconds the network side waited on the disk writer
         logger.info(f"DownloadExtractWorker initialized for URL: {url}")
 
     def run(self):
         logger.info("Starting DownloadExtractWorker run")
-        asyncio.run(self.async_run())
+        if self.is_cancelled:
+            logger.info("Cancelled before it started")
+            self.signals.download_paused.emit()
+            return
+        # The pool thread only waits; the work itself is a task on the shared event loop
+        self.task = get_async_loop().submit(self.async_run(), name=f"download {self.url}")
+        if self.is_cancelled:
+            # cancel() ran before the task was assigned, so it could not cancel it
+            self.task.cancel()
+        self.task.wait()
 
     async def async_run(self):
+        partial = PartialDownload(self.url)
+        # Nothing lands in extract_path itself until the whole install is extracted and synced
+        staging = StagedInstall(self.extract_path)
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as temp_file:
-                temp_filename = Path(temp_file.name)
-            logger.info(f"Created temporary file: {temp_filename}")
+            cached_path = await self.find_cached_archive()
+            if cached_path:
+                # A reinstall of an archive we already have is a local extraction
+                self.signals.download_completed.emit()
+                extracted_folder = await self.install_archive(cached_path, staging)
+            # Over an existing install, only the members that differ are extracted, which needs the
+            # whole archive and so rules out pipelined extraction; so does any format but zip
+            elif self.pipelined and detect_codec(url=self.url).name == 'zip' and not self.has_existing_install():
+                extracted_folder = await self.download_and_extract_pipelined(partial, staging.prepare())
+                await self.promote_install(staging)
+                await self.cache_download(partial)
+            else:
+                await self.download_file(self.url, partial)
+                self.signals.download_completed.emit()
+                logger.info("Download completed")
 
-            await self.download_file(self.url, temp_filename)
-            self.signals.download_completed.emit()
-            logger.info("Download completed")
-
-            extracted_folder = await self.extract_zip(temp_filename, self.extract_path)
+                await self.verify_download(partial)
+                extracted_folder = await self.install_archive(partial.data_path, staging)
+                await self.cache_download(partial)
+            partial.discard()
             self.signals.extraction_completed.emit(extracted_folder)
             logger.info(f"Extraction completed. Extracted folder: {extracted_folder}")
 
         except asyncio.CancelledError:
-            logger.warning("Download cancelled")
-            self.signals.error_occurred.emit("Download cancelled")
+            # Keep what we have so the next attempt picks up where this one stopped
+            if partial.total_size:
+                partial.save()
+            logger.warning(f"Download paused at {partial.completed_size}/{partial.total_size} bytes")
+            self.signals.download_paused.emit()
+        except ChecksumMismatchError as e:
+            # verification_completed(False) has already told the UI what went wrong
+            logger.error(f"Discarding download: {e}")
+            partial.discard()
+            staging.discard()
+        except (zipfile.BadZipFile, CorruptArchiveError) as e:
+            logger.exception(f"Downloaded archive is corrupt: {e}")
+            partial.discard()
+            staging.discard()
+            if self.cached_digest:
+                self.archive_cache.remove(self.cached_digest)
+            self.signals.error_occurred.emit(str(e))
         except Exception as e:
             logger.exception(f"Error in download and extract process: {e}")
+            if partial.total_size:
+                partial.save()
             self.signals.error_occurred.emit(str(e))
+
+    async def install_archive(self, archive_path, staging):
+        """Extract a complete archive into staging and swap it in, incrementally over an existing install."""
+        staging.prepare()
+        extracted_folder = await self.extract_archive(archive_path, staging, self.live_install_folders(archive_path))
+        await self.promote_install(staging)
+        return extracted_folder
+
+    async def find_cached_archive(self):
+        """The cached copy of the archive at url, if the cache has one the server still serves."""
+        if not self.archive_cache or not (self.expected_digest or self.archive_cache.has_source(self.url)):
+            return None
+        digest = self.expected_digest
+        if not digest:
+            client = get_http_service().async_client()
+            try:
+                total_size, _, etag, last_modified = await self.probe_range_support(client, self.url)
+                digest = await self.resolve_expected_digest(client, self.url)
+                digest = digest or self.archive_cache.find_source(self.url, total_size, etag, last_modified)
+            except httpx.HTTPError as e:
+                logger.warning(f"Could not check {self.url} ({e!r}), using the cached archive as is")
+                digest = self.archive_cache.find_source(self.url)
+        path = await asyncio.to_thread(self.archive_cache.get, digest)
+        if path:
+            self.cached_digest = digest
+            logger.info(f"Installing from cached archive {path}")
+        return path
+
+    async def cache_download(self, partial):
+        """Move the finished download into the archive cache, where the next reinstall will find it."""
+        if not self.archive_cache or not self.hasher or not partial.data_path.exists():
+            return
+        await asyncio.to_thread(self.hasher.catch_up, partial.data_path, partial.data_path.stat().st_size)
+        etag, last_modified = self.remote_validators
+        try:
+            await asyncio.to_thread(
+                self.archive_cache.store, partial.data_path, self.hasher.hexdigest(), self.url, etag, last_modified, True
+            )
+        except OSError as e:
+            # The install itself is done; losing the cached copy only costs a download later
+            logger.warning(f"Could not cache {partial.data_path.name}: {e}")
+
+    async def download_and_extract_pipelined(self, partial, extract_path):
+        """Download the archive while a background thread extracts members as soon as they are complete."""
+        self.stream_extractor = StreamingZipExtractor(partial.data_path, extract_path)
+        extract_task = asyncio.create_task(asyncio.to_thread(self.stream_extractor.run))
+        try:
+            await self.download_file(self.url, partial)
+            self.stream_extractor.advance(partial.data_path.stat().st_size)
+            self.stream_extractor.finish_input()
+            self.signals.download_completed.emit()
+            logger.info("Download completed, waiting for pipelined extraction to catch up")
+
+            await extract_task
+            await self.verify_download(partial)
+            return await asyncio.to_thread(
+                self.stream_extractor.validate, self.extraction_progress_callback(), lambda: self.is_cancelled
+            )
+        except ExtractionCancelled:
+            self.stream_extractor.cancel()
+            await asyncio.gather(extract_task, return_exceptions=True)
+            raise asyncio.CancelledError()
+        except BaseException:
+            self.stream_extractor.cancel()
+            await asyncio.gather(extract_task, return_exceptions=True)
+            raise
+        finally:
+            self.stream_extractor = None
+
+    async def resolve_expected_digest(self, client, url):
+        if self.expected_digest:
+            return self.expected_digest
+        checksum_url = url.split('?', 1)[0] + self.CHECKSUM_SUFFIX
+        try:
+            response = await client.get(checksum_url)
+        except httpx.RequestError as e:
+            logger.warning(f"Could not fetch published checksum {checksum_url}: {e!r}")
+            return None
+        if response.status_code != 200:
+            logger.info(f"No published checksum at {checksum_url} ({response.status_code}), download will not be verified")
+            return None
+        digest = parse_checksum_file(response.text, Path(url.split('?', 1)[0]).name)
+        logger.info(f"Using published checksum from {checksum_url}: {digest}")
+        return digest
+
+    def start_hashing(self, path):
+        """(Re)start the inline hash, called whenever the download starts over from byte 0.
+
+        The hash verifies the download against a published checksum and keys it in the archive cache.
+        The pipelined extractor feeds it from its own in-order reads; otherwise it follows the
+        contiguous prefix of path, so segments that arrived out of order are hashed during the download.
+        """
+        if self.hasher:
+            self.hasher.stop_following()
+        if not self.expected_digest and not self.archive_cache:
+            return
+        self.hasher = StreamingHasher()
+        if self.stream_extractor:
+            self.stream_extractor.hasher = self.hasher
+        else:
+            self.hasher.follow(path)
+
+    async def verify_download(self, partial):
+        if not self.expected_digest or not self.hasher:
+            return
+        self.signals.verification_started.emit()
+        size = partial.data_path.stat().st_size
+        read_size = await asyncio.to_thread(self.hasher.catch_up, partial.data_path, size)
+        if read_size:
+            logger.info(f"Hashed {self.format_size(read_size)} from disk that arrived ahead of the in-order stream")
+        is_valid = self.hasher.matches(self.expected_digest)
+        self.signals.verification_completed.emit(is_valid)
+        if not is_valid:
+            raise ChecksumMismatchError(f"{self.hasher.algorithm} of {partial.data_path.name} does not match {self.expected_digest}")
+
+    def notify_data_written(self, contiguous_size):
+        if self.stream_extractor:
+            self.stream_extractor.advance(contiguous_size)
+        elif self.hasher:
+            self.hasher.advance(contiguous_size)
+
+    def reset_progress(self, total_size=0, done=0):
+        self.progress.start(ProgressPhase.DOWNLOADING, total_size, done)
+        self.last_log_time = time.time()
+
+    async def download_file(self, url, partial):
+        logger.info(f"Starting download: {url} to {partial.data_path}")
+        self.reset_progress()
+        self.writer_blocked_time = 0.0
+        partial.load()
+        # The partial download stays keyed on the canonical URL, whichever mirror serves it
+        url = self.active_url = await self.select_mirror(url)
+
+        try:
+            # Separate HTTP/1.1 connections are used for segments; HTTP/2 would multiplex
+            # every range over a single TCP connection and gain nothing.
+            client = get_http_service().async_client(http2=False)
+            total_size, accepts_ranges, etag, last_modified = await self.probe_range_support(client, url)
+            # The cache matches validators against the canonical URL, a mirror's mean nothing there;
+            # for a LAN seed, find_lan_seed already took them from the canonical URL itself
+            if url != self.lan_seed_url:
+                self.remote_validators = (etag, last_modified) if url == self.url else (None, None)
+            # A seed is only used with a digest from the CDN, never one it vouches for itself
+            self.expected_digest = await self.resolve_expected_digest(client, self.url if url == self.lan_seed_url else url)
+            self.start_hashing(partial.data_path)
+            if accepts_ranges:
+                if partial.matches(total_size, etag, last_modified):
+                    logger.info(f"Resuming download at {self.format_size(partial.completed_size)} of {self.format_size(total_size)}")
+                else:
+                    partial.reset(total_size, etag, last_modified)
+
+                try:
+                    await self.download_ranges(client, partial)
+                except RemoteFileChangedError:
+                    logger.warning("Remote file changed since the download started, restarting it")
+                    total_size, _, etag, last_modified = await self.probe_range_support(client, self.active_url)
+                    if self.active_url != self.lan_seed_url:
+                        self.remote_validators = (etag, last_modified) if self.active_url == self.url else (None, None)
+                    partial.reset(total_size, etag, last_modified)
+                    self.start_hashing(partial.data_path)
+                    await self.download_ranges(client, partial)
+            else:
+                logger.info("Server does not support range requests, using a single stream")
+                partial.discard()
+                await self.download_single(get_http_service().async_client(), url, partial.data_path)
+
+            if self.hasher:
+                # The last segments land together at the end; let the follower hash them rather than catch_up()
+                await asyncio.to_thread(self.hasher.stop_following, True)
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP error occurred: {e}")
+            raise
+        except httpx.RequestError as e:
+            logger.error(f"An error occurred while requesting {e.request.url!r}.")
+            raise
         finally:
-            if temp_filename.exists():
-                temp_filename.unlink()
-                logger.info(f"Temporary file removed: {temp_filename}")
-
-    async def download_file(self, url, filename):
-        logger.info(f"Starting download: {url} to {filename}")
-        total_size = 0
-        downloaded_size = 0
-        start_time = time.time()
-        last_update_time = start_time
-        last_log_time = start_time
-
-        async with httpx.AsyncClient(http2=True, timeout=None) as client:
+            if self.hasher:
+                await asyncio.to_thread(self.hasher.stop_following)
+
+        logger.info(f"Download completed successfully, network side waited {self.writer_blocked_time:.2f}s on the disk")
+        logger.debug(f"HTTP metrics: {get_http_service().stats()}")
+
+    async def select_mirror(self, url):
+        seed_url = await self.find_lan_seed() if self.lan_discovery else None
+        if seed_url:
+            # The LAN beats any mirror; the others stay behind it in case the seed goes away
+            self.mirrors = [seed_url, *(mirror for mirror in self.mirrors if mirror != seed_url)]
+            self.mirror_registry = MirrorRegistry(self.mirrors)
+            logger.info(f"Downloading from LAN seed {seed_url}")
+            return seed_url
+        if len(self.mirrors) < 2:
+            return url
+        self.mirror_registry = MirrorRegistry(self.mirrors)
+        ranked = await self.mirror_registry.probe_all()
+        logger.info(f"Using mirror {ranked[0]}")
+        return ranked[0]
+
+    async def find_lan_seed(self):
+        """A launcher on the local network seeding the archive that url serves now, if there is one.
+
+        Only used when the archive's digest is known from the CDN (or was passed in), since the
+        download is verified against it; a seed's own word about what it has is never trusted.
+        """
+        client = get_http_service().async_client()
+        try:
+            _, _, etag, last_modified = await self.probe_range_support(client, self.url)
+            self.expected_digest = await self.resolve_expected_digest(client, self.url)
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not reach {self.url} ({e!r}), not looking for LAN seeds")
+            return None
+        if not self.expected_digest:
+            logger.info(f"No published checksum for {self.url}, not looking for LAN seeds")
+            return None
+        seeds = await discover_seeds()
+        if not seeds:
+            return None
+        self.remote_validators = (etag, last_modified)
+        self.lan_seed_url = await find_seed_archive(client, seeds, self.expected_digest)
+        return self.lan_seed_url
+
+    async def watch_throughput(self, client, partial):
+        """Move the download to another mirror when its throughput collapses for COLLAPSE_WINDOW seconds."""
+        best_rate = 0
+        collapsed_since = None
+        last_size = self.progress.done
+        while True:
+            await asyncio.sleep(self.THROUGHPUT_SAMPLE_INTERVAL)
+            rate = (self.progress.done - last_size) / self.THROUGHPUT_SAMPLE_INTERVAL
+            last_size = self.progress.done
+            if self.rate_limiter and self.rate_limiter.limited:
+                # A slow download is expected, not a sign of a struggling mirror
+                collapsed_since = None
+                continue
+
+            best_rate = max(best_rate, rate)
+            if rate >= best_rate * self.COLLAPSE_RATIO:
+                collapsed_since = None
+                continue
+            collapsed_since = collapsed_since or time.time()
+            if time.time() - collapsed_since >= self.COLLAPSE_WINDOW:
+                logger.warning(f"Throughput from {self.active_url} collapsed to {self.format_speed(rate)} "
+                               f"(best {self.format_speed(best_rate)})")
+                if await self.switch_mirror(client, partial):
+                    best_rate = 0
+                collapsed_since = None
+
+    async def switch_mirror(self, client, partial):
+        """Point the segment workers at the next usable mirror; they reconnect on their next chunk."""
+        failed_url = self.active_url
+        self.mirror_registry.mark_failed(failed_url, "throughput collapsed")
+        for url in self.mirror_registry.ranked():
+            if url == failed_url:
+                continue
             try:
-                async with client.stream('GET', url) as response:
+                total_size, accepts_ranges, etag, last_modified = await self.probe_range_support(client, url)
+            except httpx.HTTPError as e:
+                logger.warning(f"Mirror {url} is not usable: {e!r}")
+                continue
+            if not accepts_ranges or total_size != partial.total_size:
+                logger.warning(f"Mirror {url} does not serve the same file, skipping it")
+                continue
+            if not partial.matches(total_size, etag, last_modified):
+                if not self.expected_digest:
+                    # Without a checksum nothing would catch a mirror serving different bytes
+                    logger.warning(f"Mirror {url} has different validators and there is no checksum, skipping it")
+                    continue
+                partial.etag = etag
+                partial.last_modified = last_modified
+            logger.info(f"Switching download from {failed_url} to {url}")
+            self.active_url = url
+            return True
+        logger.warning("No other mirror available, staying on the current one")
+        return False
+
+    async def probe_range_support(self, client, url):
+        """Ask for the first byte of the file to learn its size, validators and whether ranges are honoured."""
+        async with client.stream('GET', url, headers={'Range': 'bytes=0-0'}) as response:
+            response.raise_for_status()
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            content_range = response.headers.get('Content-Range', '')
+            if response.status_code == 206 and '/' in content_range:
+                total = content_range.rsplit('/', 1)[1]
+                if total.isdigit():
+                    logger.info(f"Server supports range requests. Total file size: {self.format_size(int(total))}")
+                    return int(total), True, etag, last_modified
+            return int(response.headers.get('Content-Length', 0)), False, etag, last_modified
+
+    async def download_single(self, client, url, filename):
+        async with client.stream('GET', url) as response:
+            response.raise_for_status()
+            total_size = int(response.headers.get('Content-Length', 0))
+            logger.info(f"Total file size: {self.format_size(total_size)}")
+            logger.info(f"Using HTTP version: {response.http_version}")
+            self.signals.total_size_updated.emit(total_size)
+            self.progress.set_total(total_size)
+
+            def on_written(offset, data):
+                if self.hasher:
+                    self.hasher.update_at(offset, data)
+                self.notify_data_written(offset + len(data))
+
+            writer = DiskWriter(filename, total_size, on_written)
+            try:
+                async for chunk in response.aiter_bytes(chunk_size=self.CHUNK_SIZE):
+                    await self.throttle(len(chunk))
+                    await writer.write(self.progress.done, chunk)
+                    self.progress.add(len(chunk))
+                    self.log_download_progress()
+            finally:
+                await self.close_writer(writer)
+
+    async def download_ranges(self, client, partial):
+        """Fetch every byte range the partial download is still missing, over several connections."""
+        total_size = partial.total_size
+        self.signals.total_size_updated.emit(total_size)
+        self.reset_progress(total_size, partial.completed_size)
+
+        missing = partial.missing_ranges()
+        remaining = sum(end - start for start, end in missing)
+        if not remaining:
+            logger.info("Partial download is already complete")
+            return
+
+        connections = max(1, min(self.SEGMENT_COUNT, remaining // self.MIN_SEGMENT_SIZE))
+        # Many segments in file order rather than one per connection: the contiguous prefix, which
+        # the inline hash and the pipelined extractor follow, then trails the download by only
+        # about connections * SEGMENT_SIZE instead of waiting for the first segment to finish
+        pending = []
+        for start, end in missing:
+            pending.extend(split_into_segments(start, end, -(-(end - start) // self.SEGMENT_SIZE)))
+        active = []
+        logger.info(f"Downloading {self.format_size(remaining)} in {len(pending)} segments over {connections} connections")
+
+        def on_written(offset, data):
+            # Runs on the writer thread, which is the only one touching the journal until close()
+            if self.hasher:
+                self.hasher.update_at(offset, data)
+            partial.add_range(offset, offset + len(data))
+            partial.save(force=False)
+            self.notify_data_written(partial.contiguous_size)
+
+        writer = DiskWriter(partial.data_path, total_size, on_written)
+
+        async def segment_worker():
+            while True:
+                if pending:
+                    segment = pending.pop(0)
+                else:
+                    segment = steal_segment(active, self.MIN_SEGMENT_SIZE)
+                    if segment is None:
+                        return
+                active.append(segment)
+                try:
+                    await self.fetch_segment(client, writer, segment, partial)
+                finally:
+                    active.remove(segment)
+
+        tasks = [asyncio.create_task(segment_worker()) for _ in range(connections)]
+        watcher = asyncio.create_task(self.watch_throughput(client, partial)) if self.mirror_registry else None
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            if watcher:
+                watcher.cancel()
+                await asyncio.gather(watcher, return_exceptions=True)
+            await self.close_writer(writer)
+            partial.save()
+
+    async def fetch_segment(self, client, writer, segment, partial):
+        attempts = 0
+        while segment.remaining > 0:
+            url = self.active_url
+            headers = {'Range': f"bytes={segment.position}-{segment.end - 1}"}
+            if partial.if_range:
+                headers['If-Range'] = partial.if_range
+            try:
+                async with client.stream('GET', url, headers=headers) as response:
                     response.raise_for_status()
-                    total_size = int(response.headers.get('Content-Length', 0))
-                    logger.info(f"Total file size: {self.format_size(total_size)}")
-                    logger.info(f"Using HTTP version: {response.http_version}")
-                    self.signals.total_size_updated.emit(str(total_size))
-
-                    with filename.open('wb') as f:
-                        async for chunk in response.aiter_bytes(chunk_size=self.CHUNK_SIZE):
-                            if self.is_cancelled:
-                                logger.warning("Download cancelled")
-                                raise asyncio.CancelledError()
-
-                            f.write(chunk)
-                            downloaded_size += len(chunk)
-
-                            current_time = time.time()
-                            if current_time - last_update_time >= self.SPEED_UPDATE_INTERVAL:
-                                elapsed_time = current_time - start_time
-                                speed = downloaded_size / elapsed_time
-                                percent = int((downloaded_size / total_size) * 100) if total_size > 0 else 0
-                                speed_str = self.format_speed(speed)
-                                
-                                self.signals.progress_updated.emit(percent, speed_str, "downloading")
-                                last_update_time = current_time
-
-                            if current_time - last_log_time >= self.LOG_INTERVAL:
-                                progress = downloaded_size / total_size if total_size > 0 else 0
-                                logger.info(f"Download progress: {progress:.2%}")
-                                last_log_time = current_time
-
-            except httpx.HTTPStatusError as e:
-                logger.error(f"HTTP error occurred: {e}")
-                raise
+                    if response.status_code != 206:
+                        # If-Range did not match: the server is sending the whole new file instead
+                        raise RemoteFileChangedError(f"Expected partial content for {headers['Range']}, got {response.status_code}")
+
+                    async for chunk in response.aiter_bytes(chunk_size=self.CHUNK_SIZE):
+                        # The end may have moved while we were reading if another worker took over our tail
+                        chunk = chunk[:segment.remaining]
+                        if chunk:
+                            await self.throttle(len(chunk))
+                            await writer.write(segment.position, chunk)
+                            segment.position += len(chunk)
+                            self.progress.add(len(chunk))
+                            self.log_download_progress()
+
+                        if segment.remaining <= 0 or url != self.active_url:
+                            break
             except httpx.RequestError as e:
-                logger.error(f"An error occurred while requesting {e.request.url!r}.")
-                raise
+                attempts += 1
+                if attempts > self.SEGMENT_RETRIES:
+                    raise
+                logger.warning(f"Segment {segment} failed ({e!r}), retrying ({attempts}/{self.SEGMENT_RETRIES})")
 
-        logger.info("Download completed successfully")
+    async def close_writer(self, writer):
+        await writer.close()
+        self.writer_blocked_time += writer.blocked_time
 
-    def update_progress(self, downloaded_size, total_size, elapsed_time):
-        speed = downloaded_size / elapsed_time
-        percent = int((downloaded_size / total_size) * 100) if total_size > 0 else 0
-        speed_str = self.format_speed(speed)
-        logger.debug(f"Progress: {percent}%, Speed: {speed_str}")
-        self.signals.progress_updated.emit(percent, speed_str)
+    async def run_in_thread(self, function, *args):
+        """asyncio.to_thread, except that when the task is cancelled it waits for the thread to stop.
 
-    async def extract_zip(self, zip_path, extract_path):
-        logger.info(f"Starting extraction: {zip_path} to {extract_path}")
-        total_size = sum(file.file_size for file in zipfile.ZipFile(zip_path).infolist())
-        extracted_size = 0
-        extracted_folder = None
+        Threads that poll is_cancelled return early; waiting for them keeps the coroutine from
+        unwinding (and closing the FileIndex or deleting files) while they are still using them.
+        """
+        future = asyncio.ensure_future(asyncio.to_thread(function, *args))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            self.is_cancelled = True
+            await asyncio.gather(future, return_exceptions=True)
+            raise
+
+    async def throttle(self, size):
+        if self.rate_limiter:
+            await self.rate_limiter.consume(size)
 
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            for file in zip_ref.infolist():
-                if self.is_cancelled:
-                    logger.warning("Extraction cancelled")
-                    raise asyncio.CancelledError()
+    def log_download_progress(self):
+        """The UI polls self.progress on its own; this only writes the occasional log line."""
+        current_time = time.time()
+        if current_time - self.last_log_time >= self.LOG_INTERVAL:
+            snapshot = self.progress.snapshot()
+            logger.info(f"Download progress: {snapshot.percent}%, {self.format_speed(snapshot.rate)}")
+            self.last_log_time = current_time
 
-                if not extracted_folder and not file.filename.startswith('__MACOSX'):
-                    extracted_folder = file.filename.split('/')[0]
+    def live_install_folders(self, archive_path=None):
+        """The folders of extract_path the archive replaces, or every game install there if it is not downloaded yet."""
+        if not self.extract_path.is_dir():
+            return []
+        codec = detect_codec(archive_path, self.url) if archive_path else None
+        # Formats without an index would have to be decompressed just to list them
+        if codec and codec.indexed:
+            top_level = {info.filename.split('/')[0] for info in codec.members(archive_path) if '/' in info.filename}
+            return sorted(name for name in top_level if (self.extract_path / name).is_dir())
+        return sorted(entry.name for entry in self.extract_path.iterdir()
+                      if entry.is_dir() and not entry.name.startswith('.') and (entry / "Data").is_dir())
 
-                zip_ref.extract(file, extract_path)
-                extracted_size += file.file_size
-                percent = int((extracted_size / total_size) * 100)
-                self.signals.progress_updated.emit(percent, "", "extracting")  # Empty string for speed during extraction
+    def has_existing_install(self, archive_path=None):
+        """Whether extract_path already holds the folders of the archive, or any game install if it is not downloaded yet."""
+        return bool(self.live_install_folders(archive_path))
 
-                if extracted_size % (10 * self.CHUNK_SIZE) == 0:
-                    logger.info(f"Extraction progress: {percent}%")
+    async def extract_archive(self, archive_path, staging, live_folders=()):
+        """Extract the archive into the prepared staging folder.
 
+        With live_folders, the live folders the archive replaces, those are hard linked into staging
+        first and only the members that differ from them are extracted, each as a new file so no link
+        is written through. Only indexed formats can be diffed; the others are extracted whole.
+        """
+        extract_path = staging.staging_path
+        incremental = bool(live_folders)
+        codec = detect_codec(archive_path, self.url)
+        logger.info(f"Starting {'incremental ' if incremental else ''}{codec.name} extraction: {archive_path} to {extract_path}")
+        members = await asyncio.to_thread(codec.members, archive_path) if codec.indexed else None
+        extracted_folder = self.top_level_folder(members) if members else None
+
+        file_index = FileIndex() if incremental and codec.indexed else None
+        try:
+            if file_index:
+                members = await self.run_in_thread(
+                    diff_extracted, members, self.extract_path, file_index, self.scan_progress_callback(), lambda: self.is_cancelled
+                )
+            if incremental:
+                await self.run_in_thread(staging.link_live, live_folders, lambda: self.is_cancelled)
+            members = await self.run_in_thread(
+                codec.extract, archive_path, extract_path, members,
+                self.extraction_progress_callback(), lambda: self.is_cancelled, incremental
+            )
+            if file_index:
+                for info in members:
+                    target = safe_member_path(extract_path, info.filename)
+                    if target is not None and not info.is_dir():
+                        # Recorded under the live path: promote() renames, keeping the stat signature
+                        file_index.record(safe_member_path(self.extract_path, info.filename), 'crc32',
+                                          f"{info.CRC:08x}", StatSignature.of(target), commit=False)
+                file_index.commit()
+        except ExtractionCancelled:
+            logger.warning("Extraction cancelled")
+            raise asyncio.CancelledError()
+        finally:
+            if file_index:
+                file_index.close()
+
+        extracted_folder = extracted_folder or self.top_level_folder(members)
         logger.info(f"Extraction completed. Extracted folder: {extracted_folder}")
         return extracted_folder
 
+    @staticmethod
+    def top_level_folder(members):
+        return next((info.filename.split('/')[0] for info in members if not info.filename.startswith('__MACOSX')), None)
+
+    async def promote_install(self, staging):
+        """Flush the staged install to disk and swap it in for the live one."""
+        try:
+            await asyncio.to_thread(staging.sync, lambda: self.is_cancelled)
+        except ExtractionCancelled:
+            raise asyncio.CancelledError()
+        await asyncio.to_thread(staging.promote)
+
+    def scan_progress_callback(self):
+        self.progress.start(ProgressPhase.VERIFYING)
+        return self.progress.update
+
+    def extraction_progress_callback(self):
+        """Build the (done, total) callback that feeds extraction progress into the progress counter."""
+        last_log_time = time.time()
+
+        def on_progress(extracted_size, total_size):
+            nonlocal last_log_time
+            if self.progress.phase != ProgressPhase.EXTRACTING:
+                self.progress.start(ProgressPhase.EXTRACTING, total_size)
+            self.progress.update(extracted_size, total_size)
+            current_time = time.time()
+            if current_time - last_log_time >= self.LOG_INTERVAL:
+                logger.info(f"Extraction progress: {self.progress.snapshot().percent}%")
+                last_log_time = current_time
+
+        return on_progress
+
     @staticmethod
     def format_speed(speed):
         for unit in ['B', 'KB', 'MB', 'GB']:
@@ -159,20 +963,272 @@ class DownloadExtractWorker(QRunnable):
     def cancel(self):
         logger.info("Cancellation requested")
         self.is_cancelled = True
+        if self.task:
+            self.task.cancel()
+
+
+class DeltaUpdateWorker(DownloadExtractWorker):
+    """Brings an existing install up to date with a client manifest, fetching only new or changed files."""
+    PARALLEL_FILES = 4
+
+    def __init__(self, manifest_url, install_dir):
+        super().__init__(manifest_url, install_dir)
+        self.manifest_url = manifest_url
+        self.file_index = None
+        self.lan_seeds = []
+        self.cache_files = False  # also keep fetched files in the archive cache, set by DownloadExtractUtility
+        logger.info(f"DeltaUpdateWorker initialized for manifest: {manifest_url}")
+
+    async def async_run(self):
+        self.file_index = FileIndex()
+        try:
+            client = get_http_service().async_client()
+            manifest = await self.fetch_manifest(client)
+            self.lan_seeds = await discover_seeds() if self.lan_discovery else []
+            changed = await self.run_in_thread(
+                diff_install, manifest, self.extract_path, self.scan_progress_callback(), lambda: self.is_cancelled,
+                None, self.file_index
+            )
+            if self.is_cancelled:
+                raise asyncio.CancelledError()
+            await self.fetch_files(client, manifest, changed)
+
+            logger.info(f"Update completed, {len(changed)} files replaced")
+            self.signals.update_completed.emit(len(changed))
+
+        except asyncio.CancelledError:
+            logger.warning("Update cancelled")
+            self.signals.download_paused.emit()
+        except Exception as e:
+            logger.exception(f"Error in delta update process: {e}")
+            self.signals.error_occurred.emit(str(e))
+        finally:
+            self.file_index.close()
+
+    async def fetch_manifest(self, client):
+        logger.info(f"Fetching client manifest: {self.manifest_url}")
+        response = await client.get(self.manifest_url)
+        response.raise_for_status()
+        manifest = ClientManifest.from_json(response.text, self.manifest_url)
+        logger.info(f"Manifest version {manifest.version}: {len(manifest.files)} files, {self.format_size(manifest.total_size)}")
+        return manifest
+
+    async def fetch_files(self, client, manifest, entries):
+        patches = await self.run_in_thread(
+            self.choose_patches, [entry for entry in entries if not manifest.from_archive(entry)]
+        )
+        total_size = sum(patches[entry].size if entry in patches else entry.size for entry in entries)
+        self.signals.total_size_updated.emit(total_size)
+        self.reset_progress(total_size)
+        semaphore = asyncio.Semaphore(self.PARALLEL_FILES)
+
+        async def fetch(entry):
+            async with semaphore:
+                if entry in patches and await self.patch_manifest_file(client, entry, patches[entry]):
+                    return
+                await self.fetch_manifest_file(client, manifest.url_for(entry), entry)
+
+        archive_entries = [entry for entry in entries if manifest.from_archive(entry)]
+        tasks = [asyncio.create_task(fetch(entry)) for entry in entries if not manifest.from_archive(entry)]
+        if archive_entries:
+            tasks.append(asyncio.create_task(self.fetch_archive_members(client, manifest, archive_entries)))
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    def choose_patches(self, entries):
+        """{entry: PatchRef} for the changed files a published patch can build from the version on disk."""
+        patches = {}
+        for entry in entries:
+            if self.is_cancelled:
+                break
+            target = safe_member_path(self.extract_path, entry.path) if entry.patches else None
+            if target is None or not target.is_file():
+                continue
+            current = self.file_index.digest(target, 'sha256')
+            patch = next((patch for patch in entry.patches if patch.from_sha256 == current), None)
+            if patch:
+                patches[entry] = patch
+        if patches:
+            logger.info(f"{len(patches)} files can be patched instead of downloaded")
+        return patches
+
+    async def patch_manifest_file(self, client, entry, patch):
+        """Update entry by applying a binary patch to the file on disk; False means download it in full instead.
+
+        The patch is downloaded next to the file, applied into a staged copy, and the staged copy only
+        replaces the file once its SHA-256 matches the manifest.
+        """
+        target = safe_member_path(self.extract_path, entry.path)
+        patch_path = target.with_name(target.name + '.tlpatch')
+        staged_path = target.with_name(target.name + '.tlpart')
+        fetched = 0
+        try:
+            patch_path.unlink(missing_ok=True)
+            writer = DiskWriter(patch_path, patch.size)
+            try:
+                logger.debug(f"Fetching patch for {entry.path} from {patch.url}")
+                async with client.stream('GET', patch.url) as response:
+                    response.raise_for_status()
+                    async for chunk in response.aiter_bytes(chunk_size=self.CHUNK_SIZE):
+                        await self.throttle(len(chunk))
+                        await writer.write(fetched, chunk)
+                        fetched += len(chunk)
+                        self.progress.add(len(chunk))
+                        self.log_download_progress()
+            finally:
+                await self.close_writer(writer)
+
+            digest = await self.run_in_thread(apply_bsdiff, patch_path, target, staged_path, lambda: self.is_cancelled)
+            if digest != entry.sha256:
+                raise ChecksumMismatchError(f"{entry.path}: patched to {digest}, expected {entry.sha256}")
+            os.replace(staged_path, target)
+            self.file_index.record(target, 'sha256', digest)
+            logger.info(f"Patched {entry.path} with {self.format_size(fetched)} instead of {self.format_size(entry.size)}")
+            return True
+        except ExtractionCancelled:
+            raise asyncio.CancelledError()
+        except (httpx.HTTPError, PatchError, ChecksumMismatchError) as e:
+            logger.warning(f"Patching {entry.path} failed ({e}), downloading it in full")
+            # The full file now has to come down on top of what the patch already cost
+            self.progress.set_total(self.progress.total - patch.size + fetched + entry.size)
+            return False
+        finally:
+            patch_path.unlink(missing_ok=True)
+            staged_path.unlink(missing_ok=True)
+
+    async def fetch_archive_members(self, client, manifest, entries):
+        reader = await RemoteZipReader(client, manifest.archive_url).open()
+        by_member = {}
+        for entry in entries:
+            member = reader.members.get(manifest.archive_member_name(entry))
+            if member is None:
+                raise zipfile.BadZipFile(f"{entry.path} is not in {manifest.archive_url}")
+            by_member[member.filename] = entry
+
+        async for member, chunks in reader.iter_members([reader.members[name] for name in by_member]):
+            await self.write_manifest_file(by_member[member.filename], chunks)
+
+    async def fetch_manifest_file(self, client, url, entry):
+        cached_path = await asyncio.to_thread(self.archive_cache.get, entry.sha256) if self.archive_cache and entry.sha256 else None
+        if cached_path:
+            logger.debug(f"Copying {entry.path} from the archive cache")
+            await self.write_manifest_file(entry, self.read_cached_file(cached_path), throttled=False)
+            return
+        seed_urls = [f"{base}/files/{entry.sha256}" for base in self.lan_seeds] if entry.sha256 else []
+        for seed_url in seed_urls:
+            try:
+                await self.stream_manifest_file(client, seed_url, entry)
+                break
+            except (httpx.HTTPError, ChecksumMismatchError) as e:
+                logger.warning(f"LAN seed could not serve {entry.path}: {e!r}")
+        else:
+            await self.stream_manifest_file(client, url, entry)
+        if self.archive_cache and self.cache_files and entry.sha256:
+            # Off by default: every updated file would be written twice, to the install and to the cache
+            target = safe_member_path(self.extract_path, entry.path)
+            await asyncio.to_thread(self.archive_cache.store, target, entry.sha256)
+
+    async def stream_manifest_file(self, client, url, entry):
+        logger.debug(f"Fetching {entry.path} from {url}")
+        async with client.stream('GET', url) as response:
+            response.raise_for_status()
+            await self.write_manifest_file(entry, response.aiter_bytes(chunk_size=self.CHUNK_SIZE))
+
+    async def read_cached_file(self, path):
+        with open(path, 'rb') as f:
+            while chunk := await asyncio.to_thread(f.read, self.CHUNK_SIZE):
+                yield chunk
+
+    async def write_manifest_file(self, entry, chunks, throttled=True):
+        target = safe_member_path(self.extract_path, entry.path)
+        if target is None:
+            logger.warning(f"Skipping unsafe manifest path: {entry.path}")
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = target.with_name(target.name + '.tlpart')
+
+        try:
+            file_hash = hashlib.sha256()
+            temp_path.unlink(missing_ok=True)  # left over from an interrupted update
+            writer = DiskWriter(temp_path, entry.size)
+            try:
+                offset = 0
+                async for chunk in chunks:
+                    if throttled:
+                        await self.throttle(len(chunk))
+                    await writer.write(offset, chunk)
+                    offset += len(chunk)
+                    file_hash.update(chunk)
+                    self.progress.add(len(chunk))
+                    self.log_download_progress()
+            finally:
+                await self.close_writer(writer)
+
+            # Entries read out of the client archive have no sha256; their CRC32 was checked while inflating
+            if entry.sha256 and file_hash.hexdigest() != entry.sha256:
+                raise ChecksumMismatchError(f"{entry.path}: expected {entry.sha256}, got {file_hash.hexdigest()}")
+            # Replace rather than overwrite so the game never sees a half-written file
+            os.replace(temp_path, target)
+            # The content was just checked, so the next verify does not need to read it again
+            self.file_index.record(target, *entry.digest)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+
+class VerifyRepairWorker(DeltaUpdateWorker):
+    """Checks every file of an install against a reference and re-downloads only the broken or missing ones.
+
+    The reference is the client manifest when one is published, otherwise the central directory of
+    the client archive: its CRC32s are checked, and broken files are fetched as archive members
+    with range requests.
+    """
+
+    def __init__(self, install_dir, archive_url, manifest_url=None):
+        super().__init__(manifest_url or archive_url, install_dir)
+        self.manifest_url = manifest_url
+        self.archive_url = archive_url
+
+    async def fetch_manifest(self, client):
+        if self.manifest_url:
+            return await super().fetch_manifest(client)
+        logger.info(f"No client manifest, checking {self.extract_path} against the central directory of {self.archive_url}")
+        reader = await RemoteZipReader(client, self.archive_url).open()
+        manifest = ClientManifest.from_zip_members(reader.members.values(), self.archive_url)
+        logger.info(f"Reference has {len(manifest.files)} files, {self.format_size(manifest.total_size)}")
+        return manifest
 
 
 class DownloadExtractUtility(QObject):
-    progress_updated = Signal(str, str, str)  # (percent, speed, state)
+    progress_updated = Signal(object)  # ProgressSnapshot, at most ProgressChannel.FRAME_RATE times a second
     download_completed = Signal()
+    download_paused = Signal()
+    verification_started = Signal()
+    verification_completed = Signal(bool)
     extraction_completed = Signal(str)
+    update_completed = Signal(int)
     error_occurred = Signal(str)
     status_changed = Signal(bool)
-    total_size_updated = Signal(str)
+    total_size_updated = Signal(object)
+
+    GAME_PRIORITY = 10
 
     def __init__(self):
         super().__init__()
-        self.thread_pool = QThreadPool()
-        self.current_worker = None
+        self.scheduler = get_transfer_scheduler()
+        self.rate_limiter = TokenBucket()
+        self.archive_cache = get_archive_cache()
+        self.lan_discovery = False
+        self.cache_files = False
+        self.seed_server = None
+        self.current_job = None
+        self.progress_channel = ProgressChannel(self)
+        self.progress_channel.snapshot_ready.connect(self.on_progress_updated)
         self._is_downloading = False
         logger.info("DownloadExtractUtility initialized")
 
@@ -187,43 +1243,138 @@ class DownloadExtractUtility(QObject):
             logger.info(f"Download status changed: {'Active' if value else 'Inactive'}")
             self.status_changed.emit(value)
 
-    def download_and_extract(self, url, extract_path):
-        logger.info(f"Starting download and extract process: URL={url}, Path={extract_path}")
-        self.current_worker = DownloadExtractWorker(url, extract_path)
-        self.current_worker.signals.progress_updated.connect(self.on_progress_updated)
-        self.current_worker.signals.download_completed.connect(self.on_download_completed)
-        self.current_worker.signals.extraction_completed.connect(self.on_extraction_completed)
-        self.current_worker.signals.error_occurred.connect(self.on_error)
-        self.current_worker.signals.total_size_updated.connect(self.on_total_size_updated)
+    @property
+    def current_worker(self):
+        return self.current_job.worker if self.current_job else None
+
+    def download_and_extract(self, url, extract_path, pipelined=False, expected_digest=None, mirrors=None):
+        logger.info(f"Starting download and extract process: URL={url}, Path={extract_path}, Pipelined={pipelined}")
+        self.start_job(f"download {url}", lambda: DownloadExtractWorker(url, extract_path, pipelined, expected_digest, mirrors))
+
+    def update_from_manifest(self, manifest_url, install_dir):
+        logger.info(f"Starting delta update: Manifest={manifest_url}, Path={install_dir}")
+        self.start_job(f"update {manifest_url}", lambda: DeltaUpdateWorker(manifest_url, install_dir))
+
+    def verify_and_repair(self, install_dir, archive_url, manifest_url=None):
+        logger.info(f"Starting verify and repair: Path={install_dir}, Archive={archive_url}, Manifest={manifest_url}")
+        self.start_job(f"repair {install_dir}", lambda: VerifyRepairWorker(install_dir, archive_url, manifest_url))
+
+    def set_rate_limit(self, bytes_per_second):
+        """Cap the bandwidth of running and future downloads, 0 for unlimited."""
+        self.rate_limiter.set_rate(bytes_per_second)
+
+    def set_cache_limit(self, size):
+        """Cap the archive cache at size bytes, evicting what no longer fits; 0 disables it."""
+        self.archive_cache.set_max_size(size)
+
+    def set_file_caching(self, enabled):
+        """Keep the files delta updates and repairs fetch in the archive cache too, not only whole archives."""
+        self.cache_files = enabled
+
+    def set_lan_discovery(self, enabled):
+        """Let future transfers look for launchers seeding on the local network and download from them first."""
+        self.lan_discovery = enabled
 
+    def set_seeding(self, enabled, install_dir=None):
+        """Serve the archive cache and the install in install_dir to other launchers on the LAN, or stop."""
+        loop = get_async_loop()
+        if self.seed_server:
+            loop.run(self.seed_server.stop(), name="stop seeding")
+            self.seed_server = None
+        if enabled:
+            server = LanSeedServer(self.archive_cache, install_dir)
+            try:
+                loop.run(server.start(), name="start seeding")
+                self.seed_server = server
+            except OSError as e:
+                logger.error(f"Could not start seeding: {e}")
+
+    def start_job(self, name, create_worker):
+        """Queue a game transfer on the shared scheduler; create_worker is called again on every resume."""
+        if self.current_job and not self.current_job.is_finished:
+            # Paused jobs too, or they would stay in the scheduler and could still be resumed
+            logger.warning(f"Replacing unfinished job {self.current_job}")
+            self.scheduler.cancel(self.current_job)
+
+        def create_connected_worker():
+            worker = create_worker()
+            self.connect_worker(worker)
+            return worker
+
+        job = TransferJob(JobClass.GAME, create_connected_worker, self.GAME_PRIORITY, name)
+        self.current_job = job
         self.is_downloading = True
-        self.thread_pool.start(self.current_worker)
+        self.scheduler.submit(job)
+
+    def connect_worker(self, worker):
+        worker.rate_limiter = self.rate_limiter
+        worker.archive_cache = self.archive_cache if self.archive_cache.enabled else None
+        worker.lan_discovery = self.lan_discovery
+        if isinstance(worker, DeltaUpdateWorker):
+            worker.cache_files = self.cache_files
+        self.progress_channel.attach(worker.progress)
+        worker.signals.download_completed.connect(self.on_download_completed)
+        worker.signals.download_paused.connect(self.on_download_paused)
+        worker.signals.verification_started.connect(self.verification_started.emit)
+        worker.signals.verification_completed.connect(self.on_verification_completed)
+        worker.signals.extraction_completed.connect(self.on_extraction_completed)
+        worker.signals.update_completed.connect(self.on_update_completed)
+        worker.signals.error_occurred.connect(self.on_error)
+        worker.signals.total_size_updated.connect(self.on_total_size_updated)
 
     def cancel_download(self):
-        logger.info("Cancelling download")
-        if self.current_worker:
-            self.current_worker.cancel()
-        self.thread_pool.clear()
+        """Pause the current download. Progress is kept on disk and picked up by resume_download or the next download_and_extract."""
+        logger.info("Pausing download")
+        if self.current_job:
+            self.scheduler.pause(self.current_job)
         self.is_downloading = False
 
-    def on_progress_updated(self, percent, speed, state):
-        logger.debug(f"Progress update: {percent}%, Speed: {speed}, State: {state}")
-        self.progress_updated.emit(str(percent), speed, state)
+    def resume_download(self):
+        if self.current_job and self.current_job.state in (JobState.PAUSED, JobState.RUNNING):
+            logger.info("Resuming download")
+            self.scheduler.resume(self.current_job)
+            self.is_downloading = True
+
+    def on_progress_updated(self, snapshot):
+        if self.current_job:
+            self.current_job.set_progress(snapshot.percent, snapshot.phase.value)
+        self.progress_updated.emit(snapshot)
 
     def on_download_completed(self):
         logger.info("Download phase completed")
         self.download_completed.emit()
 
+    def on_download_paused(self):
+        logger.info("Download paused, progress kept for the next attempt")
+        self.progress_channel.detach()
+        self.is_downloading = False
+        self.download_paused.emit()
+
+    def on_verification_completed(self, is_valid):
+        logger.info(f"Download verification {'passed' if is_valid else 'failed'}")
+        if not is_valid:
+            self.progress_channel.detach()
+            self.is_downloading = False
+        self.verification_completed.emit(is_valid)
+
     def on_extraction_completed(self, extracted_folder):
         logger.info(f"Extraction completed. Extracted folder: {extracted_folder}")
+        self.progress_channel.detach()
         self.is_downloading = False
         self.extraction_completed.emit(extracted_folder)
 
+    def on_update_completed(self, updated_count):
+        logger.info(f"Delta update completed. Files updated: {updated_count}")
+        self.progress_channel.detach()
+        self.is_downloading = False
+        self.update_completed.emit(updated_count)
+
     def on_error(self, error_message):
         logger.error(f"Error in download/extract process: {error_message}")
+        self.progress_channel.detach()
         self.is_downloading = False
         self.error_occurred.emit(error_message)
 
     def on_total_size_updated(self, total_size):
-        logger.info(f"Total file size: {DownloadExtractWorker.format_size(int(total_size))}")
+        logger.info(f"Total file size: {DownloadExtractWorker.format_size(total_size)}")
         self.total_size_updated.emit(total_size)
@@ -0,0 +1,200 @@
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import NamedTuple
+from loguru import logger
+from turtlelauncher.utils.checksum import digest_file
+from turtlelauncher.utils.globals import FILE_INDEX_FILE
+
+
+ALGORITHMS = ('sha256', 'crc32')
+
+
+class StatSignature(NamedTuple):
+    size: int
+    mtime_ns: int
+    inode: int
+
+    @classmethod
+    def of(cls, path: Path | str):
+        stat = os.stat(path)
+        return cls(stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+    @classmethod
+    def of_entry(cls, entry: os.DirEntry):
+        # DirEntry.stat() leaves st_ino at 0 on Windows; inode() fetches it there
+        stat = entry.stat()
+        return cls(stat.st_size, stat.st_mtime_ns, entry.inode())
+
+
+def walk_signatures(root: Path | str):
+    """{path: StatSignature} for every regular file below root, from a single os.scandir walk."""
+    signatures = {}
+    pending = [Path(root)]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    signatures[Path(entry.path)] = StatSignature.of_entry(entry)
+    return signatures
+
+
+class FileIndex:
+    """Content digests of installed files, kept in SQLite in TOOL_FOLDER and keyed by absolute path.
+
+    A digest is trusted for as long as the file's stat signature (size, mtime, inode) stays the
+    same, so verifying, updating or deduplicating an install only reads the files that changed
+    since they were last hashed or written. Each algorithm in ALGORITHMS has its own column, and a
+    changed signature clears all of them. Safe to share between threads.
+    """
+    HASH_WORKERS = None  # processes, defaults to the number of cores
+
+    def __init__(self, db_path: Path | str = FILE_INDEX_FILE):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER, sha256 TEXT, crc32 TEXT)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def _key(path: Path | str):
+        return os.path.normcase(os.path.abspath(path))
+
+    @staticmethod
+    def _check_algorithm(algorithm):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"FileIndex does not store {algorithm} digests")
+
+    def cached(self, path: Path | str, algorithm='sha256', signature=None):
+        """The stored digest of path, or None if there is none or the file changed since."""
+        self._check_algorithm(algorithm)
+        signature = signature or StatSignature.of(path)
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT size, mtime_ns, inode, {algorithm} FROM files WHERE path = ?", (self._key(path),)
+            ).fetchone()
+        if row is None or StatSignature(*row[:3]) != signature:
+            return None
+        return row[3]
+
+    def record(self, path: Path | str, algorithm, digest, signature=None, commit=True):
+        """Store the digest of a file that was just hashed or written with known content."""
+        self._check_algorithm(algorithm)
+        signature = signature or StatSignature.of(path)
+        key = self._key(path)
+        with self._lock:
+            row = self._db.execute("SELECT size, mtime_ns, inode FROM files WHERE path = ?", (key,)).fetchone()
+            if row is None or StatSignature(*row) != signature:
+                # Digests of the old content do not apply any more
+                self._db.execute(
+                    "INSERT OR REPLACE INTO files (path, size, mtime_ns, inode) VALUES (?, ?, ?, ?)", (key, *signature)
+                )
+            self._db.execute(f"UPDATE files SET {algorithm} = ? WHERE path = ?", (digest, key))
+            if commit:
+                self._db.commit()
+
+    def commit(self):
+        with self._lock:
+            self._db.commit()
+
+    def digest(self, path: Path | str, algorithm='sha256'):
+        """The digest of path, from the index when the file has not changed, otherwise read from disk."""
+        signature = StatSignature.of(path)
+        digest = self.cached(path, algorithm, signature)
+        if digest is None:
+            digest = digest_file(path, algorithm)
+            self.record(path, algorithm, digest, signature)
+        return digest
+
+    def find(self, digest, algorithm='sha256', root: Path | str = None):
+        """A file (below root, if given) whose content has this digest according to the index, or None."""
+        self._check_algorithm(algorithm)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT path, size, mtime_ns, inode FROM files WHERE {algorithm} = ?", (digest,)
+            ).fetchall()
+        prefix = self._key(root).rstrip(os.sep) + os.sep if root else ''
+        for path, *signature in rows:
+            if not path.startswith(prefix):
+                continue
+            try:
+                if StatSignature.of(path) == StatSignature(*signature):
+                    return Path(path)
+            except OSError:
+                continue
+        return None
+
+    def digests(self, paths, algorithm='sha256', on_hashed=None, is_cancelled=None, workers=None, signatures=None):
+        """{path: digest} for every path, hashing the ones not in the index on a pool of processes.
+
+        signatures may map paths to the StatSignature a directory scan already produced. on_hashed(path)
+        is called for every path once its digest is known, cached or not. Stops early, returning what
+        it has, once is_cancelled() is true.
+        """
+        results = {}
+        stale = []
+        for path in paths:
+            signature = signatures[path] if signatures else StatSignature.of(path)
+            digest = self.cached(path, algorithm, signature)
+            if digest is None:
+                stale.append((path, signature))
+            else:
+                results[path] = digest
+                if on_hashed:
+                    on_hashed(path)
+        if not stale:
+            return results
+
+        workers = workers or self.HASH_WORKERS or os.cpu_count() or 1
+        logger.info(f"Hashing {len(stale)} changed files ({len(results)} unchanged) on {workers} processes")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(digest_file, path, algorithm): (path, signature) for path, signature in stale}
+            try:
+                for future in as_completed(futures):
+                    if is_cancelled and is_cancelled():
+                        break
+                    path, signature = futures[future]
+                    results[path] = future.result()
+                    # A file written while it was hashed keeps no digest; the next call hashes it again
+                    if StatSignature.of(path) == signature:
+                        self.record(path, algorithm, results[path], signature, commit=False)
+                    if on_hashed:
+                        on_hashed(path)
+            finally:
+                for future in futures:
+                    future.cancel()
+                self.commit()
+        return results
+
+    def scan(self, root: Path | str, algorithm='sha256', on_hashed=None, is_cancelled=None):
+        """Digests of every file below root, keyed by path relative to root, and forget files that are gone."""
+        root = Path(root)
+        signatures = walk_signatures(root)
+        # Stat data from scandir decides what needs hashing before any file is opened
+        results = self.digests(list(signatures), algorithm, on_hashed, is_cancelled, signatures=signatures)
+        self.forget_missing(root, {self._key(path) for path in signatures})
+        return {path.relative_to(root).as_posix(): digest for path, digest in results.items()}
+
+    def forget_missing(self, root: Path | str, present_keys):
+        prefix = self._key(root).rstrip(os.sep) + os.sep
+        with self._lock:
+            keys = [row[0] for row in self._db.execute(
+                "SELECT path FROM files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+            )]
+            gone = [(key,) for key in keys if key not in present_keys]
+            if gone:
+                self._db.executemany("DELETE FROM files WHERE path = ?", gone)
+                self._db.commit()
+                logger.debug(f"Dropped {len(gone)} files below {root} from the index")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
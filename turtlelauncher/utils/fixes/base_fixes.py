@@ -2,6 +2,7 @@ from pathlib import Path
 import shutil
 from loguru import logger
 from turtlelauncher.utils.errors import ResultKind
+from turtlelauncher.utils.dedup import break_link
 
 
 def clear_addon_settings(game_install_dir: Path):
@@ -65,6 +66,7 @@ def fix_black_screen(game_install_dir: Path):
             modified = True
 
         if modified:
+            break_link(wtf_config_path)
             with open(wtf_config_path, 'w') as file:
                 file.writelines(lines)
             logger.info("Successfully applied Black Screen fix")
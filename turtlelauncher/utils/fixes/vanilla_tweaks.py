@@ -2,6 +2,7 @@ import re
 from pathlib import Path
 from loguru import logger
 from turtlelauncher.utils.errors import ResultKind
+from turtlelauncher.utils.dedup import break_link
 
 def fix_alt_tab(game_install_dir: Path):
     dxvk_conf_path = Path(game_install_dir) / "dxvk.conf"
@@ -37,6 +38,7 @@ def fix_alt_tab(game_install_dir: Path):
             dxvk_modified = True
 
         if dxvk_modified:
+            break_link(dxvk_conf_path)
             with open(dxvk_conf_path, 'w') as file:
                 file.writelines(dxvk_lines)
             logger.info("Successfully applied VanillaTweaks Alt-Tab fix")
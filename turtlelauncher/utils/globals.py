@@ -11,5 +11,13 @@ USER_DOCUMENTS = Path.home() / "Documents"
 TOOL_FOLDER = USER_DOCUMENTS / "TurtleLauncher"
 if not TOOL_FOLDER.exists():
     TOOL_FOLDER.mkdir(parents=True)
+DOWNLOADS_FOLDER = TOOL_FOLDER / "downloads"
+MIRROR_CACHE_FILE = TOOL_FOLDER / "mirrors.json"
+FILE_INDEX_FILE = TOOL_FOLDER / "file-index.sqlite3"
+ARCHIVE_CACHE_FOLDER = TOOL_FOLDER / "cache"
 
-DOWNLOAD_URL = "https://turtle-eu.b-cdn.net/twmoa_1171.zip"
\ No newline at end of file
+DOWNLOAD_URL = "https://turtle-eu.b-cdn.net/twmoa_1171.zip"
+# Hosts serving the same client archive as DOWNLOAD_URL; more can be added with Config.download_mirrors
+DOWNLOAD_MIRRORS = [DOWNLOAD_URL]
+# Published client manifest (see ClientManifest); without one, repairs check against the archive itself
+CLIENT_MANIFEST_URL = None
@@ -0,0 +1,381 @@
+import asyncio
+import ipaddress
+import socket
+import threading
+import time
+import httpx
+import httpcore
+from loguru import logger
+
+
+class DnsCache:
+    """Remembers resolved addresses for TTL seconds so repeated connections skip the lookup."""
+    TTL = 300  # seconds
+
+    def __init__(self):
+        self._entries = {}  # (host, port) -> (addresses, expires_at)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_ip(host):
+        try:
+            ipaddress.ip_address(host)
+            return True
+        except ValueError:
+            return False
+
+    def get(self, host, port):
+        with self._lock:
+            entry = self._entries.get((host, port))
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+
+    def store(self, host, port, infos):
+        # Keep the resolver's order (it already prefers IPv6/IPv4 per the system settings)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        with self._lock:
+            self._entries[(host, port)] = (addresses, time.monotonic() + self.TTL)
+        return addresses
+
+    def forget(self, host, port):
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+    def resolve(self, host, port):
+        if self.is_ip(host):
+            return [host]
+        return self.get(host, port) or self.store(host, port, socket.getaddrinfo(host, port, type=socket.SOCK_STREAM))
+
+    async def aresolve(self, host, port):
+        if self.is_ip(host):
+            return [host]
+        cached = self.get(host, port)
+        if cached:
+            return cached
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        return self.store(host, port, infos)
+
+
+class HostMetrics:
+    def __init__(self):
+        self.connections = 0
+        self.connect_time = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.response_time = 0.0  # summed time to response headers
+        self.responses = 0
+        self.bytes_announced = 0  # sum of Content-Length of responses
+
+    def snapshot(self):
+        return {
+            'connections': self.connections,
+            'avg_connect_time': self.connect_time / self.connections if self.connections else None,
+            'requests': self.requests,
+            'errors': self.errors,
+            'avg_ttfb': self.response_time / self.responses if self.responses else None,
+            'bytes_announced': self.bytes_announced,
+        }
+
+
+class MetricsRecorder:
+    def __init__(self):
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host):
+        if host not in self._hosts:
+            self._hosts[host] = HostMetrics()
+        return self._hosts[host]
+
+    def connection_opened(self, host, elapsed):
+        with self._lock:
+            metrics = self._host(host)
+            metrics.connections += 1
+            metrics.connect_time += elapsed
+
+    def request_sent(self, request):
+        request.extensions['turtlelauncher_started'] = time.monotonic()
+        with self._lock:
+            self._host(request.url.host).requests += 1
+
+    def response_received(self, response):
+        started = response.request.extensions.get('turtlelauncher_started')
+        with self._lock:
+            metrics = self._host(response.request.url.host)
+            metrics.responses += 1
+            if started:
+                metrics.response_time += time.monotonic() - started
+            if response.status_code >= 400:
+                metrics.errors += 1
+            content_length = response.headers.get('Content-Length', '')
+            if content_length.isdigit():
+                metrics.bytes_announced += int(content_length)
+
+    def snapshot(self):
+        with self._lock:
+            return {host: metrics.snapshot() for host, metrics in self._hosts.items()}
+
+
+class CachingAsyncBackend(httpcore.AsyncNetworkBackend):
+    """Connects through the DnsCache, trying each cached address in turn."""
+
+    def __init__(self, dns_cache, metrics):
+        self._backend = httpcore.AnyIOBackend()
+        self.dns_cache = dns_cache
+        self.metrics = metrics
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        started = time.monotonic()
+        addresses = await self.dns_cache.aresolve(host, port)
+        error = None
+        for address in addresses:
+            try:
+                stream = await self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+                self.metrics.connection_opened(host, time.monotonic() - started)
+                return stream
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        # Every address failed, the host may have moved: resolve again next time
+        self.dns_cache.forget(host, port)
+        raise error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds):
+        await self._backend.sleep(seconds)
+
+
+class CachingSyncBackend(httpcore.NetworkBackend):
+    def __init__(self, dns_cache, metrics):
+        self._backend = httpcore.SyncBackend()
+        self.dns_cache = dns_cache
+        self.metrics = metrics
+
+    def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        started = time.monotonic()
+        addresses = self.dns_cache.resolve(host, port)
+        error = None
+        for address in addresses:
+            try:
+                stream = self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+                self.metrics.connection_opened(host, time.monotonic() - started)
+                return stream
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        self.dns_cache.forget(host, port)
+        raise error
+
+    def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    def sleep(self, seconds):
+        self._backend.sleep(seconds)
+
+
+# httpcore exceptions and the httpx ones callers catch, most specific first
+HTTPCORE_EXCEPTIONS = (
+    (httpcore.ConnectTimeout, httpx.ConnectTimeout),
+    (httpcore.ReadTimeout, httpx.ReadTimeout),
+    (httpcore.WriteTimeout, httpx.WriteTimeout),
+    (httpcore.PoolTimeout, httpx.PoolTimeout),
+    (httpcore.TimeoutException, httpx.TimeoutException),
+    (httpcore.ConnectError, httpx.ConnectError),
+    (httpcore.ReadError, httpx.ReadError),
+    (httpcore.WriteError, httpx.WriteError),
+    (httpcore.NetworkError, httpx.NetworkError),
+    (httpcore.ProxyError, httpx.ProxyError),
+    (httpcore.UnsupportedProtocol, httpx.UnsupportedProtocol),
+    (httpcore.RemoteProtocolError, httpx.RemoteProtocolError),
+    (httpcore.LocalProtocolError, httpx.LocalProtocolError),
+    (httpcore.ProtocolError, httpx.ProtocolError),
+)
+
+
+def map_httpcore_error(error, request):
+    for core_error, httpx_error in HTTPCORE_EXCEPTIONS:
+        if isinstance(error, core_error):
+            return httpx_error(str(error), request=request)
+    return error
+
+
+def to_httpcore_request(request):
+    return httpcore.Request(
+        method=request.method,
+        url=httpcore.URL(scheme=request.url.raw_scheme, host=request.url.raw_host, port=request.url.port,
+                         target=request.url.raw_path),
+        headers=request.headers.raw,
+        content=request.stream,
+        extensions=request.extensions,
+    )
+
+
+class _ResponseStream(httpx.SyncByteStream):
+    def __init__(self, stream, request):
+        self._stream = stream
+        self._request = request
+
+    def __iter__(self):
+        try:
+            yield from self._stream
+        except Exception as e:
+            raise map_httpcore_error(e, self._request) from e
+
+    def close(self):
+        self._stream.close()
+
+
+class _AsyncResponseStream(httpx.AsyncByteStream):
+    def __init__(self, stream, request):
+        self._stream = stream
+        self._request = request
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        except Exception as e:
+            raise map_httpcore_error(e, self._request) from e
+
+    async def aclose(self):
+        await self._stream.aclose()
+
+
+class PoolTransport(httpx.BaseTransport):
+    """An httpx transport over an httpcore pool built with our own network backend.
+
+    httpx's HTTPTransport does not take a network backend, and httpcore's public constructor does,
+    so the pool is built here and requests and responses are translated the way httpx does it.
+    """
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    def handle_request(self, request):
+        try:
+            response = self._pool.handle_request(to_httpcore_request(request))
+        except Exception as e:
+            raise map_httpcore_error(e, request) from e
+        return httpx.Response(response.status, headers=response.headers,
+                              stream=_ResponseStream(response.stream, request), extensions=response.extensions)
+
+    def close(self):
+        self._pool.close()
+
+
+class AsyncPoolTransport(httpx.AsyncBaseTransport):
+    """The async PoolTransport."""
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    async def handle_async_request(self, request):
+        try:
+            response = await self._pool.handle_async_request(to_httpcore_request(request))
+        except Exception as e:
+            raise map_httpcore_error(e, request) from e
+        return httpx.Response(response.status, headers=response.headers,
+                              stream=_AsyncResponseStream(response.stream, request), extensions=response.extensions)
+
+    async def aclose(self):
+        await self._pool.aclose()
+
+
+class HttpService:
+    """The launcher's HTTP clients: pooled keep-alive connections, a shared DNS cache and per-host metrics.
+
+    httpx async clients cannot cross event loops, so async_client() hands out one client per
+    running loop (in practice the shared one from async_loop) and per protocol: HTTP/2 multiplexes
+    small requests over one connection, while segmented downloads want separate HTTP/1.1
+    connections. Threads without a loop use client(). Everything shares the same DNS cache,
+    limits and metrics.
+    """
+    LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=30)
+    # seconds; read bounds the wait for each chunk, not the whole download, so a stalled
+    # connection fails and fetch_segment retries it instead of hanging forever
+    TIMEOUT = httpx.Timeout(connect=30, read=60, write=60, pool=None)
+
+    def __init__(self):
+        self.dns_cache = DnsCache()
+        self.metrics = MetricsRecorder()
+        self._async_clients = {}  # (loop, http2) -> AsyncClient
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _pool_options(self, backend, http2):
+        return dict(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=self.LIMITS.max_connections,
+            max_keepalive_connections=self.LIMITS.max_keepalive_connections,
+            keepalive_expiry=self.LIMITS.keepalive_expiry,
+            http1=True,
+            http2=http2,
+            network_backend=backend,
+        )
+
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(
+                    transport=PoolTransport(httpcore.ConnectionPool(
+                        **self._pool_options(CachingSyncBackend(self.dns_cache, self.metrics), True)
+                    )),
+                    timeout=self.TIMEOUT,
+                    follow_redirects=True,
+                    event_hooks={'request': [self.metrics.request_sent], 'response': [self.metrics.response_received]},
+                )
+            return self._client
+
+    def async_client(self, http2=True):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get((loop, http2))
+            if client is None:
+                async def on_request(request):
+                    self.metrics.request_sent(request)
+
+                async def on_response(response):
+                    self.metrics.response_received(response)
+
+                client = httpx.AsyncClient(
+                    transport=AsyncPoolTransport(httpcore.AsyncConnectionPool(
+                        **self._pool_options(CachingAsyncBackend(self.dns_cache, self.metrics), http2)
+                    )),
+                    timeout=self.TIMEOUT,
+                    follow_redirects=True,
+                    event_hooks={'request': [on_request], 'response': [on_response]},
+                )
+                self._async_clients[(loop, http2)] = client
+            return client
+
+    async def close_loop_clients(self):
+        """Close the clients of the running loop, which must happen before the loop itself closes."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = [self._async_clients.pop(key) for key in list(self._async_clients) if key[0] is loop]
+        for client in clients:
+            await client.aclose()
+
+    def close(self):
+        with self._lock:
+            client, self._client = self._client, None
+        if client:
+            client.close()
+
+    def stats(self):
+        """Per-host connection and request metrics, for logs and diagnostics."""
+        return self.metrics.snapshot()
+
+
+http_service_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_http_service():
+    global http_service_instance
+    with _instance_lock:
+        if http_service_instance is None:
+            http_service_instance = HttpService()
+            logger.info("HTTP service initialized")
+        return http_service_instance
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import re
+import socket
+import uuid
+from email.utils import formatdate
+from pathlib import Path
+from urllib.parse import urlsplit
+import httpx
+from loguru import logger
+from turtlelauncher.utils.file_index import FileIndex
+
+
+SEED_PORT = 47625  # TCP, HTTP
+DISCOVERY_PORT = 47624  # UDP
+DISCOVERY_TIMEOUT = 1.0  # seconds to wait for seeds to answer a broadcast
+DISCOVERY_REQUEST = b"TURTLELAUNCHER-SEED?1"
+DISCOVERY_REPLY = b"TURTLELAUNCHER-SEED!1 "
+INSTANCE_ID = uuid.uuid4().hex  # tells this launcher's own seed apart from the others
+
+DIGEST_PATTERN = re.compile(r'[0-9a-f]{64}')
+RANGE_PATTERN = re.compile(r'bytes=(\d*)-(\d*)')
+
+
+def parse_range(header, size):
+    """(start, end) of a single "bytes=" range, None to send the whole file, ValueError when unsatisfiable."""
+    match = RANGE_PATTERN.fullmatch(header.strip()) if header else None
+    if not match or not (match[1] or match[2]):
+        return None  # absent, malformed or multiple ranges: a full response is always allowed
+    if not match[1]:
+        start, end = max(0, size - int(match[2])), size
+    else:
+        start = int(match[1])
+        end = min(int(match[2]) + 1, size) if match[2] else size
+    if start >= size or start >= end:
+        raise ValueError(f"Range {header} not satisfiable for {size} bytes")
+    return start, end
+
+
+class _DiscoveryResponder(asyncio.DatagramProtocol):
+    def __init__(self, reply):
+        self.reply = reply
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if data == DISCOVERY_REQUEST:
+            self.transport.sendto(self.reply, addr)
+
+
+class _DiscoveryCollector(asyncio.DatagramProtocol):
+    def __init__(self, include_self):
+        self.include_self = include_self
+        self.seeds = {}  # instance id -> base URL
+
+    def datagram_received(self, data, addr):
+        if not data.startswith(DISCOVERY_REPLY):
+            return
+        try:
+            reply = json.loads(data[len(DISCOVERY_REPLY):])
+            if reply['id'] != INSTANCE_ID or self.include_self:
+                self.seeds.setdefault(reply['id'], f"http://{addr[0]}:{int(reply['port'])}")
+        except (ValueError, KeyError, TypeError) as e:
+            logger.debug(f"Ignoring malformed seed reply from {addr[0]}: {e!r}")
+
+
+async def discover_seeds(timeout=DISCOVERY_TIMEOUT, port=DISCOVERY_PORT, include_self=False):
+    """Base URLs of the launchers seeding on the local network, found with a UDP broadcast.
+
+    The request also goes to loopback, so a seed on the same machine answers even without a network.
+    """
+    loop = asyncio.get_running_loop()
+    transport, collector = await loop.create_datagram_endpoint(
+        lambda: _DiscoveryCollector(include_self), local_addr=('0.0.0.0', 0), allow_broadcast=True
+    )
+    try:
+        for host in ('255.255.255.255', '127.0.0.1'):
+            try:
+                transport.sendto(DISCOVERY_REQUEST, (host, port))
+            except OSError as e:
+                logger.debug(f"Seed discovery to {host} failed: {e!r}")
+        await asyncio.sleep(timeout)
+    finally:
+        transport.close()
+    seeds = list(collector.seeds.values())
+    logger.info(f"Found {len(seeds)} LAN seeds{': ' + ', '.join(seeds) if seeds else ''}")
+    return seeds
+
+
+async def find_seed_archive(client, seeds, digest):
+    """The URL of a seed's copy of the file with this SHA-256, if any seed has it.
+
+    Any host on the network can answer discovery, so a seed is only ever asked for a digest that
+    came from the CDN or a mirror, and what it serves is checked against that digest.
+    """
+    for base in seeds:
+        try:
+            response = await client.head(f"{base}/files/{digest}")
+            if response.status_code == 200:
+                return f"{base}/files/{digest}"
+        except httpx.HTTPError as e:
+            logger.warning(f"LAN seed {base} did not answer: {e!r}")
+    return None
+
+
+class LanSeedServer:
+    """Serves the archive cache and the installed game files to other launchers over HTTP.
+
+    GET or HEAD /files/<sha256> returns the cached object, or an installed file the file index
+    knows has that content, honouring a single Range. Clients only ask for digests they got from
+    the CDN and check the content against them, so nothing else (checksums, what is cached for
+    which URL) is served. Responses reuse the ETag and Last-Modified of the source URL, so a
+    partial download can move between the CDN and a seed without restarting.
+    Bodies go out with loop.sendfile, which is zero copy wherever os.sendfile is available.
+    """
+    def __init__(self, archive_cache, install_dir: Path | str = None, port=SEED_PORT, discovery_port=DISCOVERY_PORT):
+        self.archive_cache = archive_cache
+        self.install_dir = Path(install_dir) if install_dir else None
+        self.port = port
+        self.discovery_port = discovery_port
+        self.file_index = None
+        self._server = None
+        self._discovery = None
+        self._connections = set()
+
+    async def start(self):
+        self.file_index = FileIndex()
+        self._server = await asyncio.start_server(self.handle, '0.0.0.0', self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        reply = DISCOVERY_REPLY + json.dumps({'id': INSTANCE_ID, 'port': self.port}).encode('utf-8')
+        try:
+            self._discovery, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+                lambda: _DiscoveryResponder(reply), local_addr=('0.0.0.0', self.discovery_port), family=socket.AF_INET
+            )
+        except OSError as e:
+            logger.warning(f"Seed discovery unavailable, UDP port {self.discovery_port} is taken: {e!r}")
+        logger.info(f"Seeding on port {self.port}, discovery on UDP {self.discovery_port}")
+
+    async def stop(self):
+        if self._discovery:
+            self._discovery.close()
+        if self._server:
+            self._server.close()
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+        if self.file_index:
+            self.file_index.close()
+        logger.info("Stopped seeding")
+
+    async def handle(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                method, target, version = request_line.decode('latin-1').split()
+                await self.respond(writer, method, urlsplit(target).path, headers)
+                if version == 'HTTP/1.0' or headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            logger.debug(f"Seed connection from {peer} ended: {e!r}")
+        except asyncio.CancelledError:
+            pass  # stop(); this is the connection's own task, so there is nobody to pass it on to
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def respond(self, writer, method, path, headers):
+        if method not in ('GET', 'HEAD'):
+            await self.send(writer, 405, b'', method, {'Allow': 'GET, HEAD'})
+        elif path.startswith('/files/'):
+            digest = path[len('/files/'):]
+            file_path = await asyncio.to_thread(self.locate, digest) if DIGEST_PATTERN.fullmatch(digest) else None
+            if file_path is None:
+                await self.send(writer, 404, b'', method)
+            else:
+                await self.send_file(writer, method, file_path, digest, headers)
+        else:
+            await self.send(writer, 404, b'', method)
+
+    def locate(self, digest):
+        if digest in self.archive_cache.objects and self.archive_cache.object_path(digest).is_file():
+            return self.archive_cache.object_path(digest)
+        if self.install_dir:
+            return self.file_index.find(digest, 'sha256', self.install_dir)
+        return None
+
+    def validators(self, digest):
+        """ETag and Last-Modified for the object, those of the URL it was downloaded from when known."""
+        for source in self.archive_cache.sources.values():
+            if source['sha256'] == digest:
+                return source['etag'] or f'"{digest}"', source['last_modified']
+        return f'"{digest}"', None
+
+    async def send_file(self, writer, method, path, digest, headers):
+        etag, last_modified = self.validators(digest)
+        with open(path, 'rb') as f:
+            size = f.seek(0, 2)
+            try:
+                if_range = headers.get('if-range')
+                byte_range = parse_range(headers.get('range'), size) if if_range in (None, etag, last_modified) else None
+            except ValueError:
+                await self.send(writer, 416, b'', method, {'Content-Range': f"bytes */{size}"})
+                return
+            start, end = byte_range or (0, size)
+            extra = {'ETag': etag, 'Accept-Ranges': 'bytes', 'Content-Type': 'application/octet-stream'}
+            if last_modified:
+                extra['Last-Modified'] = last_modified
+            if byte_range:
+                extra['Content-Range'] = f"bytes {start}-{end - 1}/{size}"
+            await self.send(writer, 206 if byte_range else 200, None, method, extra, end - start)
+            if method == 'GET' and end > start:
+                await asyncio.get_running_loop().sendfile(writer.transport, f, start, end - start)
+
+    async def send(self, writer, status, body, method, extra_headers=None, length=None):
+        reasons = {200: 'OK', 206: 'Partial Content', 404: 'Not Found', 405: 'Method Not Allowed',
+                   416: 'Range Not Satisfiable'}
+        length = len(body) if length is None else length
+        lines = [f"HTTP/1.1 {status} {reasons[status]}", f"Content-Length: {length}",
+                 f"Date: {formatdate(usegmt=True)}", "Server: TurtleLauncher seed"]
+        lines += [f"{name}: {value}" for name, value in (extra_headers or {}).items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if body and method != 'HEAD':
+            writer.write(body)
+        await writer.drain()
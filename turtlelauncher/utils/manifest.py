@@ -0,0 +1,189 @@
+import json
+from pathlib import Path
+from typing import NamedTuple, Optional
+from urllib.parse import quote, urljoin
+from loguru import logger
+from turtlelauncher.utils.dedup import InstallDeduplicator
+from turtlelauncher.utils.file_index import FileIndex
+from turtlelauncher.utils.zip_extract import safe_member_path
+
+
+# Shipped in the client archive but rewritten by the launcher's fixes (fixes.vanilla_tweaks)
+FIX_MANAGED_FILES = {'dxvk.conf'}
+
+
+def is_local_file(path):
+    """Whether path, relative to the install, belongs to the player or a fix rather than to the client build.
+
+    Settings, addons and caches live in the folders deduplication skips too.
+    """
+    path = path.replace('\\', '/').lower()
+    return path.split('/')[0] in InstallDeduplicator.SKIPPED_FOLDERS or path in FIX_MANAGED_FILES
+
+
+class PatchRef(NamedTuple):
+    from_sha256: str  # the version of the file the patch applies to
+    url: str
+    size: int  # bytes, of the patch
+
+
+class ManifestEntry(NamedTuple):
+    path: str
+    size: int
+    sha256: Optional[str]
+    url: Optional[str] = None
+    crc32: Optional[int] = None  # for entries taken from a zip central directory, which has no sha256
+    patches: tuple = ()  # PatchRefs that turn an older version of the file into this one
+
+    @property
+    def digest(self):
+        """(algorithm, hex digest) to check the file on disk against."""
+        if self.sha256:
+            return 'sha256', self.sha256
+        return 'crc32', f"{self.crc32:08x}"
+
+
+class ClientManifest:
+    """The list of files that make up a client build.
+
+    Published as JSON next to the client archive:
+
+        {
+            "version": "1.17.2",
+            "base_url": "https://cdn.example/twmoa_1172/",
+            "files": [{"path": "Data/patch-3.MPQ", "size": 1234, "sha256": "..."}, ...]
+        }
+
+    A file may list "patches", binary deltas (BSDIFF40) from earlier versions of it:
+
+        {"path": "Data/patch-3.MPQ", ..., "patches": [{"from_sha256": "...", "url": "patch-3.MPQ.2.bsdiff", "size": 5678}]}
+
+    Patch URLs are relative to the manifest. Each file is fetched from its own "url" if given,
+    otherwise from base_url + path. A manifest
+    may instead name the full client zip as "archive_url" (with an optional "archive_prefix", the
+    folder the files sit under inside the zip); files without a "url" are then read straight out
+    of that archive with range requests.
+    """
+
+    def __init__(self, files, version=None, base_url=None, archive_url=None, archive_prefix=''):
+        self.files = files
+        self.version = version
+        self.base_url = base_url
+        self.archive_url = archive_url
+        self.archive_prefix = archive_prefix
+
+    @classmethod
+    def from_dict(cls, data, manifest_url=None):
+        base_url = data.get('base_url')
+        archive_url = data.get('archive_url')
+        if manifest_url:
+            if base_url is None and archive_url is None:
+                base_url = manifest_url.rsplit('/', 1)[0] + '/'
+            if archive_url:
+                archive_url = urljoin(manifest_url, archive_url)
+        files = [
+            ManifestEntry(
+                entry['path'], int(entry['size']), entry['sha256'].lower(), entry.get('url'),
+                patches=tuple(
+                    PatchRef(patch['from_sha256'].lower(), urljoin(manifest_url or base_url or '', patch['url']), int(patch['size']))
+                    for patch in entry.get('patches', [])
+                ),
+            )
+            for entry in data.get('files', [])
+        ]
+        return cls(files, data.get('version'), base_url, archive_url, data.get('archive_prefix', ''))
+
+    @classmethod
+    def from_json(cls, text, manifest_url=None):
+        return cls.from_dict(json.loads(text), manifest_url)
+
+    @classmethod
+    def from_zip_members(cls, members, archive_url):
+        """A manifest of the client archive itself, checked by CRC32, for builds without a published manifest.
+
+        Files the player or the fixes change (see is_local_file) are left out, so a repair keeps them.
+        """
+        members = [member for member in members if not member.is_dir() and not member.filename.startswith('__MACOSX')]
+        # The client sits in one top-level folder, which the install directory stands for
+        top_level = {member.filename.split('/')[0] for member in members if '/' in member.filename}
+        prefix = top_level.pop() if len(top_level) == 1 and all('/' in member.filename for member in members) else ''
+        files = [
+            ManifestEntry(member.filename[len(prefix) + 1:] if prefix else member.filename, member.file_size, None, crc32=member.crc)
+            for member in members
+        ]
+        files = [entry for entry in files if not is_local_file(entry.path)]
+        return cls(files, archive_url=archive_url, archive_prefix=prefix)
+
+    @property
+    def total_size(self):
+        return sum(entry.size for entry in self.files)
+
+    def url_for(self, entry):
+        if entry.url:
+            return entry.url
+        return urljoin(self.base_url, quote(entry.path))
+
+    def from_archive(self, entry):
+        """Whether entry is read out of the client archive rather than fetched on its own."""
+        return bool(self.archive_url) and not entry.url and not self.base_url
+
+    def archive_member_name(self, entry):
+        prefix = self.archive_prefix.strip('/')
+        return f"{prefix}/{entry.path}" if prefix else entry.path
+
+
+def diff_install(manifest, install_dir: Path | str, progress_callback=None, is_cancelled=None, workers=None, file_index=None):
+    """Return the manifest entries that are missing from install_dir or differ from it.
+
+    Sizes are compared first; files whose size matches get their digest from file_index, which
+    only hashes files that changed since it last saw them, on a pool of worker processes.
+    progress_callback(done, total, path) is called as each file is checked, in bytes.
+    """
+    install_dir = Path(install_dir)
+    changed = set()
+    checked_size = 0
+    total_size = manifest.total_size
+
+    def checked(entry):
+        nonlocal checked_size
+        checked_size += entry.size
+        if progress_callback:
+            progress_callback(checked_size, total_size, entry.path)
+
+    to_hash = []
+    for entry in manifest.files:
+        target = safe_member_path(install_dir, entry.path)
+        if target is None:
+            logger.warning(f"Ignoring unsafe manifest path: {entry.path}")
+            continue
+
+        if not target.is_file():
+            logger.debug(f"Missing: {entry.path}")
+            changed.add(entry)
+            checked(entry)
+        elif target.stat().st_size != entry.size:
+            logger.debug(f"Size differs: {entry.path}")
+            changed.add(entry)
+            checked(entry)
+        else:
+            to_hash.append((entry, target))
+
+    if to_hash:
+        own_index = file_index is None
+        file_index = file_index or FileIndex()
+        by_target = {target: entry for entry, target in to_hash}
+        try:
+            for algorithm in {entry.digest[0] for entry, _ in to_hash}:
+                targets = [target for entry, target in to_hash if entry.digest[0] == algorithm]
+                digests = file_index.digests(targets, algorithm, lambda target: checked(by_target[target]), is_cancelled, workers)
+                for target, digest in digests.items():
+                    if digest != by_target[target].digest[1]:
+                        logger.debug(f"Content differs: {by_target[target].path}")
+                        changed.add(by_target[target])
+        finally:
+            if own_index:
+                file_index.close()
+
+    changed = [entry for entry in manifest.files if entry in changed]
+    logger.info(f"{len(changed)} of {len(manifest.files)} files need updating")
+    return changed
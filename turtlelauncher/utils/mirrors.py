@@ -0,0 +1,130 @@
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+import httpx
+from loguru import logger
+from turtlelauncher.utils.globals import MIRROR_CACHE_FILE
+
+
+class MirrorProbe(NamedTuple):
+    url: str
+    connect_time: Optional[float] = None  # seconds to open the TCP (and TLS) connection
+    ttfb: Optional[float] = None  # seconds from sending the request to the response headers
+    throughput: float = 0  # bytes per second over the sample
+    error: Optional[str] = None
+    probed_at: float = 0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class MirrorRegistry:
+    """The mirrors serving one file, ranked by how well they perform from here.
+
+    probe_all() measures every mirror in parallel on its own connection: connect time, time to
+    first byte and the throughput of a short ranged sample. Results are cached on disk so the
+    launcher does not probe on every start, and expire after CACHE_TTL.
+    """
+    CACHE_TTL = 6 * 60 * 60  # seconds
+    PROBE_TIMEOUT = 10  # seconds
+    SAMPLE_SIZE = 1024 * 1024  # 1 MB
+
+    def __init__(self, urls, cache_path: Path | str = MIRROR_CACHE_FILE):
+        self.urls = list(dict.fromkeys(urls))  # keep order, drop duplicates
+        self.cache_path = Path(cache_path)
+        self.probes = {}
+        self.load_cache()
+
+    def load_cache(self):
+        if not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, 'r') as f:
+                cached = json.load(f)
+            for url in self.urls:
+                if url in cached:
+                    self.probes[url] = MirrorProbe(url, **cached[url])
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable mirror cache {self.cache_path}: {e}")
+
+    def save_cache(self):
+        cached = {}
+        if self.cache_path.exists():
+            try:
+                with open(self.cache_path, 'r') as f:
+                    cached = json.load(f)
+            except Exception:
+                cached = {}
+        for url, probe in self.probes.items():
+            cached[url] = probe._asdict()
+            del cached[url]['url']
+        temp_path = self.cache_path.with_suffix('.json.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(cached, f)
+        os.replace(temp_path, self.cache_path)
+
+    def is_fresh(self, probe):
+        return probe is not None and time.time() - probe.probed_at < self.CACHE_TTL
+
+    def ranked(self):
+        """Mirror URLs, best first: working mirrors by throughput, then unprobed ones, then failed ones."""
+        def sort_key(url):
+            probe = self.probes.get(url)
+            if probe is None:
+                return (1, 0, 0)
+            if not probe.ok:
+                return (2, 0, 0)
+            return (0, -probe.throughput, probe.ttfb or 0)
+        return sorted(self.urls, key=sort_key)
+
+    async def probe_all(self, force=False):
+        stale = [url for url in self.urls if force or not self.is_fresh(self.probes.get(url))]
+        if stale:
+            logger.info(f"Probing {len(stale)} mirrors")
+            for probe in await asyncio.gather(*(self.probe(url) for url in stale)):
+                self.probes[probe.url] = probe
+                if probe.ok:
+                    logger.info(f"Mirror {probe.url}: connect {probe.connect_time:.3f}s, "
+                                f"first byte {probe.ttfb:.3f}s, {probe.throughput / 1024 / 1024:.2f} MB/s")
+                else:
+                    logger.warning(f"Mirror {probe.url} failed its probe: {probe.error}")
+            self.save_cache()
+        return self.ranked()
+
+    async def probe(self, url):
+        timings = {}
+
+        async def trace(event, info):
+            if event == 'connection.connect_tcp.started':
+                timings['connect_started'] = time.monotonic()
+            elif event in ('connection.connect_tcp.complete', 'connection.start_tls.complete'):
+                timings['connected'] = time.monotonic()
+
+        try:
+            # A fresh client per mirror so the connect time is really measured
+            async with httpx.AsyncClient(timeout=self.PROBE_TIMEOUT, follow_redirects=True) as client:
+                request_started = time.monotonic()
+                headers = {'Range': f"bytes=0-{self.SAMPLE_SIZE - 1}"}
+                async with client.stream('GET', url, headers=headers, extensions={'trace': trace}) as response:
+                    response.raise_for_status()
+                    headers_received = time.monotonic()
+                    received = 0
+                    async for chunk in response.aiter_bytes():
+                        received += len(chunk)
+                        if received >= self.SAMPLE_SIZE:
+                            break
+                    sample_time = max(time.monotonic() - headers_received, 1e-6)
+
+            connect_time = timings.get('connected', request_started) - timings.get('connect_started', request_started)
+            return MirrorProbe(url, connect_time, headers_received - request_started, received / sample_time, probed_at=time.time())
+        except Exception as e:
+            return MirrorProbe(url, error=repr(e), probed_at=time.time())
+
+    def mark_failed(self, url, reason):
+        """Demote a mirror that stopped performing mid-download until it is probed again."""
+        self.probes[url] = MirrorProbe(url, error=reason, probed_at=time.time())
+        self.save_cache()
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from loguru import logger
+from turtlelauncher.utils.globals import DOWNLOADS_FOLDER
+
+
+class PartialDownload:
+    """A download kept on disk between attempts.
+
+    The data file is preallocated to the full size and written at arbitrary offsets.
+    The journal next to it records which byte ranges are known to be on disk, along with the
+    validators (ETag / Last-Modified) of the remote file so a resume can use If-Range.
+    """
+    JOURNAL_SAVE_INTERVAL = 2  # seconds
+
+    def __init__(self, url, folder: Path | str = DOWNLOADS_FOLDER):
+        self.url = url
+        self.folder = Path(folder)
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+        name = Path(url.split('?', 1)[0]).name or "download"
+        self.data_path = self.folder / f"{key}-{name}.part"
+        self.journal_path = self.folder / f"{key}-{name}.json"
+
+        self.total_size = 0
+        self.etag = None
+        self.last_modified = None
+        self.completed = []  # sorted, non-overlapping [start, end) pairs
+        self._last_save_time = 0
+
+    def load(self):
+        if not self.journal_path.exists() or not self.data_path.exists():
+            return False
+        try:
+            with open(self.journal_path, 'r') as f:
+                journal = json.load(f)
+            if journal.get('url') != self.url:
+                logger.warning(f"Journal {self.journal_path} belongs to another URL, ignoring it")
+                return False
+            self.total_size = journal.get('total_size', 0)
+            self.etag = journal.get('etag')
+            self.last_modified = journal.get('last_modified')
+            self.completed = [tuple(r) for r in journal.get('completed', [])]
+            logger.info(f"Loaded partial download {self.data_path.name}: {self.completed_size}/{self.total_size} bytes")
+            return True
+        except Exception as e:
+            logger.exception(f"Error loading download journal: {e}")
+            return False
+
+    def save(self, force=True):
+        now = time.time()
+        if not force and now - self._last_save_time < self.JOURNAL_SAVE_INTERVAL:
+            return
+        self._last_save_time = now
+        self.folder.mkdir(parents=True, exist_ok=True)
+        journal = {
+            'url': self.url,
+            'total_size': self.total_size,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'completed': [list(r) for r in self.completed],
+        }
+        # Write then rename so a crash mid-save never leaves a truncated journal
+        temp_path = self.journal_path.with_suffix('.json.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(journal, f)
+        os.replace(temp_path, self.journal_path)
+
+    def reset(self, total_size, etag=None, last_modified=None):
+        logger.info(f"Starting a fresh partial download for {self.url}")
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.total_size = total_size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.completed = []
+        with self.data_path.open('wb') as f:
+            f.truncate(total_size)
+        self.save()
+
+    def discard(self):
+        for path in (self.data_path, self.journal_path):
+            if path.exists():
+                path.unlink()
+                logger.info(f"Removed partial download file: {path}")
+        self.completed = []
+
+    def matches(self, total_size, etag, last_modified):
+        """Whether the remote file still looks like the one we started downloading."""
+        if not self.data_path.exists() or total_size != self.total_size:
+            return False
+        if self.etag and etag:
+            return self.etag == etag
+        if self.last_modified and last_modified:
+            return self.last_modified == last_modified
+        return False
+
+    @property
+    def if_range(self):
+        # If-Range only accepts strong ETags; fall back to the date otherwise
+        if self.etag and not self.etag.startswith('W/'):
+            return self.etag
+        return self.last_modified
+
+    def add_range(self, start, end):
+        if end <= start:
+            return
+        merged = []
+        for range_start, range_end in self.completed:
+            if range_end < start or range_start > end:
+                merged.append((range_start, range_end))
+            else:
+                start = min(start, range_start)
+                end = max(end, range_end)
+        merged.append((start, end))
+        merged.sort()
+        self.completed = merged
+
+    def missing_ranges(self):
+        missing = []
+        position = 0
+        for start, end in self.completed:
+            if start > position:
+                missing.append((position, start))
+            position = max(position, end)
+        if position < self.total_size:
+            missing.append((position, self.total_size))
+        return missing
+
+    @property
+    def contiguous_size(self):
+        """How many bytes from the start of the file are on disk without gaps."""
+        if self.completed and self.completed[0][0] == 0:
+            return self.completed[0][1]
+        return 0
+
+    @property
+    def completed_size(self):
+        return sum(end - start for start, end in self.completed)
+
+    @property
+    def is_complete(self):
+        return self.total_size > 0 and not self.missing_ranges()
@@ -0,0 +1,187 @@
+import asyncio
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+from loguru import logger
+from turtlelauncher.utils.globals import DOWNLOADS_FOLDER, ARCHIVE_CACHE_FOLDER
+from turtlelauncher.utils.http_service import get_http_service
+from turtlelauncher.utils.mirrors import MirrorRegistry
+from turtlelauncher.utils.partial_download import PartialDownload
+from turtlelauncher.utils.downloader import RemoteZipReader, DownloadExtractWorker
+
+
+BENCHMARK_SIZE = 64 * 1024 * 1024  # 64 MB
+BENCHMARK_BLOCK = 4 * 1024 * 1024  # 4 MB
+SPACE_MARGIN = 256 * 1024 * 1024  # 256 MB left over for logs, caches and the filesystem itself
+
+format_size = DownloadExtractWorker.format_size
+
+
+class PreflightReport(NamedTuple):
+    compressed_size: int  # bytes, the archive
+    uncompressed_size: int  # bytes, the extracted install
+    download_remaining: int  # bytes of the archive not on disk yet
+    temp_free: int  # bytes free on the downloads volume
+    target_free: int  # bytes free on the install volume
+    cross_device: bool  # archive and install on different volumes
+    temp_write_speed: float  # bytes per second
+    target_write_speed: float  # bytes per second
+    download_rate: float  # bytes per second, 0 when no mirror could be probed
+    projected_time: Optional[float]  # seconds, None without a download rate
+    cached_size: int  # bytes of the archive kept in the archive cache after the install, 0 when it is off
+    problems: tuple  # human readable reasons the install cannot go ahead
+
+    @property
+    def ok(self):
+        return not self.problems
+
+
+def existing_parent(path: Path | str):
+    """path itself, or its closest parent that exists (the install folder may not be created yet)."""
+    path = Path(path)
+    while not path.exists() and path.parent != path:
+        path = path.parent
+    return path
+
+
+def free_space(path: Path | str):
+    return shutil.disk_usage(existing_parent(path)).free
+
+
+def same_volume(first: Path | str, second: Path | str):
+    return os.stat(existing_parent(first)).st_dev == os.stat(existing_parent(second)).st_dev
+
+
+def benchmark_write(folder: Path, size=BENCHMARK_SIZE, is_cancelled=None):
+    """Sequential write speed of the volume holding folder, in bytes per second, synced to disk.
+
+    Returns None if is_cancelled() turns true before the benchmark is done.
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / ".turtlelauncher-benchmark.tmp"
+    block = os.urandom(BENCHMARK_BLOCK)  # incompressible, so compressing filesystems do not flatter it
+    try:
+        started = time.perf_counter()
+        with path.open('wb', buffering=0) as f:
+            written = 0
+            while written < size:
+                if is_cancelled and is_cancelled():
+                    return None
+                written += f.write(block)
+            os.fsync(f.fileno())
+        elapsed = max(time.perf_counter() - started, 1e-6)
+    finally:
+        path.unlink(missing_ok=True)
+    speed = written / elapsed
+    logger.info(f"Sequential write speed in {folder}: {speed / 1024 / 1024:.1f} MB/s")
+    return speed
+
+
+class InstallPreflight:
+    """Checks that an install of the archive at url into install_dir can succeed, and how long it should take.
+
+    Sizes come from the archive's central directory (fetched with range requests), free space and
+    volumes from the filesystem, write speed from a short benchmark on each volume, and the
+    download rate from the mirror probes the download itself would use.
+    """
+
+    def __init__(self, url, install_dir: Path | str, mirrors=None, rate_limit=0, pipelined=True, cache_archive=False,
+                 temp_folder: Path | str = DOWNLOADS_FOLDER, cache_folder: Path | str = ARCHIVE_CACHE_FOLDER):
+        self.url = url
+        self.install_dir = Path(install_dir)
+        self.mirrors = list(dict.fromkeys([url, *(mirrors or [])]))
+        self.rate_limit = rate_limit  # bytes per second, 0 for unlimited
+        self.pipelined = pipelined
+        self.cache_archive = cache_archive  # whether the finished archive moves into the archive cache
+        self.temp_folder = Path(temp_folder)
+        self.cache_folder = Path(cache_folder)
+
+    async def run(self, is_cancelled=None):
+        """The PreflightReport, or None if is_cancelled() turns true while the write benchmarks run."""
+        logger.info(f"Running install preflight for {self.install_dir}")
+        reader, download_rate = await asyncio.gather(
+            RemoteZipReader(get_http_service().async_client(), self.url).open(),
+            self.probe_download_rate(),
+        )
+        compressed_size = reader.size
+        uncompressed_size = reader.total_uncompressed_size
+        partial = PartialDownload(self.url, self.temp_folder)
+        partial.load()
+        download_remaining = compressed_size - partial.completed_size if partial.total_size == compressed_size else compressed_size
+
+        cross_device = not same_volume(self.temp_folder, self.install_dir)
+        temp_free = free_space(self.temp_folder)
+        target_free = free_space(self.install_dir)
+        # The benchmarks run on threads, which cancelling the task leaves running, so they poll is_cancelled
+        target_write_speed = await asyncio.to_thread(benchmark_write, self.install_dir, is_cancelled=is_cancelled)
+        if target_write_speed is None:
+            return None
+        temp_write_speed = target_write_speed
+        if cross_device:
+            temp_write_speed = await asyncio.to_thread(benchmark_write, self.temp_folder, is_cancelled=is_cancelled)
+            if temp_write_speed is None:
+                return None
+
+        # The cached archive stays after the install. Moved within the downloads volume it takes no
+        # more than the download already does; anywhere else it is a copy that needs its own space.
+        cached_size = compressed_size if self.cache_archive else 0
+        cache_elsewhere = bool(cached_size) and not same_volume(self.cache_folder, self.temp_folder)
+        cache_on_target = cache_elsewhere and same_volume(self.cache_folder, self.install_dir)
+
+        problems = []
+        if cache_elsewhere and not cache_on_target:
+            cache_free = free_space(self.cache_folder)
+            if cached_size + SPACE_MARGIN > cache_free:
+                problems.append(f"Keeping the archive for reinstalls needs {format_size(cached_size)} in {self.cache_folder}, "
+                                f"only {format_size(cache_free)} is free")
+        if cross_device:
+            target_needed = uncompressed_size + (cached_size if cache_on_target else 0)
+            if download_remaining + SPACE_MARGIN > temp_free:
+                problems.append(f"The download needs {format_size(download_remaining)} in {self.temp_folder}, "
+                                f"only {format_size(temp_free)} is free")
+            if target_needed + SPACE_MARGIN > target_free:
+                problems.append(f"The install needs {format_size(target_needed)} in {self.install_dir}, "
+                                f"only {format_size(target_free)} is free")
+        elif download_remaining + uncompressed_size + SPACE_MARGIN > target_free:
+            # The archive and the extracted install are on the disk at the same time
+            problems.append(f"Downloading and installing needs {format_size(download_remaining + uncompressed_size)} "
+                            f"on the volume holding {self.install_dir}, only {format_size(target_free)} is free")
+
+        report = PreflightReport(
+            compressed_size, uncompressed_size, download_remaining, temp_free, target_free, cross_device,
+            temp_write_speed, target_write_speed, download_rate,
+            self.project_time(compressed_size, uncompressed_size, download_remaining, cross_device,
+                              temp_write_speed, target_write_speed, download_rate),
+            cached_size,
+            tuple(problems),
+        )
+        for problem in problems:
+            logger.warning(f"Preflight: {problem}")
+        logger.info(f"Preflight done: {report}")
+        return report
+
+    async def probe_download_rate(self):
+        registry = MirrorRegistry(self.mirrors)
+        ranked = await registry.probe_all()
+        probe = registry.probes.get(ranked[0])
+        rate = probe.throughput if probe and probe.ok else 0
+        if self.rate_limit:
+            rate = min(rate, self.rate_limit) if rate else self.rate_limit
+        return rate
+
+    def project_time(self, compressed_size, uncompressed_size, download_remaining, cross_device,
+                     temp_write_speed, target_write_speed, download_rate):
+        """Seconds from now until the game is installed.
+
+        Disk writes of the archive overlap the download. Extraction writes the whole install and,
+        on a shared volume, reads the archive back from the same disk; with pipelined extraction it
+        also runs alongside the download, so only the slower of the two counts.
+        """
+        if not download_rate:
+            return None
+        download_time = max(download_remaining / download_rate, download_remaining / temp_write_speed)
+        extract_bytes = uncompressed_size if cross_device else uncompressed_size + compressed_size
+        extract_time = extract_bytes / target_write_speed
+        return max(download_time, extract_time) if self.pipelined else download_time + extract_time
@@ -0,0 +1,194 @@
+import time
+from collections import deque
+from enum import Enum
+from typing import NamedTuple, Optional
+from PySide6.QtCore import QObject, Signal, Slot, QTimer
+
+
+class ProgressPhase(Enum):
+    DOWNLOADING = "downloading"
+    VERIFYING = "verifying"
+    EXTRACTING = "extracting"
+
+
+class ProgressSnapshot(NamedTuple):
+    phase: ProgressPhase
+    done: int  # bytes
+    total: int  # bytes, 0 when unknown
+    rate: float  # bytes per second
+    eta: Optional[float]  # seconds, None when it cannot be estimated
+    item: Optional[str] = None  # the file being worked on, when the worker reports one
+
+    @property
+    def percent(self):
+        if self.total <= 0:
+            return 0
+        return min(100, int(self.done * 100 / self.total))
+
+
+class ProgressCounter:
+    """Byte counters a worker updates on every chunk without signalling anything.
+
+    Only the worker writes and ProgressChannel only reads, and every update is a single attribute
+    assignment, so no lock is needed. The phase, total and starting point change together as one
+    tuple, so a reader never sees a new phase with the old total.
+    """
+
+    def __init__(self):
+        self.done = 0
+        self.item = None
+        self._phase = None  # (phase, total, started_at, done_at_start)
+
+    def start(self, phase, total=0, done=0):
+        self.done = done
+        self.item = None
+        self._phase = (phase, total, time.monotonic(), done)
+
+    @property
+    def phase(self):
+        return self._phase[0] if self._phase else None
+
+    @property
+    def started_at(self):
+        return self._phase[2] if self._phase else None
+
+    @property
+    def total(self):
+        return self._phase[1] if self._phase else 0
+
+    def set_total(self, total):
+        if self._phase:
+            phase, _, started_at, start_done = self._phase
+            self._phase = (phase, total, started_at, start_done)
+
+    def add(self, size):
+        self.done += size
+
+    def update(self, done, total, item=None):
+        """Callback form for the extraction and scan threads, which report (done, total) and maybe the current file."""
+        if self._phase and self._phase[1] != total:
+            self.set_total(total)
+        self.done = done
+        if item is not None:
+            self.item = item
+
+    def snapshot(self):
+        """The phase so far, with its average rate. ProgressChannel replaces rate and ETA with recent estimates."""
+        if self._phase is None:
+            return None
+        phase, total, started_at, start_done = self._phase
+        done = self.done
+        elapsed = time.monotonic() - started_at
+        rate = (done - start_done) / elapsed if elapsed > 0 else 0
+        eta = (total - done) / rate if rate > 0 and total > done else None
+        return ProgressSnapshot(phase, done, total, rate, eta, self.item)
+
+
+class ThroughputEstimator:
+    """Rate over a sliding window of recent progress, and an ETA smoothed so it does not jump around.
+
+    The rate only looks at the last WINDOW seconds, so it follows stalls and recoveries instead of
+    averaging over the whole download. Progress arrives in steps (a chunk, a batch of members), so
+    the window always keeps at least two samples; once nothing has arrived for a good deal longer
+    than the usual gap between steps, the rate decays towards zero as time passes.
+    """
+    WINDOW = 5.0  # seconds
+    STALL_FACTOR = 3  # a gap this many times the usual one counts as a stall
+    ETA_SMOOTHING = 0.1  # weight of each new ETA estimate against the running one
+
+    def __init__(self):
+        self.samples = deque()  # (time, done) whenever done changed
+        self.eta = None
+        self.eta_time = None
+
+    def reset(self, now, done):
+        self.samples = deque([(now, done)])
+        self.eta = None
+        self.eta_time = None
+
+    def add(self, now, done):
+        if not self.samples or done != self.samples[-1][1]:
+            self.samples.append((now, done))
+        while len(self.samples) > 2 and now - self.samples[1][0] >= self.WINDOW:
+            self.samples.popleft()
+
+    def rate(self, now):
+        if len(self.samples) < 2:
+            return 0
+        (first_time, first_done), (last_time, last_done) = self.samples[0], self.samples[-1]
+        span = last_time - first_time
+        usual_gap = span / (len(self.samples) - 1)
+        if now - last_time > max(usual_gap * self.STALL_FACTOR, 1):
+            span = now - first_time
+        return (last_done - first_done) / span if span > 0 else 0
+
+    def estimate_eta(self, now, remaining, rate):
+        if remaining <= 0:
+            self.eta = 0
+        elif rate <= 0:
+            self.eta = None
+        else:
+            estimate = remaining / rate
+            if self.eta is None:
+                self.eta = estimate
+            else:
+                # Count the running ETA down by the time passed, then pull it towards the new estimate
+                predicted = max(self.eta - (now - self.eta_time), 0)
+                self.eta = predicted + self.ETA_SMOOTHING * (estimate - predicted)
+        self.eta_time = now
+        return self.eta
+
+
+class ProgressChannel(QObject):
+    """Publishes the snapshot of the attached counter at FRAME_RATE, on the thread that owns the channel.
+
+    However fast a worker counts, the UI gets at most FRAME_RATE updates a second, and none at all
+    while nothing changes. Rate and ETA come from a ThroughputEstimator fed on every tick.
+    """
+    FRAME_RATE = 15  # snapshots per second
+    snapshot_ready = Signal(object)  # ProgressSnapshot
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.counter = None
+        self.last_snapshot = None
+        self.estimator = ThroughputEstimator()
+        self.estimator_started_at = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000 // self.FRAME_RATE)
+        self.timer.timeout.connect(self.publish)
+
+    def attach(self, counter):
+        self.counter = counter
+        self.last_snapshot = None
+        self.estimator_started_at = None
+        self.timer.start()
+
+    def detach(self):
+        """Publish the final state and stop polling."""
+        self.publish()
+        self.timer.stop()
+        self.counter = None
+
+    @Slot()
+    def publish(self):
+        snapshot = self.counter.snapshot() if self.counter else None
+        if snapshot is None:
+            return
+        now = time.monotonic()
+        if self.counter.started_at != self.estimator_started_at:
+            # A new phase (or a restart), earlier samples say nothing about it
+            self.estimator_started_at = self.counter.started_at
+            self.estimator.reset(now, snapshot.done)
+        else:
+            self.estimator.add(now, snapshot.done)
+        rate = self.estimator.rate(now)
+        eta = self.estimator.estimate_eta(now, snapshot.total - snapshot.done, rate) if snapshot.total else None
+        snapshot = snapshot._replace(rate=rate, eta=eta)
+
+        last = self.last_snapshot
+        if last and (last.phase, last.done, last.total, int(last.rate), last.eta is None, last.item) == \
+                (snapshot.phase, snapshot.done, snapshot.total, int(snapshot.rate), snapshot.eta is None, snapshot.item):
+            return
+        self.last_snapshot = snapshot
+        self.snapshot_ready.emit(snapshot)
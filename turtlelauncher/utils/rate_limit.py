@@ -0,0 +1,53 @@
+import asyncio
+import threading
+import time
+from loguru import logger
+
+
+class TokenBucket:
+    """Limits throughput to a number of bytes per second, shared by every connection of a download.
+
+    Tokens refill continuously up to one second's worth. A consumer may take more than is
+    available (a whole network chunk at once); the bucket then goes into debt and later consumers
+    wait for it to be paid back. The rate can be changed from any thread while transfers are
+    running, and a rate of 0 means unlimited.
+    """
+    MAX_WAIT = 0.25  # seconds, so rate changes take effect quickly
+
+    def __init__(self, rate=0):
+        self._lock = threading.Lock()
+        self.rate = rate
+        self.tokens = rate
+        self.last_refill = time.monotonic()
+
+    def set_rate(self, rate):
+        with self._lock:
+            if rate != self.rate:
+                logger.info(f"Download rate limit set to {f'{rate} B/s' if rate else 'unlimited'}")
+            self.rate = rate
+            self.tokens = min(self.tokens, rate)
+
+    @property
+    def limited(self):
+        return self.rate > 0
+
+    def _refill(self, now):
+        self.tokens = min(self.rate, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def _reserve(self, size):
+        """Take size tokens if the bucket is not in debt, otherwise return how long to wait."""
+        with self._lock:
+            now = time.monotonic()
+            if not self.rate:
+                self.last_refill = now
+                return 0
+            self._refill(now)
+            if self.tokens < 0:
+                return min(-self.tokens / self.rate, self.MAX_WAIT)
+            self.tokens -= size
+            return 0
+
+    async def consume(self, size):
+        while (delay := self._reserve(size)) > 0:
+            await asyncio.sleep(delay)
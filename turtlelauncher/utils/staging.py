@@ -0,0 +1,157 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from loguru import logger
+from turtlelauncher.utils.zip_extract import ExtractionCancelled
+
+
+STAGING_NAME = ".turtlelauncher-staging"
+PREVIOUS_NAME = ".turtlelauncher-previous"
+
+
+def _fsync_path(path: Path):
+    if path.is_dir():
+        if os.name == 'nt':
+            return  # directories cannot be opened for fsync on Windows
+        fd = os.open(path, os.O_RDONLY)
+    else:
+        fd = os.open(path, os.O_RDWR | getattr(os, 'O_BINARY', 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class StagedInstall:
+    """An install built next to the live one and swapped in with directory renames.
+
+    Extraction writes below staging_path, a hidden folder inside install_root so it sits on the
+    same filesystem. promote() moves every top-level entry (normally the one game folder) into
+    install_root, first moving whatever it replaces into previous_path. Each rename is atomic, so
+    check_game_installation only ever sees the old install or the complete new one, and
+    rollback() can put the previous install back without copying anything.
+
+    Reinstalls are staged the same way: link_live() first fills staging with hard links to the live
+    files, then extraction replaces only the members that differ, each with a new file rather than
+    writing through a link. The live install is never touched until promote(), and previous_path
+    keeps it whole while costing only the space of the files that changed.
+    """
+    SYNC_BATCH = 256  # files per fsync batch
+    SYNC_WORKERS = 8
+
+    def __init__(self, install_root: Path | str):
+        self.install_root = Path(install_root)
+        self.staging_path = self.install_root / STAGING_NAME
+        self.previous_path = self.install_root / PREVIOUS_NAME
+
+    def prepare(self):
+        """Create an empty staging folder, dropping whatever an interrupted attempt left there."""
+        self.discard()
+        self.staging_path.mkdir(parents=True)
+        logger.info(f"Staging install in {self.staging_path}")
+        return self.staging_path
+
+    def link_live(self, names, is_cancelled=None):
+        """Fill staging with hard links to the live entries names, returning how many files were linked.
+
+        A file that cannot be linked (a filesystem without hard links) is copied instead.
+        """
+        linked = copied = 0
+        for name in names:
+            source_root = self.install_root / name
+            if not source_root.is_dir():
+                continue
+            for folder, _, files in os.walk(source_root):
+                if is_cancelled and is_cancelled():
+                    raise ExtractionCancelled()
+                target_folder = self.staging_path / Path(folder).relative_to(self.install_root)
+                target_folder.mkdir(parents=True, exist_ok=True)
+                for file in files:
+                    try:
+                        os.link(Path(folder) / file, target_folder / file, follow_symlinks=False)
+                        linked += 1
+                    except OSError:
+                        shutil.copy2(Path(folder) / file, target_folder / file, follow_symlinks=False)
+                        copied += 1
+        logger.info(f"Staged the live install as {linked} hard links and {copied} copies")
+        return linked + copied
+
+    def sync(self, is_cancelled=None):
+        """Flush every staged file (then the folders) to disk before promote() makes them live."""
+        files = []
+        folders = []
+        for path in self.staging_path.rglob('*'):
+            if path.is_dir():
+                folders.append(path)
+            elif path.stat().st_nlink == 1:
+                # More links means a file link_live() staged, which the live install already has on disk
+                files.append(path)
+        logger.info(f"Syncing {len(files)} staged files to disk")
+        with ThreadPoolExecutor(max_workers=self.SYNC_WORKERS, thread_name_prefix="install-sync") as pool:
+            for start in range(0, len(files), self.SYNC_BATCH):
+                if is_cancelled and is_cancelled():
+                    raise ExtractionCancelled()
+                list(pool.map(_fsync_path, files[start:start + self.SYNC_BATCH]))
+            # Deepest first, so a folder is synced after the entries it holds
+            list(pool.map(_fsync_path, sorted(folders, key=lambda path: len(path.parts), reverse=True)))
+        _fsync_path(self.staging_path)
+
+    def promote(self):
+        """Swap the staged entries into install_root, keeping what they replace in previous_path."""
+        names = [entry.name for entry in self.staging_path.iterdir()]
+        if not names:
+            raise FileNotFoundError(f"Nothing staged in {self.staging_path}")
+        if self.previous_path.exists():
+            shutil.rmtree(self.previous_path)
+
+        promoted = []  # (name, whether an older entry was moved aside)
+        try:
+            for name in names:
+                target = self.install_root / name
+                replaced = target.exists()
+                if replaced:
+                    # Only created when something is displaced, so a fresh install leaves nothing behind
+                    self.previous_path.mkdir(exist_ok=True)
+                    os.rename(target, self.previous_path / name)
+                try:
+                    os.rename(self.staging_path / name, target)
+                except OSError:
+                    if replaced:
+                        os.rename(self.previous_path / name, target)
+                    raise
+                promoted.append((name, replaced))
+        except OSError as e:
+            logger.error(f"Promoting staged install failed ({e}), restoring the previous one")
+            for name, replaced in reversed(promoted):
+                os.rename(self.install_root / name, self.staging_path / name)
+                if replaced:
+                    os.rename(self.previous_path / name, self.install_root / name)
+            raise
+
+        self.staging_path.rmdir()
+        _fsync_path(self.install_root)
+        logger.info(f"Promoted staged install: {', '.join(names)}")
+        return names
+
+    def rollback(self):
+        """Put the install replaced by the last promote() back, returning whether there was one."""
+        if not self.previous_path.is_dir() or not any(self.previous_path.iterdir()):
+            logger.warning(f"No previous install to roll back to in {self.previous_path}")
+            return False
+        self.discard()
+        self.staging_path.mkdir()
+        for entry in list(self.previous_path.iterdir()):
+            target = self.install_root / entry.name
+            if target.exists():
+                os.rename(target, self.staging_path / entry.name)
+            os.rename(entry, target)
+            logger.info(f"Rolled back {target}")
+        self.previous_path.rmdir()
+        self.discard()
+        return True
+
+    def discard(self):
+        if self.staging_path.exists():
+            shutil.rmtree(self.staging_path, ignore_errors=True)
+            logger.info(f"Removed staging folder {self.staging_path}")
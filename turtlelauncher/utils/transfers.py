@@ -0,0 +1,273 @@
+import inspect
+import itertools
+from enum import Enum
+from PySide6.QtCore import QObject, Signal, Slot, QRunnable, QThreadPool
+from loguru import logger
+from turtlelauncher.utils.async_loop import get_async_loop
+
+
+class JobClass(Enum):
+    GAME = 1  # client downloads and updates, large and long running
+    ADDON = 2  # addon installs and update checks
+    MEDIA = 3  # images and other small fetches the UI is waiting on
+
+
+class JobState(Enum):
+    QUEUED = 1
+    RUNNING = 2
+    PAUSED = 3
+    FINISHED = 4
+    FAILED = 5
+    CANCELLED = 6
+
+
+class TransferJob(QObject):
+    """One unit of work for the TransferScheduler.
+
+    create_worker is called every time the job (re)starts and must return an object with run()
+    and cancel(). Pausing cancels the running worker; resuming creates a fresh one, so workers that
+    keep their progress on disk (DownloadExtractWorker) pick up where they stopped.
+    """
+    state_changed = Signal(object)  # JobState
+    progress_updated = Signal(int, str)  # (percent, detail)
+    completed = Signal(object)  # result of the worker, emitted when the job finishes normally
+
+    def __init__(self, job_class, create_worker, priority=0, name=""):
+        super().__init__()
+        self.job_class = job_class
+        self.create_worker = create_worker
+        self.priority = priority
+        self.name = name or job_class.name.lower()
+        self.state = JobState.QUEUED
+        self.percent = 0
+        self.detail = ""
+        self.worker = None
+        self.result = None
+        self.sequence = 0
+        self._stop_state = None  # state to end in when the running worker returns
+
+    def set_state(self, state):
+        if state != self.state:
+            self.state = state
+            self.state_changed.emit(state)
+
+    def set_progress(self, percent, detail=""):
+        """Safe to call from the worker thread."""
+        self.percent = percent
+        self.detail = detail
+        self.progress_updated.emit(percent, detail)
+
+    @property
+    def is_active(self):
+        return self.state in (JobState.QUEUED, JobState.RUNNING)
+
+    @property
+    def is_finished(self):
+        return self.state in (JobState.FINISHED, JobState.FAILED, JobState.CANCELLED)
+
+    def __repr__(self):
+        return f"<TransferJob {self.name} {self.job_class.name} priority={self.priority} {self.state.name}>"
+
+
+class FunctionWorker:
+    """Runs a function, or a coroutine function as a task on the shared event loop, as a scheduler worker.
+
+    With cancellable, the function is also passed is_cancelled, a callable to poll: cancelling the
+    task cannot stop a plain function, nor work a coroutine hands to a thread.
+    """
+
+    def __init__(self, function, *args, cancellable=False, **kwargs):
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        if cancellable:
+            self.kwargs['is_cancelled'] = lambda: self.is_cancelled
+        self.is_cancelled = False
+        self.task = None
+
+    def run(self):
+        if self.is_cancelled:
+            return None
+        if inspect.iscoroutinefunction(self.function):
+            self.task = get_async_loop().submit(self.function(*self.args, **self.kwargs), name=self.function.__name__)
+            if self.is_cancelled:
+                # cancel() ran before the task was assigned, so it could not cancel it
+                self.task.cancel()
+            return self.task.wait()
+        return self.function(*self.args, **self.kwargs)
+
+    def cancel(self):
+        self.is_cancelled = True
+        if self.task:
+            self.task.cancel()
+
+
+class JobRunnerSignals(QObject):
+    finished = Signal(object, object, bool)  # (job, result, succeeded)
+
+
+class JobRunner(QRunnable):
+    def __init__(self, job, worker):
+        super().__init__()
+        self.job = job
+        self.worker = worker
+        self.signals = JobRunnerSignals()
+
+    def run(self):
+        result = None
+        succeeded = False
+        try:
+            result = self.worker.run()
+            succeeded = True
+        except Exception as e:
+            if getattr(self.worker, "is_cancelled", False):
+                logger.info(f"Transfer job {self.job.name} stopped: {e!r}")
+            else:
+                logger.exception(f"Transfer job {self.job.name} failed: {e}")
+        finally:
+            self.signals.finished.emit(self.job, result, succeeded)
+
+
+class TransferScheduler(QObject):
+    """Runs every transfer in the launcher on one thread pool.
+
+    Each job class has its own concurrency limit and the pool is sized to their sum, so a game
+    download can never occupy the threads that image fetches and addon checks need. Within a class,
+    queued jobs start in priority order (higher first), then in the order they were submitted.
+    """
+    CLASS_LIMITS = {
+        JobClass.GAME: 1,
+        JobClass.ADDON: 2,
+        JobClass.MEDIA: 4,
+    }
+    job_added = Signal(object)
+    job_finished = Signal(object)
+
+    def __init__(self, class_limits=None):
+        super().__init__()
+        self.class_limits = dict(class_limits or self.CLASS_LIMITS)
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(sum(self.class_limits.values()))
+        self.jobs = []
+        self._running = {job_class: set() for job_class in JobClass}
+        self._runners = {}
+        self._sequence = itertools.count()
+        logger.info(f"TransferScheduler initialized with limits {', '.join(f'{c.name}={n}' for c, n in self.class_limits.items())}")
+
+    def submit(self, job):
+        job.sequence = next(self._sequence)
+        job.set_state(JobState.QUEUED)
+        self.jobs.append(job)
+        logger.info(f"Queued {job}")
+        self.job_added.emit(job)
+        self._dispatch()
+        return job
+
+    def pause(self, job):
+        if job.state == JobState.QUEUED:
+            job.set_state(JobState.PAUSED)
+        elif job.state == JobState.RUNNING:
+            self._stop(job, JobState.PAUSED)
+        logger.info(f"Paused {job}")
+
+    def resume(self, job):
+        if job.state == JobState.RUNNING and job._stop_state == JobState.PAUSED:
+            # Still winding down from a pause: start it again as soon as it has stopped
+            job._stop_state = JobState.QUEUED
+        elif job.state == JobState.PAUSED:
+            job.sequence = next(self._sequence)
+            job.set_state(JobState.QUEUED)
+            logger.info(f"Resumed {job}")
+            if job not in self.jobs:
+                self.jobs.append(job)
+            self._dispatch()
+
+    def cancel(self, job):
+        if job.state in (JobState.QUEUED, JobState.PAUSED):
+            job.set_state(JobState.CANCELLED)
+            self._forget(job)
+        elif job.state == JobState.RUNNING:
+            self._stop(job, JobState.CANCELLED)
+        logger.info(f"Cancelled {job}")
+
+    def reprioritize(self, job, priority):
+        logger.info(f"Changing priority of {job} to {priority}")
+        job.priority = priority
+        self._dispatch()
+
+    def pause_all(self, job_class=None):
+        for job in list(self.jobs):
+            if job.is_active and (job_class is None or job.job_class == job_class):
+                self.pause(job)
+
+    def active_jobs(self, job_class=None):
+        return [job for job in self.jobs if job.is_active and (job_class is None or job.job_class == job_class)]
+
+    def _stop(self, job, state):
+        job._stop_state = state
+        if job.worker:
+            job.worker.cancel()
+
+    def _forget(self, job):
+        if job in self.jobs:
+            self.jobs.remove(job)
+
+    def _dispatch(self):
+        queued = sorted((job for job in self.jobs if job.state == JobState.QUEUED), key=lambda job: (-job.priority, job.sequence))
+        for job in queued:
+            running = self._running[job.job_class]
+            if len(running) < self.class_limits.get(job.job_class, 1):
+                self._start(job)
+
+    def _start(self, job):
+        try:
+            job.worker = job.create_worker()
+        except Exception as e:
+            logger.exception(f"Could not create worker for {job}: {e}")
+            job.set_state(JobState.FAILED)
+            self._forget(job)
+            self.job_finished.emit(job)
+            return
+        job._stop_state = None
+        runner = JobRunner(job, job.worker)
+        runner.signals.finished.connect(self.on_runner_finished)
+        self._runners[job] = runner  # keep the signals object alive until the runner reports back
+        self._running[job.job_class].add(job)
+        job.set_state(JobState.RUNNING)
+        logger.info(f"Starting {job}")
+        self.thread_pool.start(runner)
+
+    @Slot(object, object, bool)
+    def on_runner_finished(self, job, result, succeeded):
+        self._running[job.job_class].discard(job)
+        self._runners.pop(job, None)
+        job.worker = None
+
+        if job._stop_state == JobState.PAUSED:
+            job.set_state(JobState.PAUSED)
+        elif job._stop_state == JobState.QUEUED:
+            job.sequence = next(self._sequence)
+            job.set_state(JobState.QUEUED)
+        elif job._stop_state == JobState.CANCELLED:
+            job.set_state(JobState.CANCELLED)
+            self._forget(job)
+        else:
+            job.result = result
+            job.set_state(JobState.FINISHED if succeeded else JobState.FAILED)
+            self._forget(job)
+            if succeeded:
+                job.completed.emit(result)
+        logger.info(f"Finished {job}")
+        self.job_finished.emit(job)
+        self._dispatch()
+
+
+scheduler_instance = None
+
+
+def get_transfer_scheduler():
+    """The scheduler shared by the whole launcher, created on first use."""
+    global scheduler_instance
+    if scheduler_instance is None:
+        scheduler_instance = TransferScheduler()
+    return scheduler_instance
@@ -0,0 +1,337 @@
+import struct
+import threading
+import zipfile
+import zlib
+from pathlib import Path
+from loguru import logger
+from turtlelauncher.utils.zip_extract import ParallelZipExtractor, safe_member_path
+
+
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+CENTRAL_HEADER_SIGNATURE = b'PK\x01\x02'
+END_OF_CENTRAL_DIR_SIGNATURE = b'PK\x05\x06'
+DATA_DESCRIPTOR_SIGNATURE = b'PK\x07\x08'
+LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+ZIP64_EXTRA_ID = 0x0001
+END_OF_MEMBERS = "reached central directory"
+
+FLAG_ENCRYPTED = 0x01
+FLAG_DATA_DESCRIPTOR = 0x08
+FLAG_UTF8 = 0x800
+
+
+class UnsupportedStreamingMember(Exception):
+    pass
+
+
+class StreamingZipExtractor:
+    """Extracts a zip archive while it is still being downloaded.
+
+    The downloader calls advance() whenever the contiguous prefix of the archive on disk grows;
+    run() (on its own thread) follows that prefix, parses local file headers and inflates each
+    member as soon as its data is available. Members it cannot stream (encryption, unusual
+    compression, stored data with a trailing descriptor) are left for validate(), which checks
+    everything against the central directory once the download is complete.
+    """
+    READ_SIZE = 1024 * 1024  # 1 MB
+
+    def __init__(self, archive_path, extract_path):
+        self.archive_path = Path(archive_path)
+        self.extract_path = Path(extract_path)
+        self.extracted = {}  # filename -> (crc, file_size)
+        self.extracted_folder = None
+        self.stopped_reason = None
+
+        self._available = 0
+        self._input_finished = False
+        self._cancelled = False
+        self._condition = threading.Condition()
+        self._buffer = bytearray()
+        self._offset = 0  # archive offset of the start of self._buffer
+        self._member = None
+        self.hasher = None  # optional StreamingHasher fed from the same sequential reads
+
+    def advance(self, available):
+        with self._condition:
+            if available > self._available:
+                self._available = available
+                self._condition.notify()
+
+    def finish_input(self):
+        with self._condition:
+            self._input_finished = True
+            self._condition.notify()
+
+    def cancel(self):
+        with self._condition:
+            self._cancelled = True
+            self._condition.notify()
+
+    def run(self):
+        logger.info(f"Starting pipelined extraction of {self.archive_path} to {self.extract_path}")
+        f = None
+        read_offset = 0
+        try:
+            # Once streaming stops the prefix is still followed for the hasher, if there is one
+            while self.stopped_reason is None or self.hasher is not None:
+                with self._condition:
+                    while not self._cancelled and self._available <= read_offset and not self._input_finished:
+                        self._condition.wait()
+                    if self._cancelled:
+                        return
+                    available = self._available
+                if available <= read_offset:
+                    break
+
+                # Opened lazily: the archive file may not exist until the first bytes arrive. Unbuffered,
+                # since a buffered read past available would cache bytes the downloader has not written yet
+                if f is None:
+                    f = self.archive_path.open('rb', buffering=0)
+                data = self._read_at(f, read_offset, min(self.READ_SIZE, available - read_offset))
+                if self.hasher:
+                    self.hasher.update_at(read_offset, data)
+                read_offset += len(data)
+                if self.stopped_reason is None:
+                    self._buffer += data
+                    self._stream()
+        finally:
+            if f is not None:
+                f.close()
+            if self._member:
+                self._member['file'].close()
+                self._member = None
+
+        if self.stopped_reason and self.stopped_reason != END_OF_MEMBERS:
+            logger.info(f"Pipelined extraction stopped early ({self.stopped_reason}), remaining members will be extracted after download")
+        logger.info(f"Pipelined extraction streamed {len(self.extracted)} members")
+
+    @staticmethod
+    def _read_at(f, offset, size):
+        """Exactly size bytes at offset; a raw read may return fewer than asked for."""
+        f.seek(offset)
+        parts = []
+        remaining = size
+        while remaining > 0:
+            data = f.read(remaining)
+            if not data:
+                raise EOFError(f"Archive ends before offset {offset + size}")
+            parts.append(data)
+            remaining -= len(data)
+        return b''.join(parts)
+
+    def _stream(self):
+        try:
+            self._process()
+        except (UnsupportedStreamingMember, zipfile.BadZipFile, zlib.error) as e:
+            # Whatever was not streamed is extracted by validate() once the download is complete
+            self.stopped_reason = str(e)
+            self._buffer.clear()
+            if self._member:
+                self._member['file'].close()
+                self._member = None
+
+    def _consume(self, size):
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        self._offset += size
+        return data
+
+    def _process(self):
+        while self.stopped_reason is None:
+            if self._member is None:
+                if not self._read_local_header():
+                    return
+            elif self._member['state'] == 'data':
+                if not self._read_member_data():
+                    return
+            elif not self._read_data_descriptor():
+                return
+
+    def _read_local_header(self):
+        if len(self._buffer) < 4:
+            return False
+        signature = bytes(self._buffer[:4])
+        if signature in (CENTRAL_HEADER_SIGNATURE, END_OF_CENTRAL_DIR_SIGNATURE):
+            self.stopped_reason = END_OF_MEMBERS
+            return False
+        if signature != LOCAL_HEADER_SIGNATURE:
+            raise UnsupportedStreamingMember(f"unexpected signature {signature!r} at offset {self._offset}")
+        if len(self._buffer) < LOCAL_HEADER.size:
+            return False
+        (_, _, flags, method, _, _, crc, compressed_size, file_size,
+         name_length, extra_length) = LOCAL_HEADER.unpack_from(self._buffer)
+        header_size = LOCAL_HEADER.size + name_length + extra_length
+        if len(self._buffer) < header_size:
+            return False
+
+        header = self._consume(header_size)
+        raw_name = header[LOCAL_HEADER.size:LOCAL_HEADER.size + name_length]
+        filename = raw_name.decode('utf-8' if flags & FLAG_UTF8 else 'cp437')
+        extra = header[LOCAL_HEADER.size + name_length:]
+
+        zip64 = False
+        if compressed_size == 0xFFFFFFFF or file_size == 0xFFFFFFFF:
+            zip64 = True
+            file_size, compressed_size = self._parse_zip64_extra(extra, file_size, compressed_size)
+
+        if flags & FLAG_ENCRYPTED:
+            raise UnsupportedStreamingMember(f"{filename} is encrypted")
+        if method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise UnsupportedStreamingMember(f"{filename} uses compression method {method}")
+        has_descriptor = bool(flags & FLAG_DATA_DESCRIPTOR)
+        is_directory = filename.endswith('/')
+        if has_descriptor and method == zipfile.ZIP_STORED and not is_directory:
+            raise UnsupportedStreamingMember(f"{filename} is stored with a data descriptor")
+
+        if not self.extracted_folder and not filename.startswith('__MACOSX'):
+            self.extracted_folder = filename.split('/')[0]
+
+        target = safe_member_path(self.extract_path, filename)
+        if target is None or is_directory:
+            if target is not None:
+                target.mkdir(parents=True, exist_ok=True)
+            self.extracted[filename] = (0, 0)
+            # Directories have no data but may still be followed by a descriptor
+            if has_descriptor:
+                self._member = {'state': 'descriptor', 'filename': filename, 'file': _NullFile(),
+                                'crc': 0, 'written': 0, 'zip64': zip64, 'expected_crc': crc}
+            return True
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        self._member = {
+            'state': 'data',
+            'filename': filename,
+            'file': target.open('wb'),
+            'method': method,
+            'decompressor': zlib.decompressobj(-15) if method == zipfile.ZIP_DEFLATED else None,
+            'remaining': None if has_descriptor else compressed_size,
+            'has_descriptor': has_descriptor,
+            'zip64': zip64,
+            'expected_crc': crc,
+            'expected_size': file_size,
+            'crc': 0,
+            'written': 0,
+        }
+        return True
+
+    @staticmethod
+    def _parse_zip64_extra(extra, file_size, compressed_size):
+        position = 0
+        while position + 4 <= len(extra):
+            header_id, size = struct.unpack_from('<2H', extra, position)
+            if header_id == ZIP64_EXTRA_ID:
+                values = list(struct.unpack_from(f'<{size // 8}Q', extra, position + 4))
+                if file_size == 0xFFFFFFFF and values:
+                    file_size = values.pop(0)
+                if compressed_size == 0xFFFFFFFF and values:
+                    compressed_size = values.pop(0)
+                break
+            position += 4 + size
+        return file_size, compressed_size
+
+    def _write(self, data):
+        if data:
+            member = self._member
+            member['file'].write(data)
+            member['crc'] = zlib.crc32(data, member['crc'])
+            member['written'] += len(data)
+
+    def _read_member_data(self):
+        member = self._member
+        if not self._buffer and member['remaining'] != 0:
+            return False
+
+        take = len(self._buffer) if member['remaining'] is None else min(len(self._buffer), member['remaining'])
+        data = self._consume(take)
+        if member['remaining'] is not None:
+            member['remaining'] -= take
+
+        decompressor = member['decompressor']
+        if decompressor is None:
+            self._write(data)
+            finished = member['remaining'] == 0
+        else:
+            self._write(decompressor.decompress(data))
+            if decompressor.eof:
+                leftover = decompressor.unused_data
+                if leftover:
+                    # We read past the end of the deflate stream; hand those bytes back
+                    self._buffer[:0] = leftover
+                    self._offset -= len(leftover)
+                finished = True
+            else:
+                finished = member['remaining'] == 0
+                if finished:
+                    self._write(decompressor.flush())
+
+        if not finished:
+            return False
+
+        if member['has_descriptor']:
+            member['state'] = 'descriptor'
+        else:
+            self._finish_member(member['expected_crc'])
+        return True
+
+    def _read_data_descriptor(self):
+        member = self._member
+        sizes_length = 16 if member['zip64'] else 8
+        if len(self._buffer) < 4:
+            return False
+        has_signature = bytes(self._buffer[:4]) == DATA_DESCRIPTOR_SIGNATURE
+        needed = (4 if has_signature else 0) + 4 + sizes_length
+        if len(self._buffer) < needed:
+            return False
+        descriptor = self._consume(needed)
+        crc, = struct.unpack_from('<L', descriptor, 4 if has_signature else 0)
+        self._finish_member(crc)
+        return True
+
+    def _finish_member(self, expected_crc):
+        member = self._member
+        member['file'].close()
+        self._member = None
+        if member['crc'] != expected_crc:
+            logger.warning(f"CRC mismatch while streaming {member['filename']}, it will be re-extracted")
+            return
+        self.extracted[member['filename']] = (member['crc'], member['written'])
+
+    def validate(self, progress_callback=None, is_cancelled=None):
+        """Check every streamed member against the central directory and extract whatever is missing."""
+        logger.info("Validating pipelined extraction against the central directory")
+        with zipfile.ZipFile(self.archive_path, 'r') as zip_ref:
+            infos = zip_ref.infolist()
+            missing = []
+            for info in infos:
+                if info.is_dir():
+                    continue
+                if self.extracted.get(info.filename) != (info.CRC, info.file_size):
+                    missing.append(info)
+
+            central_names = {info.filename for info in infos}
+            for filename in self.extracted:
+                if filename not in central_names:
+                    logger.warning(f"Streamed member {filename} is not listed in the central directory")
+
+            if missing:
+                logger.info(f"Extracting {len(missing)} members that could not be streamed")
+                ParallelZipExtractor(self.archive_path, self.extract_path).extract(missing, progress_callback, is_cancelled)
+                for info in missing:
+                    self.extracted[info.filename] = (info.CRC, info.file_size)
+
+            if not self.extracted_folder:
+                for info in infos:
+                    if not info.filename.startswith('__MACOSX'):
+                        self.extracted_folder = info.filename.split('/')[0]
+                        break
+
+        logger.info("Pipelined extraction validated")
+        return self.extracted_folder
+
+
+class _NullFile:
+    def write(self, data):
+        pass
+
+    def close(self):
+        pass
@@ -3,9 +3,10 @@ from PySide6.QtWidgets import (QVBoxLayout, QHBoxLayout, QLabel,
                                QFrame, QPushButton)
 from PySide6.QtGui import QPixmap, QFont, QCursor
 from PySide6.QtCore import Qt, QSize, Signal
-from PySide6.QtNetwork import QNetworkAccessManager, QNetworkRequest
 from pathlib import Path
 from loguru import logger
+from turtlelauncher.utils.http_service import get_http_service
+from turtlelauncher.utils.transfers import TransferJob, JobClass, FunctionWorker, get_transfer_scheduler
 
 HERE = Path(__file__).parent
 ASSETS = HERE.parent.parent / "assets"
@@ -76,15 +77,22 @@ class TweetWidget(QFrame):
                 }
             """)
             
-            self.nam = QNetworkAccessManager()
-            self.nam.finished.connect(self.set_image)
-            self.nam.get(QNetworkRequest(tweet_data['image_url']))
+            image_url = tweet_data['image_url']
+            self.image_job = TransferJob(JobClass.MEDIA, lambda: FunctionWorker(self.fetch_image, image_url), name=f"image {image_url}")
+            self.image_job.completed.connect(self.set_image)
+            get_transfer_scheduler().submit(self.image_job)
             
             layout.addWidget(self.image_label)
 
-    def set_image(self, reply):
+    @staticmethod
+    def fetch_image(url):
+        response = get_http_service().client().get(url)
+        response.raise_for_status()
+        return response.content
+
+    def set_image(self, data):
         pixmap = QPixmap()
-        pixmap.loadFromData(reply.readAll())
+        pixmap.loadFromData(data)
         scaled_pixmap = pixmap.scaled(self.image_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
         self.image_label.setIcon(scaled_pixmap)
         self.image_label.setIconSize(self.image_label.size())
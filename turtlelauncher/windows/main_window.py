@@ -7,10 +7,18 @@ from turtlelauncher.components.launcher import LauncherWidget
 from turtlelauncher.widgets.image_overlay import ImageOverlay
 from turtlelauncher.components.header import HeaderWidget
 from turtlelauncher.utils.config import Config
-from turtlelauncher.utils.globals import TOOL_FOLDER, IMAGES, FONTS, DATA, DOWNLOAD_URL
+from turtlelauncher.utils.globals import TOOL_FOLDER, IMAGES, FONTS, DATA, DOWNLOAD_URL, DOWNLOAD_MIRRORS, CLIENT_MANIFEST_URL
 from turtlelauncher.dialogs.first_launch import FirstLaunchDialog
 from turtlelauncher.dialogs.install_directory import InstallationDirectoryDialog
-from turtlelauncher.utils.downloader import DownloadExtractUtility
+from turtlelauncher.utils.transfers import TransferJob, JobClass, JobState, FunctionWorker, get_transfer_scheduler
+from turtlelauncher.utils.preflight import InstallPreflight
+from turtlelauncher.utils.dedup import InstallDeduplicator
+from turtlelauncher.utils.downloader import DownloadExtractWorker
+from turtlelauncher.utils.staging import StagedInstall
+from turtlelauncher.dialogs.generic_confirmation import GenericConfirmationDialog
+from turtlelauncher.dialogs import show_success_dialog
+from turtlelauncher.utils.http_service import get_http_service
+from turtlelauncher.utils.async_loop import get_async_loop
 from turtlelauncher.utils.game_utils import check_game_installation, get_game_version, update_game_install_dir
 from pathlib import Path
 from loguru import logger
@@ -61,13 +69,9 @@ class TurtleWoWLauncher(QMainWindow):
             logger.warning("Config does not exist or failed to load")
             self.config.game_install_dir = None
 
-        # Initialize the DownloadExtractUtility
-        self.download_utility = DownloadExtractUtility()
-        self.download_utility.download_completed.connect(self.on_download_completed)
-        self.download_utility.extraction_completed.connect(self.on_extraction_completed)
-        self.download_utility.error_occurred.connect(self.on_error)
-        
         self.setup_ui()
+        # Downloads go through the launcher widget, share its utility rather than running a second one
+        self.download_utility = self.launcher_widget.download_utility
         self.setup_tray_icon()
         
         # Use QTimer to check for first launch after the main window is shown
@@ -313,9 +317,50 @@ class TurtleWoWLauncher(QMainWindow):
         settings_dialog = SettingsDialog(self, check_game_installation(self.config.game_install_dir, self.config.selected_binary), self.config)
         settings_dialog.particles_setting_changed.connect(self.launcher_widget.on_particles_setting_changed)
         settings_dialog.language_changed.connect(self.on_language_changed)
+        settings_dialog.adaptive_throttling_changed.connect(lambda _: self.launcher_widget.apply_rate_limit())
+        settings_dialog.lan_seeding_changed.connect(lambda _: self.launcher_widget.apply_lan_settings())
+        settings_dialog.verify_repair_requested.connect(self.verify_and_repair)
+        settings_dialog.update_requested.connect(self.update_game)
+        settings_dialog.deduplicate_requested.connect(self.deduplicate_installs)
         settings_dialog.exec()
         logger.debug("Settings dialog closed")
     
+    def verify_and_repair(self):
+        if self.launcher_widget.is_downloading:
+            logger.warning("A transfer is already running, not starting verify and repair")
+            return
+        self.launcher_widget.start_repair(DOWNLOAD_URL, CLIENT_MANIFEST_URL)
+
+    def update_game(self):
+        """Bring the install up to date with the published client manifest, downloading only what changed."""
+        if self.launcher_widget.is_downloading:
+            logger.warning("A transfer is already running, not starting the update")
+            return
+        self.launcher_widget.start_update(CLIENT_MANIFEST_URL)
+
+    def deduplicate_installs(self):
+        """Link identical files of the main and extra installs together in the background."""
+        if self.launcher_widget.is_downloading:
+            logger.warning("A transfer is already running, not deduplicating installs")
+            return
+        deduplicator = InstallDeduplicator([self.config.game_install_dir, *self.config.extra_install_dirs])
+        self.dedup_job = TransferJob(JobClass.GAME, lambda: FunctionWorker(deduplicator.run, cancellable=True), name="deduplicate installs")
+        self.dedup_job.completed.connect(self.on_deduplication_completed)
+        self.dedup_job.state_changed.connect(self.on_deduplication_state_changed)
+        get_transfer_scheduler().submit(self.dedup_job)
+
+    def on_deduplication_state_changed(self, state):
+        if state == JobState.FAILED:
+            InstallationStatusDialog(self, "error", self.tr("Deduplicating the installs failed, see the logs for details.")).exec()
+
+    def on_deduplication_completed(self, result):
+        if result is None:
+            return  # cancelled
+        message = self.tr("{} files now share their data with an identical file, saving {}.").format(
+            result.reflinked + result.hardlinked, DownloadExtractWorker.format_size(result.saved_size)
+        )
+        show_success_dialog(self, self.tr("Installs Deduplicated"), message)
+
     def on_language_changed(self, language):
         logger.info(f"Updating launcher language to: {language}")
         self.config.language = language
@@ -402,11 +447,67 @@ class TurtleWoWLauncher(QMainWindow):
         install_dir = self.config.game_install_dir
         if install_dir:
             logger.debug(f"Game will be downloaded to: {install_dir}")
-            self.launcher_widget.start_download(DOWNLOAD_URL, install_dir)
+            self.run_install_preflight(install_dir)
         else:
             logger.debug("No installation directory selected")
             self.close()
 
+    def run_install_preflight(self, install_dir):
+        """Check free space and disk speed for install_dir in the background, then let the user confirm the download."""
+        self.launcher_widget.show_progress_widgets()
+        self.launcher_widget.progress_label.setText(self.tr("Checking installation directory..."))
+        preflight = InstallPreflight(
+            DOWNLOAD_URL, install_dir, DOWNLOAD_MIRRORS + self.config.download_mirrors,
+            self.config.download_rate_limit * 1024, self.config.pipelined_extraction, self.config.archive_cache_limit > 0
+        )
+        self.preflight_job = TransferJob(JobClass.GAME, lambda: FunctionWorker(preflight.run, cancellable=True), name="install preflight")
+        self.preflight_job.completed.connect(self.on_preflight_completed)
+        self.preflight_job.state_changed.connect(self.on_preflight_state_changed)
+        get_transfer_scheduler().submit(self.preflight_job)
+
+    def on_preflight_state_changed(self, state):
+        if state == JobState.FAILED:
+            # The checks are advisory; the download reports its own errors if the server is unreachable
+            logger.warning("Install preflight failed, downloading without it")
+            self.start_game_download()
+
+    def on_preflight_completed(self, report):
+        if report is None:
+            return  # cancelled
+        if not report.ok:
+            InstallationStatusDialog(self, "error", "\n".join(report.problems)).exec()
+            self.cancel_setup()
+            return
+
+        format_size = DownloadExtractWorker.format_size
+        details = [
+            self.tr("Download: {}").format(format_size(report.download_remaining)),
+            self.tr("Installed size: {}").format(format_size(report.uncompressed_size)),
+            self.tr("Disk write speed: {}").format(DownloadExtractWorker.format_speed(report.target_write_speed)),
+        ]
+        if report.cross_device:
+            details.append(self.tr("The download folder is on another drive, extraction copies across drives"))
+        if report.cached_size:
+            details.append(self.tr("Kept for reinstalls: {}").format(format_size(report.cached_size)))
+        if report.projected_time is not None:
+            details.append(self.tr("Estimated install time: {}").format(LauncherWidget.format_eta(report.projected_time)))
+        confirmation_dialog = GenericConfirmationDialog(
+            self,
+            title=self.tr("Ready to Install"),
+            message="\n".join(details),
+            confirm_text=self.tr("Install"),
+            cancel_text=self.tr("Cancel"),
+            icon_path=IMAGES / "turtle_wow_icon.png",
+        )
+        if confirmation_dialog.exec() == GenericConfirmationDialog.Accepted:
+            self.start_game_download()
+        else:
+            logger.info("User cancelled the install after the preflight")
+            self.cancel_setup()
+
+    def start_game_download(self):
+        self.launcher_widget.start_download(DOWNLOAD_URL, self.config.game_install_dir, DOWNLOAD_MIRRORS + self.config.download_mirrors)
+
     def on_download_completed(self):
         logger.debug("Download completed")
 
@@ -426,6 +527,9 @@ class TurtleWoWLauncher(QMainWindow):
                     InstallationStatusDialog(self, "warning", self.tr("Installation complete, but the game version could not be detected.")).exec()
             else:
                 logger.warning("Invalid or incomplete game installation after extraction")
+                if self.rollback_install():
+                    InstallationStatusDialog(self, "warning", self.tr("The new installation appears to be incomplete or invalid, so the previous one has been restored.")).exec()
+                    return
                 InstallationStatusDialog(self, "error", self.tr("The installation appears to be incomplete or invalid. Please try the installation process again.")).exec()
                 self.setup_first_launch()  # Restart the setup process
         else:
@@ -433,6 +537,18 @@ class TurtleWoWLauncher(QMainWindow):
             InstallationStatusDialog(self, "error", self.tr("Cannot identify the installation folder. Please try the installation process again.")).exec()
             self.setup_first_launch()  # Restart the setup process
 
+    def rollback_install(self):
+        """Put back the install the last staged install replaced, returning whether that gave a working game."""
+        # game_install_dir now points at the extracted folder, inside the folder it was staged in
+        staging = StagedInstall(Path(self.config.game_install_dir).parent)
+        try:
+            if not staging.rollback():
+                return False
+        except OSError as e:
+            logger.error(f"Could not restore the previous installation: {e}")
+            return False
+        return check_game_installation(self.config.game_install_dir, self.config.selected_binary)
+
     @Slot(str)
     def on_error(self, error_message):
         logger.error(f"Error occurred: {error_message}")
@@ -470,6 +586,10 @@ class TurtleWoWLauncher(QMainWindow):
     
     def quit_application(self):
         self.download_utility.cancel_download()
+        self.download_utility.set_seeding(False)
+        get_transfer_scheduler().pause_all()
+        get_async_loop().stop(get_http_service().close_loop_clients)
+        get_http_service().close()
         
         for child in self.children():
             if isinstance(child, QDialog) and child.isVisible():